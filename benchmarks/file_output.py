@@ -0,0 +1,84 @@
+"""
+Benchmark of FileOutput: time spent per flush depending on the number of rows
+already in the emissions file.
+
+Usage:
+    python benchmarks/file_output.py [--mode append] [--sizes 100 1000 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+from codecarbon.output import EmissionsData, FileOutput
+
+
+def get_emissions_data(run_id: str) -> EmissionsData:
+    return EmissionsData(
+        timestamp="2021-04-04T08:43:00",
+        project_name="benchmark",
+        run_id=run_id,
+        duration=3600.0,
+        emissions=0.01,
+        emissions_rate=0.003,
+        cpu_power=42.5,
+        gpu_power=0.0,
+        ram_power=6.0,
+        cpu_energy=0.0425,
+        gpu_energy=0.0,
+        ram_energy=0.006,
+        energy_consumed=0.0485,
+        country_name="France",
+        country_iso_code="FRA",
+        region="",
+        cloud_provider="",
+        cloud_region="",
+        os="Linux",
+        python_version="3.8.0",
+        cpu_count=16,
+        cpu_model="Intel(R) Xeon(R) CPU @ 2.20GHz",
+        gpu_count=0,
+        gpu_model="",
+        longitude=2.35,
+        latitude=48.85,
+        ram_total_size=64.0,
+        tracking_mode="machine",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--mode", choices=["append", "update"], default="append")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--flushes", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "emissions.csv")
+            output = FileOutput(path, "append")
+            run_ids = [str(uuid.uuid4()) for _ in range(size)]
+            for run_id in run_ids:
+                output.out(get_emissions_data(run_id))
+            output.close()
+
+            output = FileOutput(path, args.mode)
+            start = time.perf_counter()
+            # May check the headers or index the file
+            output.out(get_emissions_data(run_ids[0]))
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            for i in range(args.flushes):
+                output.out(get_emissions_data(run_ids[i % size]))
+            elapsed = time.perf_counter() - start
+            output.close()
+            print(
+                f"{args.mode:<8}{size:>9} rows  "
+                + f"first flush {first * 1e3:>9.3f} ms, then "
+                + f"{elapsed / args.flushes * 1e3:>9.3f} ms / flush"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Micro-benchmark of the RAPL energy counters reading.
+
+Compares the syscalls and time spent per sample by IntelRAPL when the energy
+files are re-opened at each measure and when they are kept open and read in
+bulk with os.pread.
+
+Usage:
+    python benchmarks/rapl_reads.py [--rapl-dir /sys/class/powercap/intel-rapl]
+                                    [--domains 8] [--samples 10000]
+
+Without --rapl-dir, a fake powercap tree with `--domains` zones is created in a
+temporary directory. The syscall counts are read from /proc/self/io (read
+syscalls) and by counting the calls to open/close made by the reader.
+"""
+import argparse
+import builtins
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from codecarbon.core.cpu import IntelRAPL
+from codecarbon.core.units import Time
+
+
+def make_fake_rapl_dir(path: str, domains: int) -> str:
+    for i in range(domains):
+        zone = os.path.join(path, f"intel-rapl:{i}")
+        os.makedirs(zone)
+        with open(os.path.join(zone, "name"), "w") as f:
+            f.write(f"package-{i}")
+        with open(os.path.join(zone, "energy_uj"), "w") as f:
+            f.write("52649883221\n")
+        with open(os.path.join(zone, "max_energy_range_uj"), "w") as f:
+            f.write("262143328850\n")
+    return path
+
+
+def read_syscalls() -> int:
+    with open("/proc/self/io") as f:
+        for line in f:
+            if line.startswith("syscr:"):
+                return int(line.split()[1])
+    return 0
+
+
+@contextmanager
+def count_open_close(counters: dict):
+    original_open, original_os_open, original_os_close = (
+        builtins.open,
+        os.open,
+        os.close,
+    )
+
+    def counting_open(*args, **kwargs):
+        counters["open"] += 1
+        # The file object is closed on exit of the `with` block
+        counters["close"] += 1
+        return original_open(*args, **kwargs)
+
+    def counting_os_open(*args, **kwargs):
+        counters["open"] += 1
+        return original_os_open(*args, **kwargs)
+
+    def counting_os_close(*args, **kwargs):
+        counters["close"] += 1
+        return original_os_close(*args, **kwargs)
+
+    builtins.open, os.open, os.close = (
+        counting_open,
+        counting_os_open,
+        counting_os_close,
+    )
+    try:
+        yield counters
+    finally:
+        builtins.open, os.open, os.close = (
+            original_open,
+            original_os_open,
+            original_os_close,
+        )
+
+
+def bench(rapl_dir: str, keep_files_open: bool, samples: int) -> dict:
+    rapl = IntelRAPL(rapl_dir=rapl_dir, keep_files_open=keep_files_open)
+    rapl.start()
+    duration = Time.from_seconds(1)
+    counters = {"open": 0, "close": 0}
+    syscr = read_syscalls()
+    with count_open_close(counters):
+        start = time.perf_counter()
+        for _ in range(samples):
+            rapl.get_cpu_details(duration=duration)
+        elapsed = time.perf_counter() - start
+    # Reading /proc/self/io costs read syscalls itself
+    reads = read_syscalls() - syscr - 2
+    return {
+        "open": counters["open"] / samples,
+        "read": reads / samples,
+        "close": counters["close"] / samples,
+        "us": elapsed / samples * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rapl-dir", default=None)
+    parser.add_argument("--domains", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rapl_dir = args.rapl_dir or make_fake_rapl_dir(tmp_dir, args.domains)
+        print(f"{'mode':<16}{'open':>8}{'read':>8}{'close':>8}{'us/sample':>12}")
+        for mode, keep_files_open in (("open per read", False), ("pread", True)):
+            res = bench(rapl_dir, keep_files_open, args.samples)
+            print(
+                f"{mode:<16}{res['open']:>8.1f}{res['read']:>8.1f}"
+                + f"{res['close']:>8.1f}{res['us']:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Startup benchmark: time spent importing codecarbon, and running a short
+offline tracker, in fresh interpreters.
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [PATH ...]
+
+Each PATH is a checkout of the repository to benchmark (the current one by
+default), e.g. to compare with a previous version:
+    git worktree add /tmp/codecarbon-old <commit>
+    python benchmarks/startup.py . /tmp/codecarbon-old
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "requests",
+    "pkg_resources",
+    "fuzzywuzzy",
+    "pynvml",
+    "arrow",
+    "cpuinfo",
+]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import codecarbon
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": [m for m in HEAVY if m in sys.modules]}))
+"""
+
+TRACKER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from codecarbon import OfflineEmissionsTracker
+tracker = OfflineEmissionsTracker(
+    country_iso_code="FRA", save_to_file=False, log_level="error"
+)
+tracker.start()
+tracker.stop()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": [m for m in HEAVY if m in sys.modules]}))
+"""
+
+
+def run(path: str, script: str, runs: int) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(path))
+    code = f"HEAVY = {HEAVY_MODULES!r}\n" + script
+    results = [
+        json.loads(
+            subprocess.check_output(
+                [sys.executable, "-c", code],
+                env=env,
+                cwd=os.path.abspath(path),
+                stderr=subprocess.DEVNULL,
+            )
+        )
+        for _ in range(runs)
+    ]
+    return {
+        "ms": statistics.median(r["seconds"] for r in results) * 1000,
+        "modules": results[-1]["modules"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("paths", nargs="*", default=["."])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    for path in args.paths:
+        print(path)
+        for name, script in (("import", IMPORT_SCRIPT), ("tracker", TRACKER_SCRIPT)):
+            res = run(path, script, args.runs)
+            print(
+                f"  {name:<8}{res['ms']:>9.1f} ms   "
+                + f"heavy modules: {', '.join(res['modules']) or '-'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
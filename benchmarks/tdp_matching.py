@@ -0,0 +1,94 @@
+"""
+Benchmark of the matching of CPU models with the TDP data (cpu_power.csv).
+
+Matches every CPU name of the table, and variants of them as reported by
+cpuinfo's brand_raw, with the full scan of the table by fuzzywuzzy that TDP
+used to do and with CPUModelMatcher, checks that both find the same CPUs and
+prints the time spent per model.
+
+Usage:
+    python benchmarks/tdp_matching.py [--limit 200]
+"""
+import argparse
+import time
+import warnings
+
+from codecarbon.core.cpu import CPUModelMatcher
+from codecarbon.input import DataSource
+
+with warnings.catch_warnings(record=True):
+    from fuzzywuzzy import fuzz
+
+
+def fuzzy_scan_match(model_raw, names, greedy=False):
+    """
+    Matching before CPUModelMatcher: fuzz ratios with every name, thresholds
+    of 100
+    """
+    model_l = model_raw.lower()
+    ratios_direct = [fuzz.ratio(model_l, name.lower()) for name in names]
+    if max(ratios_direct) >= 100:
+        return names[ratios_direct.index(max(ratios_direct))]
+    ratios_token_set = [fuzz.token_set_ratio(model_raw, name) for name in names]
+    max_ratio = max(ratios_token_set)
+    if max_ratio < 100:
+        return None
+    matches = [names[i] for i, r in enumerate(ratios_token_set) if r == max_ratio]
+    if len(matches) == 1 or greedy:
+        return matches[0]
+    return None
+
+
+def brand_raw_variants(name):
+    yield name
+    yield name.upper()
+    if name.startswith("Intel "):
+        yield "Intel(R) " + name[len("Intel ") :] + " CPU @ 2.20GHz"
+    if name.startswith("AMD "):
+        cores = "16-Core Processor"
+        yield f"{name} {cores}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--limit", type=int, default=None, help="only match the first CPU names"
+    )
+    args = parser.parse_args()
+
+    names = tuple(DataSource().get_cpu_power_data()["Name"])
+    models = [
+        variant for name in names[: args.limit] for variant in brand_raw_variants(name)
+    ]
+
+    start = time.perf_counter()
+    expected = [fuzzy_scan_match(model, names) for model in models]
+    scan_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = CPUModelMatcher(names)
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    matched = [matcher.match(model) for model in models]
+    match_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for model in models:
+        matcher.match(model)
+    memoized_seconds = time.perf_counter() - start
+
+    mismatches = [
+        (model, e, m) for model, e, m in zip(models, expected, matched) if e != m
+    ]
+    print(f"{len(models)} models matched with {len(names)} CPUs")
+    print(f"  fuzzy scan     {scan_seconds / len(models) * 1e3:>10.3f} ms / model")
+    print(f"  index build    {build_seconds * 1e3:>10.3f} ms")
+    print(f"  index          {match_seconds / len(models) * 1e3:>10.3f} ms / model")
+    print(f"  memoized       {memoized_seconds / len(models) * 1e3:>10.3f} ms / model")
+    print(f"  speedup        {scan_seconds / (build_seconds + match_seconds):>10.0f}x")
+    print(f"  mismatches     {len(mismatches):>10}")
+    for mismatch in mismatches[:10]:
+        print("    %r: scan %r, index %r" % mismatch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Cache of the rows read by the services, for the rows read again and again by
+the dashboards: the runs, experiments and projects, and the emissions which
+never change once added.
+
+The values are cached by namespace, with a time to live. Writing in a
+namespace invalidates all its values at once, by incrementing the version of
+the namespace which is part of the keys of its values. The backend is in the
+process by default, or a Redis server shared by the workers of the API when
+CACHE_REDIS_URL is set: with several workers, only the Redis backend
+invalidates the values of the other workers, else they expire after their
+time to live.
+"""
+import abc
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import parse_raw_as
+
+from carbonserver.logger import logger
+
+# Cached value of None
+NONE = b"null"
+
+
+class CacheBackend(abc.ABC):
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+
+class InMemoryBackend(CacheBackend):
+    """Least recently used values of the process, up to max_size of them"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._values: OrderedDict = OrderedDict()
+        # Never evicted, an evicted version would make old values valid again
+        self._counters = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            value, expires_at = self._values.get(key, (None, None))
+            if value is None:
+                return None
+            if expires_at <= time.monotonic():
+                del self._values[key]
+                return None
+            self._values.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl)
+            self._values.move_to_end(key)
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisBackend(CacheBackend):
+    """
+    Values of a Redis server, or of any client with the get, set and incr
+    methods of redis.Redis
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(key, value, px=int(ttl * 1000))
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+def get_cache_backend(redis_url: Optional[str], max_size: int) -> CacheBackend:
+    if redis_url is None:
+        return InMemoryBackend(max_size)
+    try:
+        import redis
+    except ImportError:
+        raise ImportError("CACHE_REDIS_URL is set but redis isn't installed")
+    return RedisBackend(redis.Redis.from_url(redis_url))
+
+
+class Cache:
+    """
+    Values cached by namespace
+
+    :backend: Where the values are stored, None to disable the cache.
+    :ttl: Seconds before the values expire.
+    :none_ttl: Seconds before the None values expire, 0 to never cache them.
+    """
+
+    def __init__(
+        self, backend: Optional[CacheBackend], ttl: float, none_ttl: float = 0
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.none_ttl = none_ttl
+
+    def get_or_set(
+        self, namespace: str, key: str, schema: Type, compute: Callable[[], Any]
+    ) -> Any:
+        """The value of the key if cached, else the value computed, cached
+        unless it's None and none_ttl is 0
+
+        :schema: The type of the value, to parse it when cached.
+        """
+        if self.backend is None:
+            return compute()
+        try:
+            cache_key = f"{namespace}:{self.version(namespace)}:{key}"
+            cached = self.backend.get(cache_key)
+        except Exception:
+            logger.warning("Cache unavailable", exc_info=True)
+            return compute()
+        if cached is not None:
+            return None if cached == NONE else parse_raw_as(schema, cached)
+        value = compute()
+        if value is None and self.none_ttl <= 0:
+            return value
+        try:
+            if value is None:
+                self.backend.set(cache_key, NONE, self.none_ttl)
+            else:
+                self.backend.set(
+                    cache_key, json.dumps(jsonable_encoder(value)).encode(), self.ttl
+                )
+        except Exception:
+            logger.warning("Cache unavailable", exc_info=True)
+        return value
+
+    def version(self, namespace: str) -> int:
+        version = self.backend.get(f"version:{namespace}")
+        return 0 if version is None else int(version)
+
+    def invalidate(self, namespace: str) -> None:
+        """Invalidate all the values of a namespace, after writing in it"""
+        if self.backend is None:
+            return
+        try:
+            self.backend.incr(f"version:{namespace}")
+        except Exception:
+            # The values expire after their time to live
+            logger.warning("Cache unavailable", exc_info=True)
+
+
+# Disabled cache of the services created without one
+NO_CACHE = Cache(backend=None, ttl=0)
@@ -1,7 +1,13 @@
 from typing import Optional
 
-from fastapi import Header, HTTPException
-
+from container import ServerContainer
+from dependency_injector.wiring import Provide, inject
+from fastapi import Depends, Header, HTTPException
+from starlette import status
+
+from carbonserver.api.schemas import ApiKeyScope
+from carbonserver.api.services.auth_service import AuthService
+from carbonserver.config import settings
 from carbonserver.database.database import SessionLocal
 
 
@@ -19,6 +25,30 @@ async def get_query_token(token: Optional[str] = "jessica"):
         raise HTTPException(status_code=400, detail="No Jessica token provided")
 
 
+@inject
+def get_api_key_scope(
+    x_api_key: Optional[str] = Header(None),
+    auth_service: AuthService = Depends(Provide[ServerContainer.auth_service]),
+) -> Optional[ApiKeyScope]:
+    """
+    The user of the API key of the x-api-key header. Without the header, None
+    unless API_KEY_REQUIRED is set.
+    """
+    if x_api_key is None:
+        if settings.api_key_required:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="x-api-key header missing",
+            )
+        return None
+    scope = auth_service.get_api_key_scope(x_api_key)
+    if scope is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid API key"
+        )
+    return scope
+
+
 # Dependency
 def get_db():
     db = SessionLocal()
@@ -1,8 +1,12 @@
 import abc
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
+from fastapi_pagination import Page, Params
+
 from carbonserver.api import schemas
+from carbonserver.api.pagination import CursorPage, CursorParams
 
 
 class Emissions(abc.ABC):
@@ -10,10 +14,42 @@ class Emissions(abc.ABC):
     def add_emission(self, emission: schemas.EmissionCreate) -> UUID:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def add_emissions(self, emissions: List[schemas.EmissionCreate]) -> List[UUID]:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_one_emission(self, emission_id) -> schemas.Emission:
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_emissions_from_run(self, run_id) -> List[schemas.Emission]:
+    def get_emissions_from_run(self, run_id, params: Params) -> Page[schemas.Emission]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_emissions_from_run_by_cursor(
+        self, run_id, params: CursorParams
+    ) -> CursorPage[schemas.Emission]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_emissions_aggregates(
+        self,
+        scope: schemas.AggregationScope,
+        scope_id,
+        bucket: Optional[schemas.TimeBucket] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[schemas.EmissionsAggregate]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_emissions_series(
+        self,
+        run_id,
+        resolution: schemas.Resolution,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[schemas.EmissionsSample]:
         raise NotImplementedError
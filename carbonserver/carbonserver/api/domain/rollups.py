@@ -0,0 +1,19 @@
+import abc
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from carbonserver.api import schemas
+
+
+class Rollups(abc.ABC):
+    @abc.abstractmethod
+    def get_rollup(
+        self, scope: schemas.AggregationScope, scope_id
+    ) -> Optional[schemas.EmissionsAggregate]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def check_rollups(
+        self, repair: bool = False, batch_size: int = 500
+    ) -> List[Tuple[schemas.AggregationScope, UUID]]:
+        raise NotImplementedError
@@ -13,6 +13,10 @@ class Users(abc.ABC):
     def get_user_by_id(self, user_id: int) -> User:
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_user_by_api_key(self, api_key: str) -> User:
+        raise NotImplementedError
+
     @abc.abstractmethod
     def list_users(self) -> List[User]:
         raise NotImplementedError
@@ -0,0 +1,40 @@
+import hashlib
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette import status
+
+
+def get_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+class ETagRoute(APIRoute):
+    """
+    Route whose successful GET responses have the hash of their body as ETag:
+    a request whose If-None-Match header has the ETag of the response gets an
+    empty 304 Not Modified response instead.
+    """
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def etag_route_handler(request: Request) -> Response:
+            response = await route_handler(request)
+            if (
+                request.method != "GET"
+                or response.status_code != status.HTTP_200_OK
+                or getattr(response, "body", None) is None
+            ):
+                return response
+            etag = get_etag(response.body)
+            if_none_match = request.headers.get("if-none-match", "")
+            if etag in [tag.strip() for tag in if_none_match.split(",")]:
+                return Response(
+                    status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+                )
+            response.headers["ETag"] = etag
+            return response
+
+        return etag_route_handler
@@ -1,19 +1,37 @@
-from contextlib import AbstractContextManager, contextmanager
-from typing import Callable
+from contextlib import AbstractContextManager, asynccontextmanager, contextmanager
+from typing import AsyncContextManager, Callable, Optional
 
-from sqlalchemy import create_engine, exc, orm
+from sqlalchemy import exc, orm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
 
 from carbonserver.api.errors import DBError, DBErrorEnum, DBException
+from carbonserver.database.database import get_async_engine, get_async_url, get_engine
 from carbonserver.logger import logger
 
 Base = declarative_base()
 
+# Errors of the database reported to the client, as a DBException
+DB_ERRORS = (exc.IntegrityError, exc.DataError, exc.ProgrammingError)
+
+
+def to_db_exception(e: exc.DBAPIError) -> DBException:
+    if isinstance(e, exc.IntegrityError):
+        error = DBError(
+            code=DBErrorEnum.INTEGRITY_ERROR,
+            message="Relation not found, or duplicate key",
+        )
+    elif isinstance(e, exc.DataError):
+        error = DBError(code=DBErrorEnum.DATA_ERROR, message="Invalid data")
+    else:
+        error = DBError(code=DBErrorEnum.PROGRAMMING_ERROR, message="Wrong schema")
+    return DBException(error=error)
+
 
 class Database:
     def __init__(self, db_url: str) -> None:
-        self._engine = create_engine(db_url, echo=True)
+        self._engine = get_engine(db_url)
         self._session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
@@ -31,32 +49,47 @@ class Database:
         try:
             yield session
 
-        except exc.IntegrityError as e:
-            session.rollback()
-            logger.error(e.orig.args[0], exc_info=True)
-            raise DBException(
-                error=DBError(
-                    code=DBErrorEnum.INTEGRITY_ERROR,
-                    message="Relation not found, or duplicate key",
-                )
-            )
-        except exc.DataError as e:
+        except DB_ERRORS as e:
             session.rollback()
             logger.error(e.orig.args[0], exc_info=True)
-            raise DBException(
-                error=DBError(code=DBErrorEnum.DATA_ERROR, message="Invalid data")
-            )
-        except exc.ProgrammingError as e:
-            session.rollback()
-            logger.error(e.orig.args[0], exc_info=True)
-            raise DBException(
-                error=DBError(
-                    code=DBErrorEnum.PROGRAMMING_ERROR, message="Wrong schema"
-                )
-            )
+            raise to_db_exception(e)
         except Exception:
             logger.error("Session rollback because of exception", exc_info=True)
             session.rollback()
             raise
         finally:
             session.close()
+
+
+class AsyncDatabase:
+    """
+    Sessions of the async engine of the database, the queries don't block the
+    event loop while they wait for the database.
+    """
+
+    def __init__(self, db_url: str, db_async_url: Optional[str] = None) -> None:
+        self._engine = get_async_engine(db_async_url or get_async_url(db_url))
+        self._session_factory = orm.sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self._engine,
+            class_=AsyncSession,
+        )
+
+    @asynccontextmanager
+    async def session(self) -> Callable[..., AsyncContextManager]:
+        session: AsyncSession = self._session_factory()
+        try:
+            yield session
+
+        except DB_ERRORS as e:
+            await session.rollback()
+            logger.error(e.orig.args[0], exc_info=True)
+            raise to_db_exception(e)
+        except Exception:
+            logger.error("Session rollback because of exception", exc_info=True)
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
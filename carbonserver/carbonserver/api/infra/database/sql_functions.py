@@ -0,0 +1,48 @@
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+"""
+SQL functions missing from some of the databases supported, compiled to an
+equivalent expression for them.
+"""
+
+# date_trunc() units and their strftime() format on SQLite
+DATE_TRUNC_SQLITE_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+    "month": "%Y-%m-01 00:00:00",
+}
+
+
+class date_trunc(FunctionElement):
+    """Start of the minute, hour, day, week (on monday) or month of a timestamp
+
+    The unit is rendered in the statement, so that the expression is the same
+    in the SELECT and the GROUP BY clauses.
+    """
+
+    type = DateTime()
+    name = "date_trunc"
+    # The unit isn't part of the cache key of the statements
+    inherit_cache = False
+
+    def __init__(self, unit: str, timestamp):
+        if unit not in DATE_TRUNC_SQLITE_FORMATS and unit != "week":
+            raise ValueError(f"Unknown date_trunc unit {unit}")
+        self.unit = unit
+        super().__init__(timestamp)
+
+
+@compiles(date_trunc)
+def compile_date_trunc(element, compiler, **kw):
+    return f"date_trunc('{element.unit}', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(date_trunc, "sqlite")
+def compile_date_trunc_sqlite(element, compiler, **kw):
+    timestamp = compiler.process(element.clauses, **kw)
+    if element.unit == "week":
+        return f"datetime({timestamp}, 'weekday 0', '-6 days', 'start of day')"
+    return f"strftime('{DATE_TRUNC_SQLITE_FORMATS[element.unit]}', {timestamp})"
@@ -1,6 +1,15 @@
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import ARRAY
@@ -22,9 +31,19 @@ class Emission(Base):
     gpu_energy = Column(Float)
     ram_energy = Column(Float)
     energy_consumed = Column(Float)
+    # Power sampled between two measures of the tracker, when sampled
+    gpu_power_min = Column(Float)
+    gpu_power_max = Column(Float)
+    gpu_power_p95 = Column(Float)
+    ram_power_min = Column(Float)
+    ram_power_max = Column(Float)
+    ram_power_p95 = Column(Float)
     run_id = Column(UUID(as_uuid=True), ForeignKey("runs.id"))
     run = relationship("Run", back_populates="emissions")
 
+    # The emissions of a run, in the order of their timestamp
+    __table_args__ = (Index("ix_emissions_run_id_timestamp", "run_id", "timestamp"),)
+
     def __repr__(self):
         return (
             f'<Emission(id="{self.id}", '
@@ -34,11 +53,51 @@ class Emission(Base):
         )
 
 
+class RollupMixin:
+    """Sums of the emissions of a run or an experiment"""
+
+    emissions_count = Column(Integer, nullable=False, default=0)
+    duration = Column(Float, nullable=False, default=0)
+    emissions_sum = Column(Float, nullable=False, default=0)
+    energy_consumed = Column(Float, nullable=False, default=0)
+    cpu_energy = Column(Float, nullable=False, default=0)
+    gpu_energy = Column(Float, nullable=False, default=0)
+    ram_energy = Column(Float, nullable=False, default=0)
+    first_timestamp = Column(DateTime)
+    last_timestamp = Column(DateTime)
+
+
+class RunRollup(RollupMixin, Base):
+    __tablename__ = "run_rollups"
+    run_id = Column(UUID(as_uuid=True), ForeignKey("runs.id"), primary_key=True)
+
+    def __repr__(self):
+        return (
+            f'<RunRollup(run_id="{self.run_id}", '
+            f'emissions_count="{self.emissions_count}", '
+            f'last_timestamp="{self.last_timestamp}")>'
+        )
+
+
+class ExperimentRollup(RollupMixin, Base):
+    __tablename__ = "experiment_rollups"
+    experiment_id = Column(
+        UUID(as_uuid=True), ForeignKey("experiments.id"), primary_key=True
+    )
+
+    def __repr__(self):
+        return (
+            f'<ExperimentRollup(experiment_id="{self.experiment_id}", '
+            f'emissions_count="{self.emissions_count}", '
+            f'last_timestamp="{self.last_timestamp}")>'
+        )
+
+
 class Run(Base):
     __tablename__ = "runs"
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     timestamp = Column(DateTime)
-    experiment_id = Column(UUID(as_uuid=True), ForeignKey("experiments.id"))
+    experiment_id = Column(UUID(as_uuid=True), ForeignKey("experiments.id"), index=True)
     os = Column(String, nullable=True)
     python_version = Column(String, nullable=True)
     cpu_count = Column(Integer, nullable=True)
@@ -86,7 +145,7 @@ class Experiment(Base):
     on_cloud = Column(Boolean, default=False)
     cloud_provider = Column(String)
     cloud_region = Column(String)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"))
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), index=True)
     project = relationship("Project", back_populates="experiments")
     runs = relationship("Run", back_populates="experiment")
 
@@ -108,7 +167,7 @@ class Project(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String)
     description = Column(String)
-    team_id = Column(UUID(as_uuid=True), ForeignKey("teams.id"))
+    team_id = Column(UUID(as_uuid=True), ForeignKey("teams.id"), index=True)
     experiments = relationship("Experiment", back_populates="project")
     team = relationship("Team", back_populates="projects")
 
@@ -126,7 +185,9 @@ class Team(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String)
     description = Column(String)
-    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"))
+    organization_id = Column(
+        UUID(as_uuid=True), ForeignKey("organizations.id"), index=True
+    )
     projects = relationship("Project", back_populates="team")
     api_key = Column(String)
     organization = relationship("Organization", back_populates="teams")
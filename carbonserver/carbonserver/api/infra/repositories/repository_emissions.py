@@ -1,13 +1,36 @@
-from contextlib import AbstractContextManager
-from typing import List
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime
+from typing import AsyncContextManager, List, Optional
 from uuid import uuid4
 
 from click import UUID
 from dependency_injector.providers import Callable
+from fastapi_pagination import Page, Params
+from sqlalchemy import func, insert, null
 
 from carbonserver.api.domain.emissions import Emissions
 from carbonserver.api.infra.database import sql_models
-from carbonserver.api.schemas import Emission, EmissionCreate
+from carbonserver.api.infra.database.sql_functions import date_trunc
+from carbonserver.api.infra.repositories.repository_rollups import (
+    SUMMED_COLUMNS,
+    add_to_rollups,
+)
+from carbonserver.api.pagination import (
+    CursorPage,
+    CursorParams,
+    paginate_query,
+    paginate_query_by_cursor,
+)
+from carbonserver.api.schemas import (
+    AggregationScope,
+    Emission,
+    EmissionCreate,
+    EmissionsAggregate,
+    EmissionsSample,
+    Resolution,
+    SampleStatistics,
+    TimeBucket,
+)
 
 """
 The emissions are stored in the database by this repository class.
@@ -16,13 +39,51 @@ It relies on an abstract repository which exposes an interface of signatures sha
 
 """
 
+SCOPES = list(AggregationScope)
+# Columns of the emissions summarized by their min, max and mean in the series
+SAMPLED_COLUMNS = [
+    "emissions_sum",
+    "emissions_rate",
+    "cpu_power",
+    "gpu_power",
+    "ram_power",
+    "cpu_energy",
+    "gpu_energy",
+    "ram_energy",
+    "energy_consumed",
+]
+# Joins from the emissions up to each scope, and the column of its id
+SCOPE_JOINS = [
+    (
+        sql_models.Run,
+        sql_models.Emission.run_id == sql_models.Run.id,
+        sql_models.Run.experiment_id,
+    ),
+    (
+        sql_models.Experiment,
+        sql_models.Run.experiment_id == sql_models.Experiment.id,
+        sql_models.Experiment.project_id,
+    ),
+    (
+        sql_models.Project,
+        sql_models.Experiment.project_id == sql_models.Project.id,
+        sql_models.Project.team_id,
+    ),
+    (
+        sql_models.Team,
+        sql_models.Project.team_id == sql_models.Team.id,
+        sql_models.Team.organization_id,
+    ),
+]
+
 
 class SqlAlchemyRepository(Emissions):
     def __init__(self, session_factory) -> Callable[..., AbstractContextManager]:
         self.session_factory = session_factory
 
     def add_emission(self, emission: EmissionCreate) -> UUID:
-        """Save an emission to the database.
+        """Save an emission to the database, and add it to the rollups of its
+        run and experiment.
 
         :emission: An Emission in pyDantic BaseModel format.
         """
@@ -40,12 +101,35 @@ class SqlAlchemyRepository(Emissions):
                 gpu_energy=emission.gpu_energy,
                 ram_energy=emission.ram_energy,
                 energy_consumed=emission.energy_consumed,
+                gpu_power_min=emission.gpu_power_min,
+                gpu_power_max=emission.gpu_power_max,
+                gpu_power_p95=emission.gpu_power_p95,
+                ram_power_min=emission.ram_power_min,
+                ram_power_max=emission.ram_power_max,
+                ram_power_p95=emission.ram_power_p95,
                 run_id=emission.run_id,
             )
             session.add(db_emission)
+            add_to_rollups(session, [emission.dict()])
             session.commit()
             return db_emission.id
 
+    def add_emissions(self, emissions: List[EmissionCreate]) -> List[UUID]:
+        """Save emissions to the database, with a single INSERT statement
+        executed for all of them in one transaction, with their rollups.
+
+        :emissions: Emissions in pyDantic BaseModel format.
+        :returns: The ids of the emissions, in the same order.
+        """
+        rows = [{"id": uuid4(), **emission.dict()} for emission in emissions]
+        if not rows:
+            return []
+        with self.session_factory() as session:
+            session.execute(insert(sql_models.Emission), rows)
+            add_to_rollups(session, rows)
+            session.commit()
+        return [row["id"] for row in rows]
+
     def get_one_emission(self, emission_id) -> Emission:
         """Find the emission in database and return it
 
@@ -64,22 +148,208 @@ class SqlAlchemyRepository(Emissions):
             else:
                 return self.map_sql_to_schema(e)
 
-    def get_emissions_from_run(self, run_id) -> List[Emission]:
-        """Find the emissions from an run in database and return it
+    def get_emissions_from_run(self, run_id, params: Params) -> Page[Emission]:
+        """Find a page of the emissions from a run in database and return it
 
         :run_id: The id of the run to retreive emissions from.
-        :returns: An Emission in pyDantic BaseModel format.
-        :rtype: List[schemas.Emission]
+        :params: The page number and size.
+        :returns: A Page of Emission in pyDantic BaseModel format.
+        :rtype: Page[schemas.Emission]
         """
         with self.session_factory() as session:
+            query = (
+                session.query(sql_models.Emission)
+                .filter(sql_models.Emission.run_id == run_id)
+                .order_by(sql_models.Emission.timestamp, sql_models.Emission.id)
+            )
+            return paginate_query(query, params, self.map_sql_to_schema)
 
-            res = session.query(sql_models.Emission).filter(
+    def get_emissions_from_run_by_cursor(
+        self, run_id, params: CursorParams
+    ) -> CursorPage[Emission]:
+        """Find the emissions from a run following a cursor in database and
+        return them
+
+        :run_id: The id of the run to retreive emissions from.
+        :params: The cursor and the page size.
+        :returns: A CursorPage of Emission in pyDantic BaseModel format.
+        :rtype: CursorPage[schemas.Emission]
+        """
+        with self.session_factory() as session:
+            query = session.query(sql_models.Emission).filter(
                 sql_models.Emission.run_id == run_id
             )
-            if res.first() is None:
-                return []
+            return paginate_query_by_cursor(
+                query,
+                params,
+                sql_models.Emission.timestamp,
+                sql_models.Emission.id,
+                self.map_sql_to_schema,
+            )
+
+    def get_emissions_aggregates(
+        self,
+        scope: AggregationScope,
+        scope_id,
+        bucket: Optional[TimeBucket] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[EmissionsAggregate]:
+        """Sum the emissions of a run, experiment, project, team or organization
+        in the database, over time buckets or over the whole period
+
+        :scope: The kind of entity to sum the emissions of.
+        :scope_id: The id of the entity.
+        :bucket: The time buckets, None to sum over the whole period.
+        :start: Only sum the emissions from this timestamp.
+        :end: Only sum the emissions before this timestamp.
+        :returns: The sums, by chronological order of the buckets.
+        :rtype: List[schemas.EmissionsAggregate]
+        """
+        sums = [
+            func.min(sql_models.Emission.timestamp).label("start"),
+            func.max(sql_models.Emission.timestamp).label("end"),
+            func.count(sql_models.Emission.id).label("emissions_count"),
+        ] + [
+            func.coalesce(func.sum(getattr(sql_models.Emission, name)), 0).label(name)
+            for name in SUMMED_COLUMNS
+        ]
+        with self.session_factory() as session:
+            if bucket is None:
+                bucket_start = null()
+            else:
+                bucket_start = date_trunc(bucket.value, sql_models.Emission.timestamp)
+            query = session.query(bucket_start.label("bucket"), *sums).select_from(
+                sql_models.Emission
+            )
+            if bucket is not None:
+                query = query.group_by(bucket_start).order_by(bucket_start)
+            scope_column = sql_models.Emission.run_id
+            for model, on_clause, column in SCOPE_JOINS[: SCOPES.index(scope)]:
+                query = query.join(model, on_clause)
+                scope_column = column
+            query = query.filter(scope_column == scope_id)
+            if start is not None:
+                query = query.filter(sql_models.Emission.timestamp >= start)
+            if end is not None:
+                query = query.filter(sql_models.Emission.timestamp < end)
+            return [
+                self.map_aggregate_to_schema(row)
+                for row in query
+                if row.emissions_count > 0
+            ]
+
+    def get_emissions_series(
+        self,
+        run_id,
+        resolution: Resolution,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[EmissionsSample]:
+        """Downsample the emissions of a run in the database, to the min, max
+        and mean of their values over each minute, hour or day
+
+        :run_id: The id of the run.
+        :resolution: The duration of the samples, raw for a sample per emission.
+        :start: Only sample the emissions from this timestamp.
+        :end: Only sample the emissions before this timestamp.
+        :limit: The maximum number of samples, the first ones.
+        :returns: The samples, by chronological order.
+        :rtype: List[schemas.EmissionsSample]
+        """
+        with self.session_factory() as session:
+            if resolution == Resolution.raw:
+                query = session.query(sql_models.Emission)
             else:
-                return [self.map_sql_to_schema(e) for e in res]
+                bucket_start = date_trunc(
+                    resolution.value, sql_models.Emission.timestamp
+                )
+                statistics = [
+                    aggregate(getattr(sql_models.Emission, name)).label(
+                        f"{name}_{statistic}"
+                    )
+                    for name in SAMPLED_COLUMNS
+                    for statistic, aggregate in (
+                        ("min", func.min),
+                        ("max", func.max),
+                        ("mean", func.avg),
+                    )
+                ]
+                query = (
+                    session.query(
+                        bucket_start.label("timestamp"),
+                        func.count(sql_models.Emission.id).label("emissions_count"),
+                        func.coalesce(func.sum(sql_models.Emission.duration), 0).label(
+                            "duration"
+                        ),
+                        *statistics,
+                    )
+                    .group_by(bucket_start)
+                    .order_by(bucket_start)
+                )
+            query = query.filter(sql_models.Emission.run_id == run_id)
+            if start is not None:
+                query = query.filter(sql_models.Emission.timestamp >= start)
+            if end is not None:
+                query = query.filter(sql_models.Emission.timestamp < end)
+            if resolution == Resolution.raw:
+                query = query.order_by(
+                    sql_models.Emission.timestamp, sql_models.Emission.id
+                )
+            if limit is not None:
+                query = query.limit(limit)
+            return [self.map_sample_to_schema(row, resolution) for row in query]
+
+    @staticmethod
+    def map_sample_to_schema(row, resolution: Resolution) -> EmissionsSample:
+        """Convert a row of statistics, or a models.Emission at raw resolution,
+        to a schemas.EmissionsSample
+
+        :row: A row of get_emissions_series query.
+        :returns: An EmissionsSample in pyDantic BaseModel format.
+        :rtype: schemas.EmissionsSample
+        """
+        if resolution == Resolution.raw:
+            return EmissionsSample(
+                timestamp=row.timestamp,
+                emissions_count=1,
+                duration=row.duration,
+                **{
+                    name: SampleStatistics(
+                        min=getattr(row, name),
+                        max=getattr(row, name),
+                        mean=getattr(row, name),
+                    )
+                    for name in SAMPLED_COLUMNS
+                },
+            )
+        return EmissionsSample(
+            timestamp=row.timestamp,
+            emissions_count=row.emissions_count,
+            duration=row.duration,
+            **{
+                name: SampleStatistics(
+                    min=getattr(row, f"{name}_min"),
+                    max=getattr(row, f"{name}_max"),
+                    mean=getattr(row, f"{name}_mean"),
+                )
+                for name in SAMPLED_COLUMNS
+            },
+        )
+
+    @staticmethod
+    def map_aggregate_to_schema(row) -> EmissionsAggregate:
+        """Convert a row of sums to a schemas.EmissionsAggregate
+
+        :row: A row of get_emissions_aggregates query.
+        :returns: An EmissionsAggregate in pyDantic BaseModel format.
+        :rtype: schemas.EmissionsAggregate
+        """
+        return EmissionsAggregate(
+            emissions_rate=row.emissions_sum / row.duration if row.duration else None,
+            **row._asdict(),
+        )
 
     @staticmethod
     def map_sql_to_schema(emission: sql_models.Emission) -> Emission:
@@ -102,5 +372,49 @@ class SqlAlchemyRepository(Emissions):
             gpu_energy=emission.gpu_energy,
             ram_energy=emission.ram_energy,
             energy_consumed=emission.energy_consumed,
+            gpu_power_min=emission.gpu_power_min,
+            gpu_power_max=emission.gpu_power_max,
+            gpu_power_p95=emission.gpu_power_p95,
+            ram_power_min=emission.ram_power_min,
+            ram_power_max=emission.ram_power_max,
+            ram_power_p95=emission.ram_power_p95,
             run_id=emission.run_id,
         )
+
+
+class AsyncSqlAlchemyRepository:
+    """The queries of SqlAlchemyRepository, run with the async engine
+
+    :session_factory: The session method of an AsyncDatabase.
+    """
+
+    def __init__(self, session_factory: Callable[..., AsyncContextManager]):
+        self.session_factory = session_factory
+
+    async def _run(self, method: str, *args):
+        """Run a method of SqlAlchemyRepository with the session of the async
+        engine, the event loop serves other requests meanwhile."""
+
+        def run(session):
+            repository = SqlAlchemyRepository(lambda: nullcontext(session))
+            return getattr(repository, method)(*args)
+
+        async with self.session_factory() as session:
+            return await session.run_sync(run)
+
+    async def add_emission(self, emission: EmissionCreate) -> UUID:
+        return await self._run("add_emission", emission)
+
+    async def add_emissions(self, emissions: List[EmissionCreate]) -> List[UUID]:
+        return await self._run("add_emissions", emissions)
+
+    async def get_one_emission(self, emission_id) -> Emission:
+        return await self._run("get_one_emission", emission_id)
+
+    async def get_emissions_from_run(self, run_id, params: Params) -> Page[Emission]:
+        return await self._run("get_emissions_from_run", run_id, params)
+
+    async def get_emissions_from_run_by_cursor(
+        self, run_id, params: CursorParams
+    ) -> CursorPage[Emission]:
+        return await self._run("get_emissions_from_run_by_cursor", run_id, params)
@@ -0,0 +1,344 @@
+import math
+from contextlib import AbstractContextManager
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from dependency_injector.providers import Callable
+from sqlalchemy import case, exists, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from carbonserver.api.domain.rollups import Rollups
+from carbonserver.api.infra.database import sql_models
+from carbonserver.api.schemas import AggregationScope, EmissionsAggregate
+
+"""
+The rollups are the sums of the emissions of each run and experiment, kept
+up to date in the transaction that adds the emissions, so that reading the
+current totals of a run doesn't scan its emissions.
+The emission repository adds the new emissions to the rollups with
+add_to_rollups, this repository reads them and checks them against the
+emissions.
+"""
+
+# Columns of the emissions summed in the rollups and the aggregates
+SUMMED_COLUMNS = [
+    "duration",
+    "emissions_sum",
+    "energy_consumed",
+    "cpu_energy",
+    "gpu_energy",
+    "ram_energy",
+]
+ROLLUP_MODELS = {
+    AggregationScope.run: (sql_models.RunRollup, "run_id"),
+    AggregationScope.experiment: (sql_models.ExperimentRollup, "experiment_id"),
+}
+# Table of the runs or experiments of the rollups
+ROLLUP_PARENTS = {
+    AggregationScope.run: sql_models.Run,
+    AggregationScope.experiment: sql_models.Experiment,
+}
+# Runs or experiments checked at once by check_rollups
+CHECK_BATCH_SIZE = 500
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def add_to_rollups(session: Session, emissions: List[dict]) -> None:
+    """Add emissions to the rollups of their run and experiment, in the
+    transaction of the session
+
+    :emissions: The columns of the emissions added, by name.
+    """
+    runs: Dict[UUID, dict] = dict()
+    for emission in emissions:
+        run_rollup = runs.setdefault(emission["run_id"], new_rollup(emission))
+        add_to_rollup(run_rollup, emission)
+    experiment_ids = dict(
+        session.query(sql_models.Run.id, sql_models.Run.experiment_id).filter(
+            sql_models.Run.id.in_(list(runs))
+        )
+    )
+    experiments: Dict[UUID, dict] = dict()
+    for run_id, run_rollup in runs.items():
+        experiment_id = experiment_ids.get(run_id)
+        if experiment_id is not None:
+            experiment_rollup = experiments.setdefault(
+                experiment_id, new_rollup(run_rollup)
+            )
+            add_to_rollup(experiment_rollup, run_rollup)
+    upsert_rollups(session, AggregationScope.run, runs)
+    upsert_rollups(session, AggregationScope.experiment, experiments)
+
+
+def new_rollup(emission: dict) -> dict:
+    return {
+        "emissions_count": 0,
+        "first_timestamp": emission.get("first_timestamp", emission.get("timestamp")),
+        "last_timestamp": emission.get("last_timestamp", emission.get("timestamp")),
+        **{column: 0.0 for column in SUMMED_COLUMNS},
+    }
+
+
+def add_to_rollup(rollup: dict, emissions: dict) -> None:
+    """Add an emission, or the rollup of emissions, to a rollup"""
+    rollup["emissions_count"] += emissions.get("emissions_count", 1)
+    for column in SUMMED_COLUMNS:
+        rollup[column] += emissions[column] or 0
+    first = emissions.get("first_timestamp", emissions.get("timestamp"))
+    last = emissions.get("last_timestamp", emissions.get("timestamp"))
+    rollup["first_timestamp"] = min(rollup["first_timestamp"], first)
+    rollup["last_timestamp"] = max(rollup["last_timestamp"], last)
+
+
+def upsert_rollups(
+    session: Session, scope: AggregationScope, rollups: Dict[UUID, dict]
+) -> None:
+    """Add the rollups to the ones in database, or insert them"""
+    if not rollups:
+        return
+    model, key = ROLLUP_MODELS[scope]
+    # Always in the same order, for concurrent transactions not to deadlock
+    rows = [
+        {key: rollup_id, **rollups[rollup_id]} for rollup_id in sorted(rollups, key=str)
+    ]
+    insert = UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        for row in rows:
+            updated = (
+                session.query(model)
+                .filter(getattr(model, key) == row[key])
+                .update(rollup_increments(model, row), synchronize_session=False)
+            )
+            if updated == 0:
+                session.add(model(**row))
+        return
+    statement = insert(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=[key], set_=rollup_increments(model, statement.excluded)
+    )
+    session.execute(statement, rows)
+
+
+def rollup_increments(model, increments) -> dict:
+    """Values of the rollup columns of `model` after adding `increments`
+
+    :increments: The excluded row of an upsert, or the values as a dict.
+    """
+
+    def increment(column):
+        if isinstance(increments, dict):
+            return increments[column]
+        return getattr(increments, column)
+
+    current_first = model.first_timestamp
+    current_last = model.last_timestamp
+    values = {
+        column: getattr(model, column) + increment(column)
+        for column in ["emissions_count"] + SUMMED_COLUMNS
+    }
+    values["first_timestamp"] = case(
+        (
+            or_(
+                current_first.is_(None),
+                increment("first_timestamp") < current_first,
+            ),
+            increment("first_timestamp"),
+        ),
+        else_=current_first,
+    )
+    values["last_timestamp"] = case(
+        (
+            or_(
+                current_last.is_(None),
+                increment("last_timestamp") > current_last,
+            ),
+            increment("last_timestamp"),
+        ),
+        else_=current_last,
+    )
+    return values
+
+
+class SqlAlchemyRepository(Rollups):
+    def __init__(self, session_factory) -> Callable[..., AbstractContextManager]:
+        self.session_factory = session_factory
+
+    def get_rollup(
+        self, scope: AggregationScope, scope_id
+    ) -> Optional[EmissionsAggregate]:
+        """Find the rollup of a run or an experiment in database and return it
+
+        :scope: run or experiment.
+        :scope_id: The id of the run or the experiment.
+        :returns: The sums of its emissions, None when it has none.
+        :rtype: schemas.EmissionsAggregate
+        """
+        model, key = ROLLUP_MODELS[scope]
+        with self.session_factory() as session:
+            rollup = (
+                session.query(model).filter(getattr(model, key) == scope_id).first()
+            )
+            if rollup is None or rollup.emissions_count == 0:
+                return None
+            return self.map_sql_to_schema(rollup)
+
+    def check_rollups(
+        self, repair: bool = False, batch_size: int = CHECK_BATCH_SIZE
+    ) -> List[Tuple[AggregationScope, UUID]]:
+        """Compare the rollups with the sums of the emissions in database
+
+        The rollups are read and summed by batches of runs and experiments,
+        without locks, so that emissions keep being added. A rollup
+        found inconsistent is checked again in a short transaction of its
+        own, locked, so that emissions added meanwhile are added to the
+        repaired rollup.
+
+        :repair: Replace the inconsistent rollups with the sums of the emissions.
+        :batch_size: Runs or experiments checked at once.
+        :returns: The scope and id of the inconsistent rollups.
+        """
+        inconsistent = []
+        for scope, (model, key) in ROLLUP_MODELS.items():
+            for rollup_ids in self.iter_rollup_ids(scope, batch_size):
+                with self.session_factory() as session:
+                    stored = {
+                        getattr(rollup, key): rollup
+                        for rollup in session.query(model).filter(
+                            getattr(model, key).in_(rollup_ids)
+                        )
+                    }
+                    expected = self.sum_emissions(session, scope, rollup_ids)
+                    suspects = [
+                        rollup_id
+                        for rollup_id in rollup_ids
+                        if not self.is_consistent(
+                            stored.get(rollup_id), expected.get(rollup_id)
+                        )
+                    ]
+                for rollup_id in suspects:
+                    if self.check_rollup(scope, rollup_id, repair):
+                        inconsistent.append((scope, rollup_id))
+        return inconsistent
+
+    def check_rollup(self, scope: AggregationScope, rollup_id, repair: bool) -> bool:
+        """Check a rollup again, locked, and repair it
+
+        :returns: Whether it is inconsistent.
+        """
+        model, key = ROLLUP_MODELS[scope]
+        with self.session_factory() as session:
+            rollup = (
+                session.query(model)
+                .filter(getattr(model, key) == rollup_id)
+                .with_for_update()
+                .first()
+            )
+            values = self.sum_emissions(session, scope, [rollup_id]).get(rollup_id)
+            if self.is_consistent(rollup, values):
+                session.rollback()
+                return False
+            if repair:
+                if values is None:
+                    session.delete(rollup)
+                else:
+                    session.merge(model(**{key: rollup_id}, **values))
+            session.commit()
+            return True
+
+    def iter_rollup_ids(
+        self, scope: AggregationScope, batch_size: int
+    ) -> Iterator[List[UUID]]:
+        """The ids of the runs or experiments, then of the rollups without
+        their run or experiment, by batches
+        """
+        model, key = ROLLUP_MODELS[scope]
+        parent = ROLLUP_PARENTS[scope]
+        orphan = ~exists().where(parent.id == getattr(model, key))
+        for column, condition in ((parent.id, None), (getattr(model, key), orphan)):
+            last_id = None
+            while True:
+                with self.session_factory() as session:
+                    query = session.query(column)
+                    if condition is not None:
+                        query = query.filter(condition)
+                    if last_id is not None:
+                        query = query.filter(column > last_id)
+                    rollup_ids = [
+                        row[0] for row in query.order_by(column).limit(batch_size)
+                    ]
+                if not rollup_ids:
+                    break
+                yield rollup_ids
+                last_id = rollup_ids[-1]
+
+    @staticmethod
+    def sum_emissions(
+        session: Session, scope: AggregationScope, rollup_ids: List[UUID]
+    ) -> Dict[UUID, dict]:
+        """The expected values of the rollups of runs or experiments, for
+        those with emissions
+        """
+        sums = [func.count(sql_models.Emission.id).label("emissions_count")] + [
+            func.coalesce(func.sum(getattr(sql_models.Emission, column)), 0).label(
+                column
+            )
+            for column in SUMMED_COLUMNS
+        ]
+        sums += [
+            func.min(sql_models.Emission.timestamp).label("first_timestamp"),
+            func.max(sql_models.Emission.timestamp).label("last_timestamp"),
+        ]
+        if scope == AggregationScope.run:
+            group = sql_models.Emission.run_id
+            query = session.query(group, *sums)
+        else:
+            group = sql_models.Run.experiment_id
+            query = session.query(group, *sums).join(
+                sql_models.Run, sql_models.Emission.run_id == sql_models.Run.id
+            )
+        expected = dict()
+        for row in query.filter(group.in_(rollup_ids)).group_by(group):
+            values = row._asdict()
+            expected[values.pop(group.key)] = values
+        return expected
+
+    @staticmethod
+    def is_consistent(rollup, values: Optional[dict]) -> bool:
+        if rollup is None or values is None:
+            return rollup is None and values is None
+        return (
+            rollup.emissions_count == values["emissions_count"]
+            and rollup.first_timestamp == values["first_timestamp"]
+            and rollup.last_timestamp == values["last_timestamp"]
+            and all(
+                math.isclose(
+                    getattr(rollup, column), values[column], rel_tol=1e-9, abs_tol=1e-9
+                )
+                for column in SUMMED_COLUMNS
+            )
+        )
+
+    @staticmethod
+    def map_sql_to_schema(rollup) -> EmissionsAggregate:
+        """Convert a models.RunRollup or models.ExperimentRollup to a
+        schemas.EmissionsAggregate
+
+        :rollup: A rollup in SQLAlchemy format.
+        :returns: An EmissionsAggregate in pyDantic BaseModel format.
+        :rtype: schemas.EmissionsAggregate
+        """
+        return EmissionsAggregate(
+            start=rollup.first_timestamp,
+            end=rollup.last_timestamp,
+            emissions_count=rollup.emissions_count,
+            duration=rollup.duration,
+            emissions_sum=rollup.emissions_sum,
+            emissions_rate=(
+                rollup.emissions_sum / rollup.duration if rollup.duration else None
+            ),
+            energy_consumed=rollup.energy_consumed,
+            cpu_energy=rollup.cpu_energy,
+            gpu_energy=rollup.gpu_energy,
+            ram_energy=rollup.ram_energy,
+        )
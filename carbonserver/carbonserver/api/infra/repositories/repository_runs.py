@@ -3,9 +3,11 @@ from contextlib import AbstractContextManager
 from typing import List
 
 from dependency_injector.providers import Callable
+from fastapi_pagination import Page, Params
 
 from carbonserver.api.domain.runs import Runs
 from carbonserver.api.infra.database.sql_models import Run as SqlModelRun
+from carbonserver.api.pagination import paginate_query
 from carbonserver.api.schemas import Run, RunCreate
 
 """
@@ -61,15 +63,29 @@ class SqlAlchemyRepository(Runs):
                 return self.map_sql_to_schema(e)
 
     def list_runs(self) -> List[Run]:
+        """Find the list of runs in database and return it
+
+        :returns: List of Run in pyDantic BaseModel format.
+        :rtype: List[schemas.Run]
+        """
         with self.session_factory() as session:
-            e = session.query(SqlModelRun)
-            if e is None:
-                return None
-            else:
-                runs: List[Run] = []
-                for run in e:
-                    runs.append(self.map_sql_to_schema(run))
-                return runs
+            query = session.query(SqlModelRun).order_by(
+                SqlModelRun.timestamp, SqlModelRun.id
+            )
+            return [self.map_sql_to_schema(run) for run in query]
+
+    def list_runs_page(self, params: Params) -> Page[Run]:
+        """Find a page of the runs in database and return it
+
+        :params: The page number and size.
+        :returns: A Page of Run in pyDantic BaseModel format.
+        :rtype: Page[schemas.Run]
+        """
+        with self.session_factory() as session:
+            query = session.query(SqlModelRun).order_by(
+                SqlModelRun.timestamp, SqlModelRun.id
+            )
+            return paginate_query(query, params, self.map_sql_to_schema)
 
     def get_runs_from_experiment(self, experiment_id) -> List[Run]:
         """Find the list of runs from an experiment in database and return it
@@ -79,13 +95,28 @@ class SqlAlchemyRepository(Runs):
         :rtype: List[schemas.Run]
         """
         with self.session_factory() as session:
-            res = session.query(SqlModelRun).filter(
-                SqlModelRun.experiment_id == experiment_id
+            query = (
+                session.query(SqlModelRun)
+                .filter(SqlModelRun.experiment_id == experiment_id)
+                .order_by(SqlModelRun.timestamp, SqlModelRun.id)
             )
-            if res.first() is None:
-                return []
-            else:
-                return [self.map_sql_to_schema(e) for e in res]
+            return [self.map_sql_to_schema(run) for run in query]
+
+    def get_runs_page_from_experiment(self, experiment_id, params: Params) -> Page[Run]:
+        """Find a page of the runs from an experiment in database and return it
+
+        :experiment_id: The id of the experiment to retreive runs from.
+        :params: The page number and size.
+        :returns: A Page of Run in pyDantic BaseModel format.
+        :rtype: Page[schemas.Run]
+        """
+        with self.session_factory() as session:
+            query = (
+                session.query(SqlModelRun)
+                .filter(SqlModelRun.experiment_id == experiment_id)
+                .order_by(SqlModelRun.timestamp, SqlModelRun.id)
+            )
+            return paginate_query(query, params, self.map_sql_to_schema)
 
     @staticmethod
     def map_sql_to_schema(run: SqlModelRun) -> Run:
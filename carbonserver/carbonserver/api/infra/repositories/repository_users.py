@@ -49,6 +49,25 @@ class SqlAlchemyRepository(Users):
             else:
                 return self.map_sql_to_schema(e)
 
+    def get_user_by_api_key(self, api_key: str) -> User:
+        """Find the user of an API key in database and retrieves it
+
+        :api_key: The API key of the user.
+        :returns: An User in pyDantic BaseModel format, None if no user has
+            this API key.
+        :rtype: schemas.User
+        """
+        with self.session_factory() as session:
+            e = (
+                session.query(SqlModelUser)
+                .filter(SqlModelUser.api_key == api_key)
+                .first()
+            )
+            if e is None:
+                return None
+            else:
+                return self.map_sql_to_schema(e)
+
     def list_users(self) -> List[User]:
         with self.session_factory() as session:
             e = session.query(SqlModelUser)
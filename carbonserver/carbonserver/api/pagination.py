@@ -0,0 +1,101 @@
+"""
+Pagination of the listings in the database: the query selects the rows of the
+page, with LIMIT/OFFSET or with a keyset cursor, so that only these rows are
+loaded whatever the size of the listing.
+
+The keyset cursor is the (timestamp, id) of the last row of the previous page,
+reading the next page doesn't scan the rows before it like OFFSET does.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Callable, Generic, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from fastapi import Query as QueryParameter
+from fastapi_pagination import Page, Params
+from pydantic import BaseModel, conint, validator
+from pydantic.generics import GenericModel
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+
+def encode_cursor(timestamp: datetime, row_id: UUID) -> str:
+    return base64.urlsafe_b64encode(
+        f"{timestamp.isoformat()} {row_id}".encode("utf-8")
+    ).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        timestamp, row_id = (
+            base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split(" ")
+        )
+        return datetime.fromisoformat(timestamp), UUID(row_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+class CursorParams(BaseModel):
+    cursor: Optional[str] = QueryParameter(
+        None, description="next_cursor of the previous page, none for the first page"
+    )
+    size: int = QueryParameter(100, ge=1, le=1000, description="Page size")
+
+    @validator("cursor")
+    def cursor_is_valid(cls, v):
+        if v is not None:
+            decode_cursor(v)
+        return v
+
+
+class CursorPage(GenericModel, Generic[T]):
+    items: Sequence[T]
+    size: conint(ge=1)  # type: ignore
+    next_cursor: Optional[str] = None
+
+
+def paginate_query(query: Query, params: Params, to_schema: Callable) -> Page:
+    """Select a page of the rows of the query with LIMIT/OFFSET
+
+    :query: A query ordered on unique columns, for the pages not to overlap.
+    :to_schema: Converts a row to its pyDantic BaseModel.
+    :returns: A Page of pyDantic BaseModels.
+    """
+    raw_params = params.to_raw_params()
+    total = query.order_by(None).count()
+    rows = query.limit(raw_params.limit).offset(raw_params.offset)
+    return Page.create([to_schema(row) for row in rows], total, params)
+
+
+def paginate_query_by_cursor(
+    query: Query, params: CursorParams, timestamp_column, id_column, to_schema
+) -> CursorPage:
+    """Select the rows of the query following the cursor, by (timestamp, id)
+
+    :returns: A CursorPage of pyDantic BaseModels, its next_cursor is None on
+              the last page.
+    """
+    if params.cursor is not None:
+        timestamp, row_id = decode_cursor(params.cursor)
+        query = query.filter(
+            or_(
+                timestamp_column > timestamp,
+                and_(timestamp_column == timestamp, id_column > row_id),
+            )
+        )
+    # One more row tells if there is a next page
+    rows = query.order_by(timestamp_column, id_column).limit(params.size + 1).all()
+    next_cursor = None
+    if len(rows) > params.size:
+        rows = rows[: params.size]
+        next_cursor = encode_cursor(
+            getattr(rows[-1], timestamp_column.key), getattr(rows[-1], id_column.key)
+        )
+    return CursorPage(
+        items=[to_schema(row) for row in rows],
+        size=params.size,
+        next_cursor=next_cursor,
+    )
@@ -1,19 +1,38 @@
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
 from container import ServerContainer
 from dependency_injector.wiring import Provide, inject
-from fastapi import APIRouter, Depends
-from fastapi_pagination import Page, paginate
+from fastapi import APIRouter, Depends, Query
+from fastapi_pagination import Page, Params
+from pydantic import conlist
 from starlette import status
 
-from carbonserver.api.dependencies import get_token_header
-from carbonserver.api.schemas import Emission, EmissionCreate
+from carbonserver.api.dependencies import get_api_key_scope, get_token_header
+from carbonserver.api.etag import ETagRoute
+from carbonserver.api.pagination import CursorPage, CursorParams
+from carbonserver.api.schemas import (
+    AggregationScope,
+    Emission,
+    EmissionCreate,
+    EmissionsAggregate,
+    EmissionsSeries,
+    Resolution,
+    TimeBucket,
+)
 from carbonserver.api.services.emissions_service import EmissionService
 
 EMISSIONS_ROUTER_TAGS = ["Emissions"]
+# Maximum number of emissions in a request to /emissions/batch
+EMISSIONS_BATCH_MAX_SIZE = 10000
+# Number of samples of the series of emissions at auto resolution
+SERIES_DEFAULT_POINTS = 500
+SERIES_MAX_POINTS = 10000
 
 router = APIRouter(
-    dependencies=[Depends(get_token_header)],
+    dependencies=[Depends(get_token_header), Depends(get_api_key_scope)],
+    route_class=ETagRoute,
 )
 
 
@@ -33,6 +52,26 @@ def add_emission(
     return emission_service.add_emission(emission)
 
 
+@router.post(
+    "/emissions/batch",
+    tags=EMISSIONS_ROUTER_TAGS,
+    status_code=status.HTTP_201_CREATED,
+    response_model=List[UUID],
+)
+@inject
+def add_emissions(
+    emissions: conlist(EmissionCreate, min_items=1, max_items=EMISSIONS_BATCH_MAX_SIZE),
+    emission_service: EmissionService = Depends(
+        Provide[ServerContainer.emission_service]
+    ),
+) -> List[UUID]:
+    """
+    Save emissions in a single transaction: none of them is saved when one is
+    invalid.
+    """
+    return emission_service.add_emissions(emissions)
+
+
 @router.get(
     "/emission/{emission_id}",
     tags=EMISSIONS_ROUTER_TAGS,
@@ -55,8 +94,83 @@ def read_emission(
 @inject
 def get_emissions_from_run(
     run_id: str,
+    params: Params = Depends(),
     emission_service: EmissionService = Depends(
         Provide[ServerContainer.emission_service]
     ),
 ) -> Page[Emission]:
-    return paginate(emission_service.get_emissions_from_run(run_id))
+    return emission_service.get_emissions_from_run(run_id, params)
+
+
+@router.get(
+    "/emissions/run/{run_id}/cursor",
+    tags=EMISSIONS_ROUTER_TAGS,
+    response_model=CursorPage[Emission],
+)
+@inject
+def get_emissions_from_run_by_cursor(
+    run_id: str,
+    params: CursorParams = Depends(),
+    emission_service: EmissionService = Depends(
+        Provide[ServerContainer.emission_service]
+    ),
+) -> CursorPage[Emission]:
+    """
+    Emissions of the run ordered by timestamp, the next page is read with the
+    next_cursor of the response.
+    """
+    return emission_service.get_emissions_from_run_by_cursor(run_id, params)
+
+
+@router.get(
+    "/emissions/run/{run_id}/series",
+    tags=EMISSIONS_ROUTER_TAGS,
+    status_code=status.HTTP_200_OK,
+    response_model=EmissionsSeries,
+)
+@inject
+def get_emissions_series(
+    run_id: UUID,
+    resolution: Resolution = Resolution.auto,
+    points: int = Query(SERIES_DEFAULT_POINTS, ge=1, le=SERIES_MAX_POINTS),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    emission_service: EmissionService = Depends(
+        Provide[ServerContainer.emission_service]
+    ),
+) -> EmissionsSeries:
+    """
+    Emissions of the run downsampled to the min, max and mean of their values
+    per minute, hour or day, or raw. The auto resolution is the finest one
+    giving at most `points` samples, to draw the run on a chart. The raw
+    resolution gives at most `points` samples too: with more emissions, the
+    auto resolution is used, the resolution of the series tells which one.
+    """
+    return emission_service.get_emissions_series(run_id, points, resolution, start, end)
+
+
+@router.get(
+    "/emissions/aggregate/{scope}/{scope_id}",
+    tags=EMISSIONS_ROUTER_TAGS,
+    status_code=status.HTTP_200_OK,
+    response_model=List[EmissionsAggregate],
+)
+@inject
+def get_emissions_aggregates(
+    scope: AggregationScope,
+    scope_id: UUID,
+    bucket: Optional[TimeBucket] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    emission_service: EmissionService = Depends(
+        Provide[ServerContainer.emission_service]
+    ),
+) -> List[EmissionsAggregate]:
+    """
+    Sums of the emissions of a run, experiment, project, team or organization,
+    per hour, day, week or month when a bucket is given, else a single sum
+    over the whole period. Empty when there is no emission.
+    """
+    return emission_service.get_emissions_aggregates(
+        scope, scope_id, bucket, start, end
+    )
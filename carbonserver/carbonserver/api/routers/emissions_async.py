@@ -0,0 +1,117 @@
+from typing import List
+from uuid import UUID
+
+from container import ServerContainer
+from dependency_injector.wiring import Provide, inject
+from fastapi import APIRouter, Depends
+from fastapi_pagination import Page, Params
+from pydantic import conlist
+from starlette import status
+
+from carbonserver.api.dependencies import get_api_key_scope, get_token_header
+from carbonserver.api.etag import ETagRoute
+from carbonserver.api.pagination import CursorPage, CursorParams
+from carbonserver.api.routers.emissions import (
+    EMISSIONS_BATCH_MAX_SIZE,
+    EMISSIONS_ROUTER_TAGS,
+)
+from carbonserver.api.schemas import Emission, EmissionCreate
+from carbonserver.api.services.emissions_service import AsyncEmissionService
+
+"""
+The ingest and read endpoints of the emissions, served by the event loop with
+the async engine instead of a thread each. Included before the emissions
+router when DATABASE_ASYNC is set, they take precedence over its endpoints of
+the same path, which stay in the OpenAPI schema: the requests and responses
+are the same.
+"""
+
+router = APIRouter(
+    dependencies=[Depends(get_token_header), Depends(get_api_key_scope)],
+    route_class=ETagRoute,
+)
+
+
+@router.post(
+    "/emission",
+    tags=EMISSIONS_ROUTER_TAGS,
+    status_code=status.HTTP_201_CREATED,
+    response_model=UUID,
+    include_in_schema=False,
+)
+@inject
+async def add_emission(
+    emission: EmissionCreate,
+    emission_service: AsyncEmissionService = Depends(
+        Provide[ServerContainer.async_emission_service]
+    ),
+) -> UUID:
+    return await emission_service.add_emission(emission)
+
+
+@router.post(
+    "/emissions/batch",
+    tags=EMISSIONS_ROUTER_TAGS,
+    status_code=status.HTTP_201_CREATED,
+    response_model=List[UUID],
+    include_in_schema=False,
+)
+@inject
+async def add_emissions(
+    emissions: conlist(EmissionCreate, min_items=1, max_items=EMISSIONS_BATCH_MAX_SIZE),
+    emission_service: AsyncEmissionService = Depends(
+        Provide[ServerContainer.async_emission_service]
+    ),
+) -> List[UUID]:
+    return await emission_service.add_emissions(emissions)
+
+
+@router.get(
+    "/emission/{emission_id}",
+    tags=EMISSIONS_ROUTER_TAGS,
+    status_code=status.HTTP_200_OK,
+    response_model=Emission,
+    include_in_schema=False,
+)
+@inject
+async def read_emission(
+    emission_id: str,
+    emission_service: AsyncEmissionService = Depends(
+        Provide[ServerContainer.async_emission_service]
+    ),
+) -> Emission:
+    return await emission_service.get_one_emission(emission_id)
+
+
+@router.get(
+    "/emissions/run/{run_id}",
+    tags=EMISSIONS_ROUTER_TAGS,
+    response_model=Page[Emission],
+    include_in_schema=False,
+)
+@inject
+async def get_emissions_from_run(
+    run_id: str,
+    params: Params = Depends(),
+    emission_service: AsyncEmissionService = Depends(
+        Provide[ServerContainer.async_emission_service]
+    ),
+) -> Page[Emission]:
+    return await emission_service.get_emissions_from_run(run_id, params)
+
+
+@router.get(
+    "/emissions/run/{run_id}/cursor",
+    tags=EMISSIONS_ROUTER_TAGS,
+    response_model=CursorPage[Emission],
+    include_in_schema=False,
+)
+@inject
+async def get_emissions_from_run_by_cursor(
+    run_id: str,
+    params: CursorParams = Depends(),
+    emission_service: AsyncEmissionService = Depends(
+        Provide[ServerContainer.async_emission_service]
+    ),
+) -> CursorPage[Emission]:
+    return await emission_service.get_emissions_from_run_by_cursor(run_id, params)
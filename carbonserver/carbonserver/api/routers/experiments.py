@@ -5,7 +5,8 @@ from dependency_injector.wiring import Provide, inject
 from fastapi import APIRouter, Depends
 from starlette import status
 
-from carbonserver.api.dependencies import get_token_header
+from carbonserver.api.dependencies import get_api_key_scope, get_token_header
+from carbonserver.api.etag import ETagRoute
 from carbonserver.api.schemas import Experiment, ExperimentCreate
 from carbonserver.api.services.experiments_service import ExperimentService
 from carbonserver.logger import logger
@@ -13,7 +14,8 @@ from carbonserver.logger import logger
 EXPERIMENTS_ROUTER_TAGS = ["Experiments"]
 
 router = APIRouter(
-    dependencies=[Depends(get_token_header)],
+    dependencies=[Depends(get_token_header), Depends(get_api_key_scope)],
+    route_class=ETagRoute,
 )
 
 
@@ -3,14 +3,16 @@ from dependency_injector.wiring import Provide, inject
 from fastapi import APIRouter, Depends
 from starlette import status
 
-from carbonserver.api.dependencies import get_token_header
+from carbonserver.api.dependencies import get_api_key_scope, get_token_header
+from carbonserver.api.etag import ETagRoute
 from carbonserver.api.schemas import Project, ProjectCreate
 from carbonserver.api.services.project_service import ProjectService
 
 PROJECTS_ROUTER_TAGS = ["Projects"]
 
 router = APIRouter(
-    dependencies=[Depends(get_token_header)],
+    dependencies=[Depends(get_token_header), Depends(get_api_key_scope)],
+    route_class=ETagRoute,
 )
 
 
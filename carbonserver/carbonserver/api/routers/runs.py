@@ -3,16 +3,19 @@ from typing import List
 from container import ServerContainer
 from dependency_injector.wiring import Provide, inject
 from fastapi import APIRouter, Depends
+from fastapi_pagination import Page, Params
 from starlette import status
 
-from carbonserver.api.dependencies import get_token_header
+from carbonserver.api.dependencies import get_api_key_scope, get_token_header
+from carbonserver.api.etag import ETagRoute
 from carbonserver.api.schemas import Run, RunCreate
 from carbonserver.api.services.run_service import RunService
 
 RUNS_ROUTER_TAGS = ["Runs"]
 
 router = APIRouter(
-    dependencies=[Depends(get_token_header)],
+    dependencies=[Depends(get_token_header), Depends(get_api_key_scope)],
+    route_class=ETagRoute,
 )
 runs_temp_db = []
 
@@ -58,14 +61,44 @@ def list_runs(
     return run_service.list_runs()
 
 
+@router.get(
+    "/runs/page",
+    tags=RUNS_ROUTER_TAGS,
+    status_code=status.HTTP_200_OK,
+    response_model=Page[Run],
+)
+@inject
+def list_runs_page(
+    params: Params = Depends(),
+    run_service: RunService = Depends(Provide[ServerContainer.run_service]),
+) -> Page[Run]:
+    return run_service.list_runs_page(params)
+
+
 @router.get(
     "/runs/experiment/{experiment_id}",
     tags=RUNS_ROUTER_TAGS,
     status_code=status.HTTP_200_OK,
+    response_model=List[Run],
 )
 @inject
 def read_runs_from_experiment(
     experiment_id: str,
     run_service: RunService = Depends(Provide[ServerContainer.run_service]),
-):
+) -> List[Run]:
     return run_service.list_runs_from_experiment(experiment_id)
+
+
+@router.get(
+    "/runs/experiment/{experiment_id}/page",
+    tags=RUNS_ROUTER_TAGS,
+    status_code=status.HTTP_200_OK,
+    response_model=Page[Run],
+)
+@inject
+def read_runs_page_from_experiment(
+    experiment_id: str,
+    params: Params = Depends(),
+    run_service: RunService = Depends(Provide[ServerContainer.run_service]),
+) -> Page[Run]:
+    return run_service.list_runs_page_from_experiment(experiment_id, params)
@@ -9,6 +9,7 @@ So this will help us avoiding confusion while using both.
 """
 
 from datetime import datetime
+from enum import Enum
 from typing import List, Optional
 from uuid import UUID
 
@@ -48,6 +49,24 @@ class EmissionBase(BaseModel):
     ram_energy: Optional[float] = Field(
         ..., ge=0, description="The ram_energy must be greater than zero"
     )
+    gpu_power_min: Optional[float] = Field(
+        None, ge=0, description="Minimum of the GPU power sampled, if sampled"
+    )
+    gpu_power_max: Optional[float] = Field(
+        None, ge=0, description="Maximum of the GPU power sampled, if sampled"
+    )
+    gpu_power_p95: Optional[float] = Field(
+        None, ge=0, description="95th percentile of the GPU power sampled, if sampled"
+    )
+    ram_power_min: Optional[float] = Field(
+        None, ge=0, description="Minimum of the RAM power sampled, if sampled"
+    )
+    ram_power_max: Optional[float] = Field(
+        None, ge=0, description="Maximum of the RAM power sampled, if sampled"
+    )
+    ram_power_p95: Optional[float] = Field(
+        None, ge=0, description="95th percentile of the RAM power sampled, if sampled"
+    )
 
     class Config:
         schema_extra = {
@@ -76,6 +95,96 @@ class Emission(EmissionBase):
     id: UUID
 
 
+class AggregationScope(str, Enum):
+    run = "run"
+    experiment = "experiment"
+    project = "project"
+    team = "team"
+    organization = "organization"
+
+
+class TimeBucket(str, Enum):
+    hour = "hour"
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class EmissionsAggregate(BaseModel):
+    bucket: Optional[datetime] = Field(
+        None, description="Start of the time bucket, when grouped by time"
+    )
+    start: datetime = Field(..., description="Timestamp of the first emission")
+    end: datetime = Field(..., description="Timestamp of the last emission")
+    emissions_count: int
+    duration: float
+    emissions_sum: float
+    emissions_rate: Optional[float] = Field(
+        ..., description="emissions_sum per second of duration"
+    )
+    energy_consumed: float
+    cpu_energy: float
+    gpu_energy: float
+    ram_energy: float
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "bucket": "2021-04-04T00:00:00",
+                "start": "2021-04-04T08:43:00",
+                "end": "2021-04-04T18:02:15",
+                "emissions_count": 2237,
+                "duration": 33555,
+                "emissions_sum": 1544.54,
+                "emissions_rate": 0.046030,
+                "energy_consumed": 5721.874,
+                "cpu_energy": 5521.874,
+                "gpu_energy": 0.0,
+                "ram_energy": 200.0,
+            }
+        }
+
+
+class Resolution(str, Enum):
+    raw = "raw"
+    minute = "minute"
+    hour = "hour"
+    day = "day"
+    auto = "auto"
+
+
+class SampleStatistics(BaseModel):
+    min: Optional[float]
+    max: Optional[float]
+    mean: Optional[float]
+
+
+class EmissionsSample(BaseModel):
+    timestamp: datetime = Field(
+        ...,
+        description="Start of the time bucket, or timestamp of the emission at raw"
+        + " resolution",
+    )
+    emissions_count: int
+    duration: float = Field(..., description="Sum of the durations of the emissions")
+    emissions_sum: SampleStatistics
+    emissions_rate: SampleStatistics
+    cpu_power: SampleStatistics
+    gpu_power: SampleStatistics
+    ram_power: SampleStatistics
+    cpu_energy: SampleStatistics
+    gpu_energy: SampleStatistics
+    ram_energy: SampleStatistics
+    energy_consumed: SampleStatistics
+
+
+class EmissionsSeries(BaseModel):
+    resolution: Resolution = Field(
+        ..., description="Resolution of the samples, the one chosen when auto"
+    )
+    samples: List[EmissionsSample]
+
+
 class RunBase(BaseModel):
     timestamp: datetime
     experiment_id: UUID
@@ -263,3 +372,9 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+
+class ApiKeyScope(BaseModel):
+    user_id: UUID
+    organizations: List[str] = []
+    teams: List[str] = []
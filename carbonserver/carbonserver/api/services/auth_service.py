@@ -0,0 +1,51 @@
+import hashlib
+from typing import Optional
+
+from carbonserver.api.cache import NO_CACHE, Cache
+from carbonserver.api.infra.repositories.repository_users import (
+    SqlAlchemyRepository as UserSqlRepository,
+)
+from carbonserver.api.schemas import ApiKeyScope
+
+API_KEYS_CACHE_NAMESPACE = "api_keys"
+
+
+class AuthService:
+    def __init__(
+        self, user_repository: UserSqlRepository, cache: Optional[Cache] = None
+    ):
+        self._user_repository = user_repository
+        self._cache = cache or NO_CACHE
+
+    def get_api_key_scope(self, api_key: str) -> Optional[ApiKeyScope]:
+        """The user of an API key, with its organizations and teams, cached
+        for a short time
+
+        :returns: None when no active user has this API key.
+        """
+        # The API keys themselves aren't stored in the cache
+        key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        return self._cache.get_or_set(
+            API_KEYS_CACHE_NAMESPACE,
+            key,
+            ApiKeyScope,
+            lambda: self._read_api_key_scope(api_key),
+        )
+
+    def _read_api_key_scope(self, api_key: str) -> Optional[ApiKeyScope]:
+        user = self._user_repository.get_user_by_api_key(api_key)
+        if user is None or not user.is_active:
+            return None
+        return ApiKeyScope(
+            user_id=user.id,
+            organizations=user.organizations or [],
+            teams=user.teams or [],
+        )
+
+    def revoke_api_keys(self) -> None:
+        """
+        To call after an API key is changed or revoked, or a user is
+        deactivated or changes of organizations or teams: the API keys are
+        validated again on their next use.
+        """
+        self._cache.invalidate(API_KEYS_CACHE_NAMESPACE)
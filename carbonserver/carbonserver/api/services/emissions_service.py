@@ -1,24 +1,176 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
+from fastapi_pagination import Page, Params
+
+from carbonserver.api.cache import NO_CACHE, Cache
+from carbonserver.api.infra.repositories.repository_emissions import (
+    AsyncSqlAlchemyRepository as AsyncEmissionSqlRepository,
+)
 from carbonserver.api.infra.repositories.repository_emissions import (
     SqlAlchemyRepository as EmissionSqlRepository,
 )
-from carbonserver.api.schemas import Emission, EmissionCreate
+from carbonserver.api.infra.repositories.repository_rollups import (
+    SqlAlchemyRepository as RollupSqlRepository,
+)
+from carbonserver.api.pagination import CursorPage, CursorParams
+from carbonserver.api.schemas import (
+    AggregationScope,
+    Emission,
+    EmissionCreate,
+    EmissionsAggregate,
+    EmissionsSeries,
+    Resolution,
+    TimeBucket,
+)
+
+# The emissions never change once added
+EMISSIONS_CACHE_NAMESPACE = "emissions"
+
+# Duration of the samples of each resolution, from the finest
+RESOLUTION_SECONDS = {
+    Resolution.minute: 60,
+    Resolution.hour: 3600,
+    Resolution.day: 86400,
+}
+
+
+def choose_resolution(aggregates: List[EmissionsAggregate], points: int) -> Resolution:
+    """The finest resolution giving at most `points` samples of the emissions
+
+    :aggregates: The sum of the emissions sampled, empty when there is none.
+    """
+    if not aggregates or aggregates[0].emissions_count <= points:
+        return Resolution.raw
+    span = (aggregates[0].end - aggregates[0].start).total_seconds()
+    for resolution, seconds in RESOLUTION_SECONDS.items():
+        # Samples of the buckets between the first and the last emission
+        if span // seconds + 1 <= points:
+            return resolution
+    return Resolution.day
 
 
 class EmissionService:
-    def __init__(self, emission_repository: EmissionSqlRepository):
+    def __init__(
+        self,
+        emission_repository: EmissionSqlRepository,
+        rollup_repository: Optional[RollupSqlRepository] = None,
+        cache: Optional[Cache] = None,
+    ):
         self._repository = emission_repository
+        self._rollup_repository = rollup_repository
+        self._cache = cache or NO_CACHE
 
     def add_emission(self, emission: EmissionCreate) -> UUID:
         emission_id = self._repository.add_emission(emission)
         return emission_id
 
+    def add_emissions(self, emissions: List[EmissionCreate]) -> List[UUID]:
+        emission_ids = self._repository.add_emissions(emissions)
+        return emission_ids
+
     def get_one_emission(self, emission_id) -> Emission:
-        emission = self._repository.get_one_emission(emission_id)
+        emission = self._cache.get_or_set(
+            EMISSIONS_CACHE_NAMESPACE,
+            f"emission:{emission_id}",
+            Emission,
+            lambda: self._repository.get_one_emission(emission_id),
+        )
         return emission
 
-    def get_emissions_from_run(self, run_id) -> List[Emission]:
-        emissions = self._repository.get_emissions_from_run(run_id)
+    def get_emissions_from_run(self, run_id, params: Params) -> Page[Emission]:
+        emissions = self._repository.get_emissions_from_run(run_id, params)
+        return emissions
+
+    def get_emissions_from_run_by_cursor(
+        self, run_id, params: CursorParams
+    ) -> CursorPage[Emission]:
+        emissions = self._repository.get_emissions_from_run_by_cursor(run_id, params)
+        return emissions
+
+    def get_emissions_aggregates(
+        self,
+        scope: AggregationScope,
+        scope_id,
+        bucket: Optional[TimeBucket] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[EmissionsAggregate]:
+        if (
+            self._rollup_repository is not None
+            and scope in (AggregationScope.run, AggregationScope.experiment)
+            and bucket is None
+            and start is None
+            and end is None
+        ):
+            # Current totals, kept up to date on each emission added
+            rollup = self._rollup_repository.get_rollup(scope, scope_id)
+            return [] if rollup is None else [rollup]
+        aggregates = self._repository.get_emissions_aggregates(
+            scope, scope_id, bucket, start, end
+        )
+        return aggregates
+
+    def get_emissions_series(
+        self,
+        run_id,
+        points: int,
+        resolution: Resolution = Resolution.auto,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> EmissionsSeries:
+        if resolution == Resolution.raw:
+            # At most `points` samples too, one more tells that the emissions
+            # don't fit: they are downsampled at auto resolution
+            samples = self._repository.get_emissions_series(
+                run_id, resolution, start, end, limit=points + 1
+            )
+            if len(samples) <= points:
+                return EmissionsSeries(resolution=resolution, samples=samples)
+            resolution = Resolution.auto
+        if resolution == Resolution.auto:
+            resolution = choose_resolution(
+                self.get_emissions_aggregates(
+                    AggregationScope.run, run_id, None, start, end
+                ),
+                points,
+            )
+        samples = self._repository.get_emissions_series(
+            run_id,
+            resolution,
+            start,
+            end,
+            # Outdated rollups could choose raw for too many emissions
+            limit=points if resolution == Resolution.raw else None,
+        )
+        return EmissionsSeries(resolution=resolution, samples=samples)
+
+
+class AsyncEmissionService:
+    def __init__(self, emission_repository: AsyncEmissionSqlRepository):
+        self._repository = emission_repository
+
+    async def add_emission(self, emission: EmissionCreate) -> UUID:
+        emission_id = await self._repository.add_emission(emission)
+        return emission_id
+
+    async def add_emissions(self, emissions: List[EmissionCreate]) -> List[UUID]:
+        emission_ids = await self._repository.add_emissions(emissions)
+        return emission_ids
+
+    async def get_one_emission(self, emission_id) -> Emission:
+        emission = await self._repository.get_one_emission(emission_id)
+        return emission
+
+    async def get_emissions_from_run(self, run_id, params: Params) -> Page[Emission]:
+        emissions = await self._repository.get_emissions_from_run(run_id, params)
+        return emissions
+
+    async def get_emissions_from_run_by_cursor(
+        self, run_id, params: CursorParams
+    ) -> CursorPage[Emission]:
+        emissions = await self._repository.get_emissions_from_run_by_cursor(
+            run_id, params
+        )
         return emissions
@@ -1,23 +1,42 @@
-from typing import List
+from typing import List, Optional
 
+from carbonserver.api.cache import NO_CACHE, Cache
 from carbonserver.api.infra.repositories.repository_experiments import (
     SqlAlchemyRepository as ExperimentSqlRepository,
 )
 from carbonserver.api.schemas import Experiment, ExperimentCreate
 
+EXPERIMENTS_CACHE_NAMESPACE = "experiments"
+
 
 class ExperimentService:
-    def __init__(self, experiment_repository: ExperimentSqlRepository):
+    def __init__(
+        self,
+        experiment_repository: ExperimentSqlRepository,
+        cache: Optional[Cache] = None,
+    ):
         self._repository = experiment_repository
+        self._cache = cache or NO_CACHE
 
     def add_experiment(self, experiment: ExperimentCreate) -> Experiment:
         experiment = self._repository.add_experiment(experiment)
+        self._cache.invalidate(EXPERIMENTS_CACHE_NAMESPACE)
         return experiment
 
     def get_one_experiment(self, experiment_id) -> Experiment:
-        experiment = self._repository.get_one_experiment(experiment_id)
+        experiment = self._cache.get_or_set(
+            EXPERIMENTS_CACHE_NAMESPACE,
+            f"experiment:{experiment_id}",
+            Experiment,
+            lambda: self._repository.get_one_experiment(experiment_id),
+        )
         return experiment
 
     def get_experiments_from_project(self, project_id) -> List[Experiment]:
-        experiments = self._repository.get_experiments_from_project(project_id)
+        experiments = self._cache.get_or_set(
+            EXPERIMENTS_CACHE_NAMESPACE,
+            f"project:{project_id}",
+            List[Experiment],
+            lambda: self._repository.get_experiments_from_project(project_id),
+        )
         return experiments
@@ -1,18 +1,38 @@
+from typing import List, Optional
+
+from carbonserver.api.cache import NO_CACHE, Cache
 from carbonserver.api.infra.repositories.repository_projects import (
     SqlAlchemyRepository as ProjectSqlRepository,
 )
-from carbonserver.api.schemas import ProjectCreate
+from carbonserver.api.schemas import Project, ProjectCreate
+
+PROJECTS_CACHE_NAMESPACE = "projects"
 
 
 class ProjectService:
-    def __init__(self, project_repository: ProjectSqlRepository):
+    def __init__(
+        self, project_repository: ProjectSqlRepository, cache: Optional[Cache] = None
+    ):
         self._repository = project_repository
+        self._cache = cache or NO_CACHE
 
     def add_project(self, project: ProjectCreate):
-        return self._repository.add_project(project)
+        project = self._repository.add_project(project)
+        self._cache.invalidate(PROJECTS_CACHE_NAMESPACE)
+        return project
 
     def get_one_project(self, project_id):
-        return self._repository.get_one_project(project_id)
+        return self._cache.get_or_set(
+            PROJECTS_CACHE_NAMESPACE,
+            f"project:{project_id}",
+            Project,
+            lambda: self._repository.get_one_project(project_id),
+        )
 
     def list_projects_from_team(self, team_id: str):
-        return self._repository.get_projects_from_team(team_id)
+        return self._cache.get_or_set(
+            PROJECTS_CACHE_NAMESPACE,
+            f"team:{team_id}",
+            List[Project],
+            lambda: self._repository.get_projects_from_team(team_id),
+        )
@@ -1,23 +1,67 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
+from fastapi_pagination import Page, Params
+
+from carbonserver.api.cache import NO_CACHE, Cache
 from carbonserver.api.infra.repositories.repository_runs import SqlAlchemyRepository
 from carbonserver.api.schemas import Run, RunCreate
 
+RUNS_CACHE_NAMESPACE = "runs"
+
 
 class RunService:
-    def __init__(self, run_repository: SqlAlchemyRepository):
+    def __init__(
+        self, run_repository: SqlAlchemyRepository, cache: Optional[Cache] = None
+    ):
         self._repository = run_repository
+        self._cache = cache or NO_CACHE
 
     def add_run(self, run: RunCreate) -> Run:
         created_run = self._repository.add_run(run)
+        self._cache.invalidate(RUNS_CACHE_NAMESPACE)
         return created_run
 
     def read_run(self, run_id: UUID) -> Run:
-        return self._repository.get_one_run(run_id)
+        return self._cache.get_or_set(
+            RUNS_CACHE_NAMESPACE,
+            f"run:{run_id}",
+            Run,
+            lambda: self._repository.get_one_run(run_id),
+        )
 
     def list_runs(self) -> List[Run]:
-        return self._repository.list_runs()
+        return self._cache.get_or_set(
+            RUNS_CACHE_NAMESPACE,
+            "runs",
+            List[Run],
+            self._repository.list_runs,
+        )
+
+    def list_runs_page(self, params: Params) -> Page[Run]:
+        return self._cache.get_or_set(
+            RUNS_CACHE_NAMESPACE,
+            f"runs:{params.page}:{params.size}",
+            Page[Run],
+            lambda: self._repository.list_runs_page(params),
+        )
+
+    def list_runs_from_experiment(self, experiment_id: str) -> List[Run]:
+        return self._cache.get_or_set(
+            RUNS_CACHE_NAMESPACE,
+            f"experiment:{experiment_id}",
+            List[Run],
+            lambda: self._repository.get_runs_from_experiment(experiment_id),
+        )
 
-    def list_runs_from_experiment(self, experiment_id: str):
-        return self._repository.get_runs_from_experiment(experiment_id)
+    def list_runs_page_from_experiment(
+        self, experiment_id: str, params: Params
+    ) -> Page[Run]:
+        return self._cache.get_or_set(
+            RUNS_CACHE_NAMESPACE,
+            f"experiment:{experiment_id}:{params.page}:{params.size}",
+            Page[Run],
+            lambda: self._repository.get_runs_page_from_experiment(
+                experiment_id, params
+            ),
+        )
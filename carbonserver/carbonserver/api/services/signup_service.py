@@ -1,3 +1,4 @@
+from typing import Optional
 from uuid import UUID
 
 from carbonserver.api.infra.repositories.repository_organizations import (
@@ -10,6 +11,7 @@ from carbonserver.api.infra.repositories.repository_users import (
     SqlAlchemyRepository as UserRepository,
 )
 from carbonserver.api.schemas import User, UserCreate
+from carbonserver.api.services.auth_service import AuthService
 
 
 class SignUpService:
@@ -18,10 +20,12 @@ class SignUpService:
         user_repository: UserRepository,
         organization_repository: OrganizationRepository,
         team_repository: TeamRepository,
+        auth_service: Optional[AuthService] = None,
     ) -> None:
         self._user_repository: UserRepository = user_repository
         self._organization_repository: OrganizationRepository = organization_repository
         self._team_repository: TeamRepository = team_repository
+        self._auth_service: Optional[AuthService] = auth_service
         self._default_org_id = UUID("e52fe339-164d-4c2b-a8c0-f562dfce066d")
         self._default_team_id = UUID("8edb03e1-9a28-452a-9c93-a3b6560136d7")
         self._default_api_key = "default"
@@ -48,11 +52,18 @@ class SignUpService:
         )
         if key_is_valid:
             self._user_repository.subscribe_user_to_org(user, organization_id)
+            self._revoke_api_keys()
         return user
 
     def subscribe_user_to_team(self, user: User, team_id: UUID, team_api_key: str):
         key_is_valid = self._team_repository.is_api_key_valid(team_id, team_api_key)
         if key_is_valid:
             self._user_repository.subscribe_user_to_team(user, team_id)
+            self._revoke_api_keys()
         print(user)
         return user
+
+    def _revoke_api_keys(self):
+        # The scope of the API key of the user changed
+        if self._auth_service is not None:
+            self._auth_service.revoke_api_keys()
@@ -0,0 +1,32 @@
+"""index the foreign keys of the aggregations
+
+Revision ID: 3f1c2b8e9a41
+Revises: edcd10edf11d
+Create Date: 2026-10-17 10:12:31.418204
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2b8e9a41"
+down_revision = "edcd10edf11d"
+branch_labels = None
+depends_on = None
+
+
+# Joined to sum the emissions of a project, team or organization
+INDEXES = [
+    ("experiments", "project_id"),
+    ("projects", "team_id"),
+    ("teams", "organization_id"),
+]
+
+
+def upgrade():
+    for table, column in INDEXES:
+        op.create_index(f"ix_{table}_{column}", table, [column])
+
+
+def downgrade():
+    for table, column in INDEXES:
+        op.drop_index(f"ix_{table}_{column}", table_name=table)
@@ -0,0 +1,33 @@
+"""add the statistics of the power sampled to the emissions
+
+Revision ID: 5e8b1c7d2a90
+Revises: c4e8a2d6f913
+Create Date: 2026-10-17 19:02:41.316527
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5e8b1c7d2a90"
+down_revision = "c4e8a2d6f913"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("emissions", sa.Column("gpu_power_min", sa.Float))
+    op.add_column("emissions", sa.Column("gpu_power_max", sa.Float))
+    op.add_column("emissions", sa.Column("gpu_power_p95", sa.Float))
+    op.add_column("emissions", sa.Column("ram_power_min", sa.Float))
+    op.add_column("emissions", sa.Column("ram_power_max", sa.Float))
+    op.add_column("emissions", sa.Column("ram_power_p95", sa.Float))
+
+
+def downgrade():
+    op.drop_column("emissions", "ram_power_p95")
+    op.drop_column("emissions", "ram_power_max")
+    op.drop_column("emissions", "ram_power_min")
+    op.drop_column("emissions", "gpu_power_p95")
+    op.drop_column("emissions", "gpu_power_max")
+    op.drop_column("emissions", "gpu_power_min")
@@ -0,0 +1,83 @@
+"""add run and experiment rollups
+
+Revision ID: 9d4e7a3c5b12
+Revises: 3f1c2b8e9a41
+Create Date: 2026-10-17 14:05:52.730165
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import UUID
+
+# revision identifiers, used by Alembic.
+revision = "9d4e7a3c5b12"
+down_revision = "3f1c2b8e9a41"
+branch_labels = None
+depends_on = None
+
+SUMS = """
+    count(emissions.id),
+    coalesce(sum(emissions.duration), 0),
+    coalesce(sum(emissions.emissions_sum), 0),
+    coalesce(sum(emissions.energy_consumed), 0),
+    coalesce(sum(emissions.cpu_energy), 0),
+    coalesce(sum(emissions.gpu_energy), 0),
+    coalesce(sum(emissions.ram_energy), 0),
+    min(emissions.timestamp),
+    max(emissions.timestamp)
+"""
+ROLLUP_COLUMNS = """
+    emissions_count, duration, emissions_sum, energy_consumed, cpu_energy,
+    gpu_energy, ram_energy, first_timestamp, last_timestamp
+"""
+
+
+def rollup_columns():
+    return [
+        sa.Column("emissions_count", sa.Integer, nullable=False, default=0),
+        sa.Column("duration", sa.Float, nullable=False, default=0),
+        sa.Column("emissions_sum", sa.Float, nullable=False, default=0),
+        sa.Column("energy_consumed", sa.Float, nullable=False, default=0),
+        sa.Column("cpu_energy", sa.Float, nullable=False, default=0),
+        sa.Column("gpu_energy", sa.Float, nullable=False, default=0),
+        sa.Column("ram_energy", sa.Float, nullable=False, default=0),
+        sa.Column("first_timestamp", sa.DateTime),
+        sa.Column("last_timestamp", sa.DateTime),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "run_rollups",
+        sa.Column(
+            "run_id", UUID(as_uuid=True), sa.ForeignKey("runs.id"), primary_key=True
+        ),
+        *rollup_columns(),
+    )
+    op.create_table(
+        "experiment_rollups",
+        sa.Column(
+            "experiment_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("experiments.id"),
+            primary_key=True,
+        ),
+        *rollup_columns(),
+    )
+    # Rollups of the existing emissions
+    op.execute(
+        f"INSERT INTO run_rollups (run_id, {ROLLUP_COLUMNS})"
+        f" SELECT emissions.run_id, {SUMS} FROM emissions"
+        " WHERE emissions.run_id IS NOT NULL GROUP BY emissions.run_id"
+    )
+    op.execute(
+        f"INSERT INTO experiment_rollups (experiment_id, {ROLLUP_COLUMNS})"
+        f" SELECT runs.experiment_id, {SUMS} FROM emissions"
+        " JOIN runs ON emissions.run_id = runs.id"
+        " WHERE runs.experiment_id IS NOT NULL GROUP BY runs.experiment_id"
+    )
+
+
+def downgrade():
+    op.drop_table("experiment_rollups")
+    op.drop_table("run_rollups")
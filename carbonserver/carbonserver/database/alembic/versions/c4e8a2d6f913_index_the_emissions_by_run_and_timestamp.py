@@ -0,0 +1,115 @@
+"""index the emissions by run and timestamp, optionally partition them by month
+
+Revision ID: c4e8a2d6f913
+Revises: 9d4e7a3c5b12
+Create Date: 2026-10-17 16:21:07.512390
+
+To partition the emissions by month on PostgreSQL, which copies them to the
+new partitioned table:
+    alembic -x partition_emissions=true upgrade head
+
+"""
+from datetime import date
+
+from alembic import context, op
+from sqlalchemy import text
+
+from carbonserver.database.partitions import (
+    DEFAULT_PARTITION,
+    MONTHS_AHEAD,
+    add_months,
+    create_partitions,
+    is_partitioned,
+    month_start,
+)
+
+# revision identifiers, used by Alembic.
+revision = "c4e8a2d6f913"
+down_revision = "9d4e7a3c5b12"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if context.get_x_argument(as_dictionary=True).get("partition_emissions") == "true":
+        partition_emissions()
+    # Created on the partitioned table, they are created on each partition
+    op.create_index(
+        "ix_emissions_run_id_timestamp", "emissions", ["run_id", "timestamp"]
+    )
+    op.create_index("ix_runs_experiment_id", "runs", ["experiment_id"])
+
+
+def downgrade():
+    op.drop_index("ix_runs_experiment_id", table_name="runs")
+    op.drop_index("ix_emissions_run_id_timestamp", table_name="emissions")
+    if not context.is_offline_mode() and is_partitioned(op.get_bind()):
+        unpartition_emissions()
+
+
+def partition_emissions():
+    connection = op.get_bind()
+    if connection.dialect.name != "postgresql":
+        raise ValueError("The emissions can only be partitioned on PostgreSQL")
+    # The timestamp is part of the primary key of a partitioned table
+    connection.execute(
+        text(
+            "UPDATE emissions SET timestamp = coalesce("
+            + "(SELECT runs.timestamp FROM runs WHERE runs.id = emissions.run_id),"
+            + " 'epoch') WHERE timestamp IS NULL"
+        )
+    )
+    connection.execute(
+        text(
+            "CREATE TABLE emissions_partitioned ("
+            + "LIKE emissions INCLUDING DEFAULTS,"
+            + " CONSTRAINT emissions_partitioned_pkey PRIMARY KEY (id, timestamp)"
+            + ") PARTITION BY RANGE (timestamp)"
+        )
+    )
+    connection.execute(
+        text(
+            f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF emissions_partitioned DEFAULT"
+        )
+    )
+    first_timestamp = connection.execute(
+        text("SELECT min(timestamp) FROM emissions")
+    ).scalar()
+    current_month = month_start(date.today())
+    create_partitions(
+        connection,
+        month_start(first_timestamp or current_month),
+        add_months(current_month, MONTHS_AHEAD),
+        table="emissions_partitioned",
+    )
+    connection.execute(
+        text("INSERT INTO emissions_partitioned SELECT * FROM emissions")
+    )
+    connection.execute(text("DROP TABLE emissions"))
+    connection.execute(text("ALTER TABLE emissions_partitioned RENAME TO emissions"))
+    connection.execute(
+        text(
+            "ALTER TABLE emissions"
+            + " RENAME CONSTRAINT emissions_partitioned_pkey TO emissions_pkey"
+        )
+    )
+    op.create_foreign_key("fk_emissions_runs", "emissions", "runs", ["run_id"], ["id"])
+
+
+def unpartition_emissions():
+    connection = op.get_bind()
+    connection.execute(
+        text("CREATE TABLE emissions_unpartitioned (LIKE emissions INCLUDING DEFAULTS)")
+    )
+    connection.execute(
+        text("INSERT INTO emissions_unpartitioned SELECT * FROM emissions")
+    )
+    # With its partitions
+    connection.execute(text("DROP TABLE emissions"))
+    connection.execute(text("ALTER TABLE emissions_unpartitioned RENAME TO emissions"))
+    connection.execute(
+        text("ALTER TABLE emissions ALTER COLUMN timestamp DROP NOT NULL")
+    )
+    op.create_primary_key("emissions_pkey", "emissions", ["id"])
+    op.create_index("ix_emissions_id", "emissions", ["id"])
+    op.create_foreign_key("fk_emissions_runs", "emissions", "runs", ["run_id"], ["id"])
@@ -0,0 +1,39 @@
+"""
+Check the rollups of the runs and experiments against the sums of their
+emissions, and repair them. To run periodically, or after emissions were
+changed outside of the API.
+
+Usage:
+    python -m carbonserver.database.check_rollups [--repair]
+"""
+import argparse
+import sys
+
+from carbonserver.api.infra.database.database_manager import Database
+from carbonserver.api.infra.repositories.repository_rollups import SqlAlchemyRepository
+from carbonserver.config import settings
+from carbonserver.logger import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="replace the inconsistent rollups with the sums of the emissions",
+    )
+    args = parser.parse_args()
+
+    repository = SqlAlchemyRepository(Database(settings.db_url).session)
+    inconsistent = repository.check_rollups(repair=args.repair)
+    for scope, rollup_id in inconsistent:
+        logger.warning(f"Inconsistent rollup of the {scope.value} {rollup_id}")
+    logger.info(
+        f"{len(inconsistent)} inconsistent rollups"
+        + (" repaired" if args.repair and inconsistent else "")
+    )
+    return 1 if inconsistent and not args.repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,57 @@
+from functools import lru_cache
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from carbonserver.config import settings
 
-engine_kwargs = {}
-if "sqlite" in settings.db_url:
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
-engine = create_engine(settings.db_url, **engine_kwargs)
+# Drivers of the async engine, by database
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def get_engine_kwargs(db_url: str) -> dict:
+    engine_kwargs = {"echo": settings.db_echo}
+    if make_url(db_url).get_backend_name() == "sqlite":
+        # Without a pool of connections
+        engine_kwargs["connect_args"] = {"check_same_thread": False}
+    else:
+        engine_kwargs["pool_size"] = settings.db_pool_size
+        engine_kwargs["max_overflow"] = settings.db_max_overflow
+        engine_kwargs["pool_timeout"] = settings.db_pool_timeout
+    return engine_kwargs
+
+
+@lru_cache()
+def get_engine(db_url: str) -> Engine:
+    """
+    Engine of the database, the sessions of the process share its connections
+    """
+    return create_engine(db_url, **get_engine_kwargs(db_url))
+
+
+def get_async_url(db_url: str) -> str:
+    url = make_url(db_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {url.get_backend_name()}")
+    url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    return url.render_as_string(hide_password=False)
+
+
+@lru_cache()
+def get_async_engine(db_url: str) -> AsyncEngine:
+    """
+    Async engine of the database, for the endpoints served by the event loop
+
+    :db_url: The URL of the database, with an async driver.
+    """
+    return create_async_engine(db_url, **get_engine_kwargs(db_url))
+
+
+engine = get_engine(settings.db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # We will use the function declarative_base() that returns a class.
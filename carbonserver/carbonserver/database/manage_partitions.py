@@ -0,0 +1,71 @@
+"""
+Create the partitions of the emissions of the next months, and detach the
+partitions older than the retention period. To run monthly, on a PostgreSQL
+database whose emissions table is partitioned.
+
+Usage:
+    python -m carbonserver.database.manage_partitions [--retention-months N] [--drop]
+"""
+import argparse
+import sys
+from datetime import date
+
+from carbonserver.config import settings
+from carbonserver.database.database import get_engine
+from carbonserver.database.partitions import (
+    MONTHS_AHEAD,
+    add_months,
+    create_partitions,
+    detach_partitions,
+    is_partitioned,
+    month_start,
+)
+from carbonserver.logger import logger
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=MONTHS_AHEAD,
+        help="months of partitions created ahead of the current one",
+    )
+    parser.add_argument(
+        "--retention-months",
+        type=int,
+        default=None,
+        help="detach the partitions older than this number of months",
+    )
+    parser.add_argument(
+        "--drop",
+        action="store_true",
+        help="drop the partitions detached instead of keeping their tables",
+    )
+    args = parser.parse_args()
+
+    current_month = month_start(date.today())
+    with get_engine(settings.db_url).begin() as connection:
+        if not is_partitioned(connection):
+            logger.error("The emissions table isn't partitioned")
+            return 1
+        for name in create_partitions(
+            connection, current_month, add_months(current_month, args.months_ahead)
+        ):
+            logger.info(f"Created the partition {name}")
+    if args.retention_months is not None:
+        # Once the new partitions are committed, in a transaction of its own
+        with get_engine(settings.db_url).begin() as connection:
+            for name in detach_partitions(
+                connection,
+                add_months(current_month, -args.retention_months),
+                drop=args.drop,
+            ):
+                logger.info(
+                    f"{'Dropped' if args.drop else 'Detached'} the partition {name}"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
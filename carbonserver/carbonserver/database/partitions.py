@@ -0,0 +1,187 @@
+"""
+Monthly partitions of the emissions table, on PostgreSQL.
+
+The table is partitioned by range of timestamp when migrating with
+`alembic -x partition_emissions=true upgrade head`: each month of emissions
+is stored in its own partition, named emissions_y<year>m<month>, and the
+emissions outside of these months in emissions_default. The partitions of the
+next months are created in advance by manage_partitions, which also detaches
+the partitions older than the retention period.
+"""
+import re
+from datetime import date, datetime
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from carbonserver.api.infra.repositories.repository_rollups import SUMMED_COLUMNS
+
+EMISSIONS_TABLE = "emissions"
+DEFAULT_PARTITION = "emissions_default"
+# Months of partitions created ahead of the current one
+MONTHS_AHEAD = 3
+PARTITION_NAME = re.compile(r"^emissions_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"emissions_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+            + " WHERE partrelid = to_regclass(:table))"
+        ),
+        {"table": EMISSIONS_TABLE},
+    ).scalar()
+
+
+def get_partitions(connection: Connection, table: str = EMISSIONS_TABLE) -> Dict:
+    """The monthly partitions attached to the table
+
+    :returns: The name of the partitions, by month.
+    """
+    names = connection.execute(
+        text(
+            "SELECT pg_class.relname FROM pg_inherits"
+            + " JOIN pg_class ON pg_class.oid = pg_inherits.inhrelid"
+            + " WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).scalars()
+    partitions = dict()
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def create_partitions(
+    connection: Connection,
+    first_month: date,
+    last_month: date,
+    table: str = EMISSIONS_TABLE,
+) -> List[str]:
+    """Create the missing partitions of the months from first_month to
+    last_month included
+
+    Fails when emissions of one of these months are in the default partition.
+
+    :returns: The name of the partitions created.
+    """
+    existing = get_partitions(connection, table)
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if month not in existing:
+            connection.execute(
+                text(
+                    f"CREATE TABLE {partition_name(month)} PARTITION OF {table}"
+                    + f" FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+                )
+            )
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def detach_partitions(
+    connection: Connection, before: date, drop: bool = False
+) -> List[str]:
+    """Detach the partitions of the months before a date, their emissions are
+    removed from the rollups
+
+    :before: The first day of the first month kept.
+    :drop: Drop the tables of the partitions detached, instead of keeping them
+        to archive them.
+    :returns: The name of the partitions detached.
+    """
+    detached = []
+    for month, name in sorted(get_partitions(connection).items()):
+        if add_months(month, 1) > before:
+            continue
+        subtract_from_rollups(connection, name)
+        connection.execute(
+            text(f"ALTER TABLE {EMISSIONS_TABLE} DETACH PARTITION {name}")
+        )
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    if detached:
+        update_first_timestamps(
+            connection, datetime.combine(before, datetime.min.time())
+        )
+    return detached
+
+
+def subtract_from_rollups(connection: Connection, partition: str) -> None:
+    """Subtract the emissions of a partition from the rollups of their run and
+    experiment"""
+    sums = ", ".join(
+        ["count(*) AS emissions_count"]
+        + [f"coalesce(sum({partition}.{c}), 0) AS {c}" for c in SUMMED_COLUMNS]
+    )
+    for table, key, sums_query in (
+        (
+            "run_rollups",
+            "run_id",
+            f"SELECT run_id, {sums} FROM {partition} GROUP BY run_id",
+        ),
+        (
+            "experiment_rollups",
+            "experiment_id",
+            f"SELECT runs.experiment_id, {sums} FROM {partition}"
+            + f" JOIN runs ON runs.id = {partition}.run_id"
+            + " GROUP BY runs.experiment_id",
+        ),
+    ):
+        subtractions = ", ".join(
+            f"{c} = {table}.{c} - removed.{c}"
+            for c in ["emissions_count"] + SUMMED_COLUMNS
+        )
+        connection.execute(
+            text(
+                f"UPDATE {table} SET {subtractions} FROM ({sums_query}) AS removed"
+                + f" WHERE {table}.{key} = removed.{key}"
+            )
+        )
+
+
+def update_first_timestamps(connection: Connection, before: datetime) -> None:
+    """Delete the rollups without emissions left, and update the first
+    timestamp of the rollups whose first emissions were detached"""
+    connection.execute(text("DELETE FROM run_rollups WHERE emissions_count = 0"))
+    connection.execute(
+        text(
+            "UPDATE run_rollups SET first_timestamp = ("
+            + "SELECT min(emissions.timestamp) FROM emissions"
+            + " WHERE emissions.run_id = run_rollups.run_id"
+            + ") WHERE first_timestamp < :before"
+        ),
+        {"before": before},
+    )
+    connection.execute(text("DELETE FROM experiment_rollups WHERE emissions_count = 0"))
+    connection.execute(
+        text(
+            "UPDATE experiment_rollups SET first_timestamp = ("
+            + "SELECT min(run_rollups.first_timestamp) FROM run_rollups"
+            + " JOIN runs ON runs.id = run_rollups.run_id"
+            + " WHERE runs.experiment_id = experiment_rollups.experiment_id"
+            + ") WHERE first_timestamp < :before"
+        ),
+        {"before": before},
+    )
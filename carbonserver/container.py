@@ -1,16 +1,22 @@
 from dependency_injector import containers, providers
 
-from carbonserver.api.infra.database.database_manager import Database
+from carbonserver.api.cache import Cache, get_cache_backend
+from carbonserver.api.infra.database.database_manager import AsyncDatabase, Database
 from carbonserver.api.infra.repositories import (
     repository_emissions,
     repository_experiments,
     repository_organizations,
     repository_projects,
+    repository_rollups,
     repository_runs,
     repository_teams,
     repository_users,
 )
-from carbonserver.api.services.emissions_service import EmissionService
+from carbonserver.api.services.auth_service import AuthService
+from carbonserver.api.services.emissions_service import (
+    AsyncEmissionService,
+    EmissionService,
+)
 from carbonserver.api.services.experiments_service import ExperimentService
 from carbonserver.api.services.organization_service import OrganizationService
 from carbonserver.api.services.project_service import ProjectService
@@ -29,10 +35,35 @@ class ServerContainer(containers.DeclarativeContainer):
         Database,
         db_url=db_url,
     )
+    async_db = providers.Singleton(
+        AsyncDatabase,
+        db_url=db_url,
+        db_async_url=settings.db_async_url,
+    )
+    cache_backend = providers.Singleton(
+        get_cache_backend,
+        redis_url=settings.cache_redis_url,
+        max_size=settings.cache_max_size,
+    )
+    cache = providers.Singleton(
+        Cache,
+        backend=cache_backend,
+        ttl=settings.cache_ttl,
+    )
+    api_key_cache = providers.Singleton(
+        Cache,
+        backend=cache_backend,
+        ttl=settings.api_key_cache_ttl,
+        none_ttl=settings.api_key_invalid_cache_ttl,
+    )
     emission_repository = providers.Factory(
         repository_emissions.SqlAlchemyRepository,
         session_factory=db.provided.session,
     )
+    async_emission_repository = providers.Factory(
+        repository_emissions.AsyncSqlAlchemyRepository,
+        session_factory=async_db.provided.session,
+    )
 
     experiment_repository = providers.Factory(
         repository_experiments.SqlAlchemyRepository,
@@ -59,19 +90,33 @@ class ServerContainer(containers.DeclarativeContainer):
         session_factory=db.provided.session,
     )
 
+    rollup_repository = providers.Factory(
+        repository_rollups.SqlAlchemyRepository,
+        session_factory=db.provided.session,
+    )
+
     emission_service = providers.Factory(
         EmissionService,
         emission_repository=emission_repository,
+        rollup_repository=rollup_repository,
+        cache=cache,
+    )
+
+    async_emission_service = providers.Factory(
+        AsyncEmissionService,
+        emission_repository=async_emission_repository,
     )
 
     experiment_service = providers.Factory(
         ExperimentService,
         experiment_repository=experiment_repository,
+        cache=cache,
     )
 
     project_service = providers.Factory(
         ProjectService,
         project_repository=project_repository,
+        cache=cache,
     )
 
     run_repository = providers.Factory(
@@ -84,6 +129,12 @@ class ServerContainer(containers.DeclarativeContainer):
         user_repository=user_repository,
     )
 
+    auth_service = providers.Factory(
+        AuthService,
+        user_repository=user_repository,
+        cache=api_key_cache,
+    )
+
     organization_service = providers.Factory(
         OrganizationService,
         organization_repository=organization_repository,
@@ -97,6 +148,7 @@ class ServerContainer(containers.DeclarativeContainer):
     run_service = providers.Factory(
         RunService,
         run_repository=run_repository,
+        cache=cache,
     )
 
     sign_up_service = providers.Factory(
@@ -104,4 +156,5 @@ class ServerContainer(containers.DeclarativeContainer):
         user_repository=user_repository,
         organization_repository=organization_repository,
         team_repository=team_repository,
+        auth_service=auth_service,
     )
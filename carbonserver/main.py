@@ -5,12 +5,14 @@ from pydantic import ValidationError
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from carbonserver.api import dependencies
 from carbonserver.api.dependencies import get_query_token
 from carbonserver.api.errors import DBException
 from carbonserver.api.infra.database import sql_models
 from carbonserver.api.routers import (
     authenticate,
     emissions,
+    emissions_async,
     experiments,
     organizations,
     projects,
@@ -18,6 +20,7 @@ from carbonserver.api.routers import (
     teams,
     users,
 )
+from carbonserver.config import settings
 from carbonserver.database.database import engine
 
 
@@ -56,6 +59,7 @@ def init_container():
     container.wire(
         modules=[
             emissions,
+            emissions_async,
             runs,
             experiments,
             projects,
@@ -63,6 +67,7 @@ def init_container():
             organizations,
             users,
             authenticate,
+            dependencies,
         ]
     )
     return container
@@ -85,6 +90,9 @@ def init_server(container):
     server.include_router(experiments.router)
     server.include_router(experiments.router)
     server.include_router(runs.router)
+    if settings.db_async:
+        # Takes precedence over the endpoints of the same path
+        server.include_router(emissions_async.router)
     server.include_router(emissions.router)
     add_pagination(server)
     return server
@@ -7,8 +7,10 @@ DEPENDENCIES = [
     "uvicorn[standard] >= 0.13.0, < 0.14.0",
     "dependency-injector >= 4.3.2",
     "fastapi >= 0.65.0, < 0.66.0",
-    "sqlalchemy",
+    "sqlalchemy[asyncio]",
     "psycopg2-binary",
+    "asyncpg",
+    "aiosqlite",
     "pydantic[email]",
 ]
 
@@ -0,0 +1,47 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from carbonserver.api.infra.database import sql_models
+
+
+@compiles(UUID, "sqlite")
+def compile_uuid_for_sqlite(type_, compiler, **kw):
+    return "CHAR(36)"
+
+
+@pytest.fixture
+def sqlite_session_factory():
+    """
+    Session factory of an in-memory SQLite database, with the tables of the
+    emissions and of the entities they belong to
+    """
+    engine = create_engine("sqlite://")
+    sql_models.Base.metadata.create_all(
+        engine,
+        tables=[
+            sql_models.Organization.__table__,
+            sql_models.Team.__table__,
+            sql_models.Project.__table__,
+            sql_models.Experiment.__table__,
+            sql_models.Run.__table__,
+            sql_models.Emission.__table__,
+            sql_models.RunRollup.__table__,
+            sql_models.ExperimentRollup.__table__,
+        ],
+    )
+    session_factory = sessionmaker(bind=engine)
+
+    @contextmanager
+    def session():
+        s = session_factory()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    yield session
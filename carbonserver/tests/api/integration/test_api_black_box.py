@@ -269,6 +269,12 @@ def test_api_run_list():
     assert is_key_value_exist(r.json(), "id", run_id)
 
 
+def test_api_run_list_page():
+    r = requests.get(url=URL + "/runs/page", timeout=2)
+    assert r.status_code == 200
+    assert is_key_value_exist(r.json()["items"], "id", run_id)
+
+
 def test_api_runs_for_team_list():
     r = requests.get(url=URL + "/runs/experiment/" + experiment_id, timeout=2)
     assert r.status_code == 200
@@ -276,6 +282,13 @@ def test_api_runs_for_team_list():
     assert is_key_all_values_equal(r.json(), "experiment_id", experiment_id)
 
 
+def test_api_runs_page_for_team_list():
+    r = requests.get(url=URL + "/runs/experiment/" + experiment_id + "/page", timeout=2)
+    assert r.status_code == 200
+    assert is_key_value_exist(r.json()["items"], "id", run_id)
+    assert is_key_all_values_equal(r.json()["items"], "experiment_id", experiment_id)
+
+
 def test_api_emission_create():
     payload = {
         "timestamp": "2021-04-04T08:43:00+02:00",
@@ -1,3 +1,4 @@
+from datetime import datetime
 from unittest import mock
 from uuid import UUID
 
@@ -5,14 +6,28 @@ import pytest
 from container import ServerContainer
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from fastapi_pagination import add_pagination
+from fastapi_pagination import Page, Params, add_pagination
 from starlette import status
 
+from carbonserver.api import dependencies
 from carbonserver.api.infra.repositories.repository_emissions import (
     SqlAlchemyRepository,
 )
+from carbonserver.api.infra.repositories.repository_users import (
+    SqlAlchemyRepository as UserSqlAlchemyRepository,
+)
+from carbonserver.api.pagination import CursorPage, encode_cursor
 from carbonserver.api.routers import emissions
-from carbonserver.api.schemas import Emission
+from carbonserver.api.schemas import (
+    AggregationScope,
+    Emission,
+    EmissionsAggregate,
+    EmissionsSample,
+    Resolution,
+    SampleStatistics,
+    TimeBucket,
+    User,
+)
 
 RUN_1_ID = "40088f1a-d28e-4980-8d80-bf5600056a14"
 RUN_2_ID = "07614c15-c5b0-4c9a-8101-6b6ad3733543"
@@ -50,6 +65,12 @@ EMISSION_1 = {
     "gpu_energy": 0.0,
     "ram_energy": 2.0,
     "energy_consumed": 57.21874,
+    "gpu_power_min": None,
+    "gpu_power_max": None,
+    "gpu_power_p95": None,
+    "ram_power_min": 0.12,
+    "ram_power_max": 0.2,
+    "ram_power_p95": 0.18,
 }
 
 EMISSION_2 = {
@@ -89,7 +110,7 @@ EMISSION_3 = {
 @pytest.fixture
 def custom_test_server():
     container = ServerContainer()
-    container.wire(modules=[emissions])
+    container.wire(modules=[emissions, dependencies])
     app = FastAPI()
     app.container = container
     app.include_router(emissions.router)
@@ -135,15 +156,12 @@ def test_get_emissions_from_run_retreives_all_emissions_from_run(
 ):
     repository_mock = mock.Mock(spec=SqlAlchemyRepository)
     expected_emissions_id_list = [EMISSION_ID, EMISSION_ID_2]
-    repository_mock.get_emissions_from_run.return_value = [
-        Emission(**EMISSION_1),
-        Emission(**EMISSION_2),
-    ]
+    repository_mock.get_emissions_from_run.return_value = Page.create(
+        [Emission(**EMISSION_1), Emission(**EMISSION_2)], 2, Params()
+    )
 
     with custom_test_server.container.emission_repository.override(repository_mock):
-        response = client.get(
-            "/emissions/run/get_emissions_from_run/", params={"run_id": RUN_1_ID}
-        )
+        response = client.get("/emissions/run/" + RUN_1_ID)
         actual_emission_list = response.json()["items"]
         actual_emission_ids_list = [emission["id"] for emission in actual_emission_list]
         diff = set(actual_emission_ids_list) ^ set(expected_emissions_id_list)
@@ -151,3 +169,186 @@ def test_get_emissions_from_run_retreives_all_emissions_from_run(
     assert not diff
     assert len(actual_emission_ids_list) == len(set(actual_emission_ids_list))
     assert EMISSION_3["id"] not in actual_emission_ids_list
+
+
+def test_get_emissions_from_run_by_cursor_returns_the_next_cursor(
+    client, custom_test_server
+):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    next_cursor = encode_cursor(datetime(2021, 4, 4, 8, 43), UUID(EMISSION_ID_2))
+    repository_mock.get_emissions_from_run_by_cursor.return_value = CursorPage(
+        items=[Emission(**EMISSION_2)], size=1, next_cursor=next_cursor
+    )
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.get(
+            "/emissions/run/" + RUN_1_ID + "/cursor",
+            params={"cursor": encode_cursor(datetime(2021, 4, 4), UUID(EMISSION_ID))},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next_cursor"] == next_cursor
+    assert [e["id"] for e in response.json()["items"]] == [EMISSION_ID_2]
+
+
+def test_add_emissions(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    expected_ids = [EMISSION_ID, EMISSION_ID_2]
+    repository_mock.add_emissions.return_value = [UUID(i) for i in expected_ids]
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.post(
+            "/emissions/batch", json=[EMISSION_TO_CREATE, EMISSION_TO_CREATE]
+        )
+        actual_ids = response.json()
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert actual_ids == expected_ids
+    (emissions_to_create,) = repository_mock.add_emissions.call_args[0]
+    assert len(emissions_to_create) == 2
+
+
+def test_add_emissions_rejects_the_batch_with_an_invalid_emission(
+    client, custom_test_server
+):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    invalid_emission = {**EMISSION_TO_CREATE, "duration": 0}
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.post(
+            "/emissions/batch", json=[EMISSION_TO_CREATE, invalid_emission]
+        )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    repository_mock.add_emissions.assert_not_called()
+
+
+def test_add_emissions_rejects_an_empty_batch(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.post("/emissions/batch", json=[])
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    repository_mock.add_emissions.assert_not_called()
+
+
+def test_get_emissions_aggregates_of_a_project_by_day(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    aggregate = EmissionsAggregate(
+        bucket="2021-04-04T00:00:00",
+        start="2021-04-04T08:43:00",
+        end="2021-04-04T18:02:15",
+        emissions_count=2,
+        duration=200,
+        emissions_sum=10.0,
+        emissions_rate=0.05,
+        energy_consumed=30.0,
+        cpu_energy=20.0,
+        gpu_energy=0.0,
+        ram_energy=10.0,
+    )
+    repository_mock.get_emissions_aggregates.return_value = [aggregate]
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.get(
+            "/emissions/aggregate/project/" + RUN_1_ID, params={"bucket": "day"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()[0]["emissions_sum"] == 10.0
+    (
+        scope,
+        scope_id,
+        bucket,
+        start,
+        end,
+    ) = repository_mock.get_emissions_aggregates.call_args[0]
+    assert (scope, str(scope_id), bucket) == (
+        AggregationScope.project,
+        RUN_1_ID,
+        TimeBucket.day,
+    )
+    assert start is None and end is None
+
+
+def test_get_emissions_aggregates_rejects_an_unknown_scope(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.get("/emissions/aggregate/galaxy/" + RUN_1_ID)
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    repository_mock.get_emissions_aggregates.assert_not_called()
+
+
+def test_get_emissions_series_of_a_run_per_hour(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    statistics = SampleStatistics(min=1.0, max=3.0, mean=2.0)
+    sample = EmissionsSample(
+        timestamp="2021-04-04T08:00:00",
+        emissions_count=240,
+        duration=3600,
+        emissions_sum=statistics,
+        emissions_rate=statistics,
+        cpu_power=statistics,
+        gpu_power=statistics,
+        ram_power=statistics,
+        cpu_energy=statistics,
+        gpu_energy=statistics,
+        ram_energy=statistics,
+        energy_consumed=statistics,
+    )
+    repository_mock.get_emissions_series.return_value = [sample]
+
+    with custom_test_server.container.emission_repository.override(repository_mock):
+        response = client.get(
+            f"/emissions/run/{RUN_1_ID}/series", params={"resolution": "hour"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["resolution"] == "hour"
+    assert response.json()["samples"][0]["cpu_power"] == {
+        "min": 1.0,
+        "max": 3.0,
+        "mean": 2.0,
+    }
+    run_id, resolution, start, end = repository_mock.get_emissions_series.call_args[0]
+    assert (str(run_id), resolution) == (RUN_1_ID, Resolution.hour)
+
+
+def test_add_emission_with_an_api_key(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    repository_mock.add_emission.return_value = UUID(EMISSION_ID)
+    user_repository_mock = mock.Mock(spec=UserSqlAlchemyRepository)
+    user_repository_mock.get_user_by_api_key.side_effect = lambda api_key: (
+        User(
+            id=RUN_2_ID,
+            name="Gontran Bonheur",
+            email="xyz@email.com",
+            api_key=api_key,
+            organizations=[],
+            teams=[],
+            is_active=True,
+        )
+        if api_key == "valid"
+        else None
+    )
+
+    with custom_test_server.container.emission_repository.override(
+        repository_mock
+    ), custom_test_server.container.user_repository.override(user_repository_mock):
+        responses = [
+            client.post(
+                "/emission", json=EMISSION_TO_CREATE, headers={"x-api-key": api_key}
+            )
+            for api_key in ("valid", "valid", "invalid")
+        ]
+
+    assert [response.status_code for response in responses] == [
+        status.HTTP_201_CREATED,
+        status.HTTP_201_CREATED,
+        status.HTTP_401_UNAUTHORIZED,
+    ]
+    assert user_repository_mock.get_user_by_api_key.call_count == 2
+    assert repository_mock.add_emission.call_count == 2
@@ -0,0 +1,96 @@
+from unittest import mock
+from uuid import UUID
+
+import pytest
+from container import ServerContainer
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi_pagination import Page, add_pagination
+from starlette import status
+
+from carbonserver.api.infra.repositories.repository_emissions import (
+    AsyncSqlAlchemyRepository,
+)
+from carbonserver.api.routers import emissions, emissions_async
+from carbonserver.api.schemas import Emission
+
+RUN_1_ID = "40088f1a-d28e-4980-8d80-bf5600056a14"
+
+EMISSION_ID = "f52fe339-164d-4c2b-a8c0-f562dfce066d"
+
+EMISSION_TO_CREATE = {
+    "timestamp": "2021-04-04T08:43:00+02:00",
+    "run_id": RUN_1_ID,
+    "duration": 98745,
+    "emissions_sum": 206.548444,
+    "emissions_rate": 89.548444,
+    "cpu_power": 0.3,
+    "gpu_power": 0.0,
+    "ram_power": 0.15,
+    "cpu_energy": 55.21874,
+    "gpu_energy": 0.0,
+    "ram_energy": 2.0,
+    "energy_consumed": 57.21874,
+}
+
+EMISSION_1 = {"id": EMISSION_ID, **EMISSION_TO_CREATE}
+
+
+@pytest.fixture
+def custom_test_server():
+    container = ServerContainer()
+    container.wire(modules=[emissions, emissions_async])
+    app = FastAPI()
+    app.container = container
+    app.include_router(emissions_async.router)
+    app.include_router(emissions.router)
+    add_pagination(app)
+    yield app
+
+
+@pytest.fixture
+def client(custom_test_server):
+    yield TestClient(custom_test_server)
+
+
+def test_add_emission_with_the_async_repository(client, custom_test_server):
+    repository_mock = mock.Mock(spec=AsyncSqlAlchemyRepository)
+    repository_mock.add_emission = mock.AsyncMock(return_value=UUID(EMISSION_ID))
+
+    with custom_test_server.container.async_emission_repository.override(
+        repository_mock
+    ):
+        response = client.post("/emission", json=EMISSION_TO_CREATE)
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == EMISSION_ID
+    repository_mock.add_emission.assert_awaited_once()
+
+
+def test_add_emissions_with_the_async_repository(client, custom_test_server):
+    repository_mock = mock.Mock(spec=AsyncSqlAlchemyRepository)
+    repository_mock.add_emissions = mock.AsyncMock(return_value=[UUID(EMISSION_ID)])
+
+    with custom_test_server.container.async_emission_repository.override(
+        repository_mock
+    ):
+        response = client.post("/emissions/batch", json=[EMISSION_TO_CREATE])
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json() == [EMISSION_ID]
+
+
+def test_get_emissions_from_run_with_the_async_repository(client, custom_test_server):
+    repository_mock = mock.Mock(spec=AsyncSqlAlchemyRepository)
+    repository_mock.get_emissions_from_run = mock.AsyncMock(
+        return_value=Page(items=[Emission(**EMISSION_1)], total=1, page=1, size=50)
+    )
+
+    with custom_test_server.container.async_emission_repository.override(
+        repository_mock
+    ):
+        response = client.get(f"/emissions/run/{RUN_1_ID}")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["items"][0]["id"] == EMISSION_ID
+    assert response.json()["total"] == 1
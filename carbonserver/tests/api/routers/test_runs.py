@@ -4,6 +4,7 @@ import pytest
 from container import ServerContainer
 from fastapi import FastAPI, status
 from fastapi.testclient import TestClient
+from fastapi_pagination import Page, Params
 
 from carbonserver.api.infra.repositories.repository_runs import SqlAlchemyRepository
 from carbonserver.api.routers import runs
@@ -129,6 +130,24 @@ def test_list_runs_returns_all_runs(client, custom_test_server):
     assert actual_org_list == expected_org_list
 
 
+def test_list_runs_page_returns_a_page_of_runs(client, custom_test_server):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    expected_run_1 = RUN_1
+    expected_run_2 = RUN_2
+    expected_org_list = [expected_run_1, expected_run_2]
+    repository_mock.list_runs_page.return_value = Page.create(
+        [Run(**expected_run_1), Run(**expected_run_2)], 2, Params()
+    )
+
+    with custom_test_server.container.run_repository.override(repository_mock):
+        response = client.get("/runs/page")
+        actual_org_list = response.json()["items"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert actual_org_list == expected_org_list
+    assert response.json()["total"] == 2
+
+
 def test_get_runs_from_experiment_returns_correct_run(client, custom_test_server):
     repository_mock = mock.Mock(spec=SqlAlchemyRepository)
     expected_run_1 = RUN_1
@@ -143,3 +162,25 @@ def test_get_runs_from_experiment_returns_correct_run(client, custom_test_server
 
     assert response.status_code == status.HTTP_200_OK
     assert actual_run_list == expected_run_list
+
+
+def test_get_runs_page_from_experiment_returns_the_page_asked(
+    client, custom_test_server
+):
+    repository_mock = mock.Mock(spec=SqlAlchemyRepository)
+    expected_run_1 = RUN_1
+    expected_run_list = [RUN_1]
+    repository_mock.get_runs_page_from_experiment.return_value = Page.create(
+        [Run(**expected_run_1)], 1, Params(page=2, size=1)
+    )
+
+    with custom_test_server.container.run_repository.override(repository_mock):
+        response = client.get(
+            "/runs/experiment/" + EXPE_ID + "/page", params={"page": 2, "size": 1}
+        )
+        actual_run_list = response.json()["items"]
+
+    assert response.status_code == status.HTTP_200_OK
+    assert actual_run_list == expected_run_list
+    _, params = repository_mock.get_runs_page_from_experiment.call_args[0]
+    assert (params.page, params.size) == (2, 1)
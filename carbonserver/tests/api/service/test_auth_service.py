@@ -0,0 +1,93 @@
+from unittest import mock
+from uuid import UUID
+
+from carbonserver.api.cache import Cache, InMemoryBackend
+from carbonserver.api.infra.repositories.repository_users import (
+    SqlAlchemyRepository as UserSqlRepository,
+)
+from carbonserver.api.schemas import ApiKeyScope, User
+from carbonserver.api.services.auth_service import AuthService
+
+API_KEY = "9INn3JsdhCGzLAuOUC6rAw"
+INVALID_API_KEY = "8INn3JsdhCGzLAuOUC6rAw"
+
+USER_ID = UUID("f52fe339-164d-4c2b-a8c0-f562dfce066d")
+
+USER_1 = User(
+    id=USER_ID,
+    name="Gontran Bonheur",
+    email="xyz@email.com",
+    api_key=API_KEY,
+    organizations=["e52fe339-164d-4c2b-a8c0-f562dfce066d"],
+    teams=["8edb03e1-9a28-452a-9c93-a3b6560136d7"],
+    is_active=True,
+)
+
+
+def get_auth_service(user_mock_repository):
+    return AuthService(
+        user_mock_repository, Cache(InMemoryBackend(100), ttl=30, none_ttl=5)
+    )
+
+
+def test_auth_service_validates_an_api_key_once():
+    user_mock_repository: UserSqlRepository = mock.Mock(spec=UserSqlRepository)
+    user_mock_repository.get_user_by_api_key.return_value = USER_1
+    auth_service: AuthService = get_auth_service(user_mock_repository)
+
+    scopes = [auth_service.get_api_key_scope(API_KEY) for _ in range(3)]
+
+    assert scopes == 3 * [
+        ApiKeyScope(
+            user_id=USER_ID,
+            organizations=USER_1.organizations,
+            teams=USER_1.teams,
+        )
+    ]
+    user_mock_repository.get_user_by_api_key.assert_called_once_with(API_KEY)
+
+
+def test_auth_service_rejects_unknown_api_keys_and_inactive_users():
+    user_mock_repository: UserSqlRepository = mock.Mock(spec=UserSqlRepository)
+    user_mock_repository.get_user_by_api_key.side_effect = lambda api_key: (
+        USER_1.copy(update={"is_active": False}) if api_key == API_KEY else None
+    )
+    auth_service: AuthService = get_auth_service(user_mock_repository)
+
+    assert auth_service.get_api_key_scope(INVALID_API_KEY) is None
+    assert auth_service.get_api_key_scope(API_KEY) is None
+
+
+def test_auth_service_rejects_an_unknown_api_key_once():
+    user_mock_repository: UserSqlRepository = mock.Mock(spec=UserSqlRepository)
+    user_mock_repository.get_user_by_api_key.return_value = None
+    auth_service: AuthService = get_auth_service(user_mock_repository)
+
+    scopes = [auth_service.get_api_key_scope(INVALID_API_KEY) for _ in range(3)]
+
+    assert scopes == 3 * [None]
+    user_mock_repository.get_user_by_api_key.assert_called_once_with(INVALID_API_KEY)
+
+
+def test_api_keys_are_validated_again_when_users_change():
+    user_mock_repository: UserSqlRepository = mock.Mock(spec=UserSqlRepository)
+    user_mock_repository.get_user_by_api_key.return_value = None
+    auth_service: AuthService = get_auth_service(user_mock_repository)
+    auth_service.get_api_key_scope(API_KEY)
+
+    user_mock_repository.get_user_by_api_key.return_value = USER_1
+    auth_service.revoke_api_keys()
+
+    assert auth_service.get_api_key_scope(API_KEY) is not None
+
+
+def test_revoked_api_keys_are_validated_again():
+    user_mock_repository: UserSqlRepository = mock.Mock(spec=UserSqlRepository)
+    user_mock_repository.get_user_by_api_key.return_value = USER_1
+    auth_service: AuthService = get_auth_service(user_mock_repository)
+    auth_service.get_api_key_scope(API_KEY)
+
+    user_mock_repository.get_user_by_api_key.return_value = None
+    auth_service.revoke_api_keys()
+
+    assert auth_service.get_api_key_scope(API_KEY) is None
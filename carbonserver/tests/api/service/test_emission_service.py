@@ -1,10 +1,25 @@
 from unittest import mock
 
+from fastapi_pagination import Page, Params
+
 from carbonserver.api.infra.repositories.repository_emissions import (
     SqlAlchemyRepository,
 )
-from carbonserver.api.schemas import Emission, EmissionCreate
-from carbonserver.api.services.emissions_service import EmissionService
+from carbonserver.api.infra.repositories.repository_rollups import (
+    SqlAlchemyRepository as RollupSqlAlchemyRepository,
+)
+from carbonserver.api.schemas import (
+    AggregationScope,
+    Emission,
+    EmissionCreate,
+    EmissionsAggregate,
+    Resolution,
+    TimeBucket,
+)
+from carbonserver.api.services.emissions_service import (
+    EmissionService,
+    choose_resolution,
+)
 
 RUN_1_ID = "40088f1a-d28e-4980-8d80-bf5600056a14"
 RUN_2_ID = "07614c15-c5b0-4c9a-8101-6b6ad3733543"
@@ -61,6 +76,19 @@ EMISSION_3 = Emission(
     energy_consumed=57.21874,
 )
 
+EMISSIONS_AGGREGATE = EmissionsAggregate(
+    start="2021-04-04T08:43:00+02:00",
+    end="2021-04-04T09:43:00+02:00",
+    emissions_count=2,
+    duration=3600,
+    emissions_sum=2.0,
+    emissions_rate=2.0 / 3600,
+    energy_consumed=6.0,
+    cpu_energy=4.0,
+    gpu_energy=0.0,
+    ram_energy=2.0,
+)
+
 
 @mock.patch("uuid.uuid4", return_value=EMISSION_ID)
 def test_emission_service_creates_correct_emission(_):
@@ -89,13 +117,49 @@ def test_emission_service_creates_correct_emission(_):
     assert actual_saved_emission_id == expected_id
 
 
+def test_emission_service_creates_emissions_in_batch():
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    expected_ids = [EMISSION_ID, EMISSION_ID_2]
+    emission_service: EmissionService = EmissionService(repository_mock)
+    repository_mock.add_emissions.return_value = expected_ids
+    emissions_to_create = [
+        EmissionCreate(**EMISSION_1.dict(exclude={"id"})),
+        EmissionCreate(**EMISSION_2.dict(exclude={"id"})),
+    ]
+
+    actual_saved_emission_ids = emission_service.add_emissions(emissions_to_create)
+
+    repository_mock.add_emissions.assert_called_once_with(emissions_to_create)
+    assert actual_saved_emission_ids == expected_ids
+
+
+def test_emission_repository_inserts_emissions_in_one_transaction():
+    session = mock.MagicMock()
+    repository = SqlAlchemyRepository(session_factory=lambda: session)
+    emissions_to_create = [
+        EmissionCreate(**EMISSION_1.dict(exclude={"id"})),
+        EmissionCreate(**EMISSION_2.dict(exclude={"id"})),
+    ]
+
+    emission_ids = repository.add_emissions(emissions_to_create)
+
+    session.__enter__.return_value.execute.assert_called_once()
+    session.__enter__.return_value.commit.assert_called_once()
+    (_, rows), _ = session.__enter__.return_value.execute.call_args
+    assert [row["id"] for row in rows] == emission_ids
+    assert [row["run_id"] for row in rows] == [EMISSION_1.run_id, EMISSION_2.run_id]
+
+
 def test_emission_service_retrieves_all_existing_emissions_for_one_run():
     repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
     expected_emissions_ids = [EMISSION_1.id, EMISSION_2.id]
     emission_service: EmissionService = EmissionService(repository_mock)
-    repository_mock.get_emissions_from_run.return_value = [EMISSION_1, EMISSION_2]
+    params = Params(page=1, size=50)
+    repository_mock.get_emissions_from_run.return_value = Page.create(
+        [EMISSION_1, EMISSION_2], 2, params
+    )
 
-    emissions_list = emission_service.get_emissions_from_run(RUN_1_ID)
+    emissions_list = emission_service.get_emissions_from_run(RUN_1_ID, params).items
     actual_emissions_ids_list = map(lambda x: x.id, iter(emissions_list))
     diff = set(actual_emissions_ids_list) ^ set(expected_emissions_ids)
 
@@ -112,3 +176,92 @@ def test_emission_service_retrives_correct_emission_by_id():
     actual_emission = emission_service.get_one_emission(EMISSION_ID)
 
     assert actual_emission.id == expected_emission_id
+
+
+def test_emission_service_reads_the_totals_of_a_run_from_its_rollup():
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    rollup_repository_mock = mock.Mock(spec=RollupSqlAlchemyRepository)
+    emission_service: EmissionService = EmissionService(
+        repository_mock, rollup_repository_mock
+    )
+    rollup_repository_mock.get_rollup.return_value = EMISSIONS_AGGREGATE
+
+    aggregates = emission_service.get_emissions_aggregates(
+        AggregationScope.run, RUN_1_ID
+    )
+
+    assert aggregates == [EMISSIONS_AGGREGATE]
+    rollup_repository_mock.get_rollup.assert_called_once_with(
+        AggregationScope.run, RUN_1_ID
+    )
+    repository_mock.get_emissions_aggregates.assert_not_called()
+
+
+def test_emission_service_sums_the_emissions_by_time_bucket():
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    rollup_repository_mock = mock.Mock(spec=RollupSqlAlchemyRepository)
+    emission_service: EmissionService = EmissionService(
+        repository_mock, rollup_repository_mock
+    )
+    repository_mock.get_emissions_aggregates.return_value = [EMISSIONS_AGGREGATE]
+
+    aggregates = emission_service.get_emissions_aggregates(
+        AggregationScope.run, RUN_1_ID, TimeBucket.day
+    )
+
+    assert aggregates == [EMISSIONS_AGGREGATE]
+    rollup_repository_mock.get_rollup.assert_not_called()
+
+
+def test_choose_resolution_gives_at_most_the_points_asked():
+    # 2 emissions over 1 hour
+    assert choose_resolution([EMISSIONS_AGGREGATE], 2) == Resolution.raw
+    assert choose_resolution([EMISSIONS_AGGREGATE], 1) == Resolution.day
+    assert choose_resolution([], 500) == Resolution.raw
+    week = EmissionsAggregate(
+        **{
+            **EMISSIONS_AGGREGATE.dict(),
+            "end": "2021-04-11T08:43:00+02:00",
+            "emissions_count": 40320,
+        }
+    )
+    assert choose_resolution([week], 500) == Resolution.hour
+    assert choose_resolution([week], 20000) == Resolution.minute
+
+
+def test_emission_service_downsamples_the_emissions_of_a_run_at_auto_resolution():
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    rollup_repository_mock = mock.Mock(spec=RollupSqlAlchemyRepository)
+    emission_service: EmissionService = EmissionService(
+        repository_mock, rollup_repository_mock
+    )
+    rollup_repository_mock.get_rollup.return_value = EMISSIONS_AGGREGATE
+    repository_mock.get_emissions_series.return_value = []
+
+    series = emission_service.get_emissions_series(RUN_1_ID, points=1)
+
+    assert series.resolution == Resolution.day
+    repository_mock.get_emissions_series.assert_called_once_with(
+        RUN_1_ID, Resolution.day, None, None, limit=None
+    )
+
+
+def test_emission_service_downsamples_the_raw_emissions_exceeding_the_points():
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    rollup_repository_mock = mock.Mock(spec=RollupSqlAlchemyRepository)
+    emission_service: EmissionService = EmissionService(
+        repository_mock, rollup_repository_mock
+    )
+    rollup_repository_mock.get_rollup.return_value = EMISSIONS_AGGREGATE
+    # Two raw emissions, then the daily sample
+    repository_mock.get_emissions_series.side_effect = [[mock.Mock(), mock.Mock()], []]
+
+    series = emission_service.get_emissions_series(
+        RUN_1_ID, points=1, resolution=Resolution.raw
+    )
+
+    assert series.resolution == Resolution.day
+    assert repository_mock.get_emissions_series.call_args_list == [
+        mock.call(RUN_1_ID, Resolution.raw, None, None, limit=2),
+        mock.call(RUN_1_ID, Resolution.day, None, None, limit=None),
+    ]
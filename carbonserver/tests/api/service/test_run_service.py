@@ -1,6 +1,8 @@
 from unittest import mock
 from uuid import UUID
 
+from fastapi_pagination import Page, Params
+
 from carbonserver.api.infra.repositories.repository_runs import SqlAlchemyRepository
 from carbonserver.api.schemas import Run, RunCreate
 from carbonserver.api.services.run_service import RunService
@@ -60,6 +62,23 @@ def test_run_service_retrieves_all_existing_runs():
     assert len(run_list) == len(expected_run_ids_list)
 
 
+def test_run_service_retrieves_a_page_of_runs():
+
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    expected_run_ids_list = [RUN_ID, RUN_ID_2]
+    run_service: RunService = RunService(repository_mock)
+    params = Params(page=1, size=50)
+    repository_mock.list_runs_page.return_value = Page.create([RUN_1, RUN_2], 2, params)
+
+    run_list = run_service.list_runs_page(params).items
+    actual_run_ids_list = map(lambda x: x.id, iter(run_list))
+    diff = set(actual_run_ids_list) ^ set(expected_run_ids_list)
+
+    assert not diff
+    assert len(run_list) == len(expected_run_ids_list)
+    repository_mock.list_runs_page.assert_called_once_with(params)
+
+
 def test_run_service_retrieves_correct_run_by_id():
 
     repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
@@ -82,3 +101,23 @@ def test_run_service_retrieves_correct_run_by_experiment_id():
     actual_runs = run_service.list_runs_from_experiment(EXPERIMENT_ID)
 
     assert actual_runs[0].experiment_id == expected_experiment_id
+
+
+def test_run_service_retrieves_a_page_of_runs_by_experiment_id():
+
+    repository_mock: SqlAlchemyRepository = mock.Mock(spec=SqlAlchemyRepository)
+    expected_experiment_id = EXPERIMENT_ID
+    run_service: RunService = RunService(repository_mock)
+    params = Params(page=1, size=50)
+    repository_mock.get_runs_page_from_experiment.return_value = Page.create(
+        [RUN_1], 1, params
+    )
+
+    actual_runs = run_service.list_runs_page_from_experiment(
+        EXPERIMENT_ID, params
+    ).items
+
+    assert actual_runs[0].experiment_id == expected_experiment_id
+    repository_mock.get_runs_page_from_experiment.assert_called_once_with(
+        EXPERIMENT_ID, params
+    )
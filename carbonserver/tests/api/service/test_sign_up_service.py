@@ -11,6 +11,7 @@ from carbonserver.api.infra.repositories.repository_users import (
     SqlAlchemyRepository as UserSqlRepository,
 )
 from carbonserver.api.schemas import Organization, Team, User, UserCreate
+from carbonserver.api.services.auth_service import AuthService
 from carbonserver.api.services.signup_service import SignUpService
 
 API_KEY = "9INn3JsdhCGzLAuOUC6rAw"
@@ -177,3 +178,22 @@ def test_add_user_to_team_rejects_user_if_api_key_is_incorrect():
 
     team_mock_repository.is_api_key_valid.assert_called_with(TEAM_ID_2, INVALID_API_KEY)
     assert not user_mock_repository.subscribe_user_to_team.called
+
+
+def test_add_user_to_team_revokes_the_cached_api_keys():
+
+    user_mock_repository: UserSqlRepository = mock.Mock(spec=UserSqlRepository)
+    team_mock_repository: TeamSqlRepository = mock.Mock(spec=TeamSqlRepository)
+    org_mock_repository: OrgSqlRepository = mock.Mock(spec=OrgSqlRepository)
+    auth_service_mock: AuthService = mock.Mock(spec=AuthService)
+
+    signup_service: SignUpService = SignUpService(
+        user_mock_repository,
+        org_mock_repository,
+        team_mock_repository,
+        auth_service_mock,
+    )
+
+    signup_service.subscribe_user_to_team(USER_1, TEAM_ID_2, API_KEY)
+
+    auth_service_mock.revoke_api_keys.assert_called_once()
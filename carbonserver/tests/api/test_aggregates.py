@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+
+from carbonserver.api.infra.database import sql_models
+from carbonserver.api.infra.database.sql_functions import date_trunc
+from carbonserver.api.infra.repositories.repository_emissions import (
+    SqlAlchemyRepository,
+)
+from carbonserver.api.schemas import AggregationScope, TimeBucket
+
+ORGANIZATION_ID = uuid4()
+TEAM_ID = uuid4()
+PROJECT_ID = uuid4()
+EXPERIMENT_1_ID = uuid4()
+EXPERIMENT_2_ID = uuid4()
+RUN_1_ID = uuid4()
+RUN_2_ID = uuid4()
+RUN_3_ID = uuid4()
+# A Sunday
+START = datetime(2021, 4, 4, 22, 0)
+
+
+@pytest.fixture
+def repository(sqlite_session_factory):
+    with sqlite_session_factory() as s:
+        s.add(sql_models.Organization(id=ORGANIZATION_ID, name="org"))
+        s.add(sql_models.Team(id=TEAM_ID, name="team", organization_id=ORGANIZATION_ID))
+        s.add(sql_models.Project(id=PROJECT_ID, name="project", team_id=TEAM_ID))
+        for experiment_id in (EXPERIMENT_1_ID, EXPERIMENT_2_ID):
+            s.add(sql_models.Experiment(id=experiment_id, project_id=PROJECT_ID))
+        for run_id, experiment_id in (
+            (RUN_1_ID, EXPERIMENT_1_ID),
+            (RUN_2_ID, EXPERIMENT_1_ID),
+            (RUN_3_ID, EXPERIMENT_2_ID),
+        ):
+            s.add(sql_models.Run(id=run_id, experiment_id=experiment_id))
+            # 1 emission per hour, from 22:00 to 01:00 on the next day
+            for i in range(4):
+                s.add(
+                    sql_models.Emission(
+                        id=uuid4(),
+                        run_id=run_id,
+                        timestamp=START + timedelta(hours=i),
+                        duration=3600,
+                        emissions_sum=1.0,
+                        energy_consumed=3.0,
+                        cpu_energy=2.0,
+                        gpu_energy=0.0,
+                        ram_energy=1.0,
+                    )
+                )
+        s.commit()
+    yield SqlAlchemyRepository(session_factory=sqlite_session_factory)
+
+
+@pytest.mark.parametrize(
+    "scope, scope_id, emissions_count",
+    [
+        (AggregationScope.run, RUN_1_ID, 4),
+        (AggregationScope.experiment, EXPERIMENT_1_ID, 8),
+        (AggregationScope.project, PROJECT_ID, 12),
+        (AggregationScope.team, TEAM_ID, 12),
+        (AggregationScope.organization, ORGANIZATION_ID, 12),
+    ],
+)
+def test_get_emissions_aggregates_sums_the_emissions_of_the_scope(
+    repository, scope, scope_id, emissions_count
+):
+    (aggregate,) = repository.get_emissions_aggregates(scope, scope_id)
+
+    assert aggregate.bucket is None
+    assert aggregate.emissions_count == emissions_count
+    assert aggregate.duration == 3600 * emissions_count
+    assert aggregate.emissions_sum == emissions_count
+    assert aggregate.energy_consumed == 3 * emissions_count
+    assert aggregate.cpu_energy == 2 * emissions_count
+    assert aggregate.emissions_rate == pytest.approx(1 / 3600)
+    assert (aggregate.start, aggregate.end) == (START, START + timedelta(hours=3))
+
+
+def test_get_emissions_aggregates_by_time_bucket(repository):
+    days = repository.get_emissions_aggregates(
+        AggregationScope.project, PROJECT_ID, TimeBucket.day
+    )
+    weeks = repository.get_emissions_aggregates(
+        AggregationScope.project, PROJECT_ID, TimeBucket.week
+    )
+
+    assert [(d.bucket, d.emissions_count) for d in days] == [
+        (datetime(2021, 4, 4), 6),
+        (datetime(2021, 4, 5), 6),
+    ]
+    assert [(w.bucket, w.emissions_count) for w in weeks] == [
+        (datetime(2021, 3, 29), 6),
+        (datetime(2021, 4, 5), 6),
+    ]
+
+
+def test_get_emissions_aggregates_between_start_and_end(repository):
+    (aggregate,) = repository.get_emissions_aggregates(
+        AggregationScope.experiment,
+        EXPERIMENT_2_ID,
+        start=START + timedelta(hours=1),
+        end=START + timedelta(hours=3),
+    )
+
+    assert aggregate.emissions_count == 2
+
+
+def test_get_emissions_aggregates_without_emissions(repository):
+    assert repository.get_emissions_aggregates(AggregationScope.run, uuid4()) == []
+    assert (
+        repository.get_emissions_aggregates(
+            AggregationScope.run, uuid4(), TimeBucket.hour
+        )
+        == []
+    )
+
+
+def test_date_trunc_on_postgresql():
+    expression = date_trunc("week", column("timestamp"))
+
+    assert (
+        str(expression.compile(dialect=postgresql.dialect()))
+        == "date_trunc('week', timestamp)"
+    )
+    with pytest.raises(ValueError):
+        date_trunc("second", column("timestamp"))
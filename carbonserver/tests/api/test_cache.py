@@ -0,0 +1,108 @@
+from typing import List
+from unittest import mock
+
+import pytest
+
+from carbonserver.api.cache import Cache, InMemoryBackend, RedisBackend
+from carbonserver.api.schemas import Project
+
+
+class FakeRedis:
+    """The methods of redis.Redis used by the cache, without expiry"""
+
+    def __init__(self):
+        self.values = dict()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, px=None):
+        self.values[key] = value
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1).encode()
+        return int(self.values[key])
+
+
+PROJECT = Project(
+    id="f52fe339-164d-4c2b-a8c0-f562dfce066d",
+    name="project",
+    description="A project",
+    team_id="e52fe339-164d-4c2b-a8c0-f562dfce066d",
+)
+
+
+@pytest.fixture(params=["in_memory", "redis"])
+def cache(request):
+    if request.param == "in_memory":
+        yield Cache(InMemoryBackend(max_size=10), ttl=60)
+    else:
+        yield Cache(RedisBackend(FakeRedis()), ttl=60)
+
+
+def test_values_are_computed_once_until_invalidated(cache):
+    compute = mock.Mock(return_value=[PROJECT])
+
+    for _ in range(3):
+        assert cache.get_or_set("projects", "team", List[Project], compute) == [PROJECT]
+    cache.invalidate("projects")
+    cache.get_or_set("projects", "team", List[Project], compute)
+
+    assert compute.call_count == 2
+
+
+def test_none_is_not_cached(cache):
+    compute = mock.Mock(return_value=None)
+
+    cache.get_or_set("projects", "project", Project, compute)
+    cache.get_or_set("projects", "project", Project, compute)
+
+    assert compute.call_count == 2
+
+
+def test_none_is_cached_with_its_own_ttl():
+    backend = InMemoryBackend(max_size=10)
+    cache = Cache(backend, ttl=60, none_ttl=5)
+    compute = mock.Mock(return_value=None)
+
+    with mock.patch("carbonserver.api.cache.time.monotonic", return_value=0):
+        assert cache.get_or_set("projects", "project", Project, compute) is None
+        assert cache.get_or_set("projects", "project", Project, compute) is None
+    with mock.patch("carbonserver.api.cache.time.monotonic", return_value=6):
+        cache.get_or_set("projects", "project", Project, compute)
+
+    assert compute.call_count == 2
+
+
+def test_in_memory_backend_evicts_the_least_recently_used_values():
+    backend = InMemoryBackend(max_size=2)
+    backend.set("a", b"1", ttl=60)
+    backend.set("b", b"2", ttl=60)
+    backend.get("a")
+    backend.set("c", b"3", ttl=60)
+    backend.incr("version")
+
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (
+        b"1",
+        None,
+        b"3",
+    )
+    assert backend.get("version") == b"1"
+
+
+def test_in_memory_backend_expires_the_values():
+    backend = InMemoryBackend(max_size=2)
+    with mock.patch("time.monotonic", return_value=1000):
+        backend.set("a", b"1", ttl=60)
+    with mock.patch("time.monotonic", return_value=1059):
+        assert backend.get("a") == b"1"
+    with mock.patch("time.monotonic", return_value=1060):
+        assert backend.get("a") is None
+
+
+def test_values_are_computed_when_the_backend_is_unavailable():
+    backend = mock.Mock(spec=RedisBackend)
+    backend.get.side_effect = ConnectionError()
+    cache = Cache(backend, ttl=60)
+
+    assert cache.get_or_set("projects", "project", Project, lambda: PROJECT) == PROJECT
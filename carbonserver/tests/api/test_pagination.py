@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi_pagination import Params
+from pydantic import ValidationError
+
+from carbonserver.api.infra.database import sql_models
+from carbonserver.api.infra.repositories.repository_emissions import (
+    SqlAlchemyRepository,
+)
+from carbonserver.api.pagination import CursorParams, decode_cursor, encode_cursor
+
+RUN_ID = UUID("40088f1a-d28e-4980-8d80-bf5600056a14")
+OTHER_RUN_ID = UUID("07614c15-c5b0-4c9a-8101-6b6ad3733543")
+START = datetime(2021, 4, 4, 8, 43)
+
+
+@pytest.fixture
+def repository(sqlite_session_factory):
+    with sqlite_session_factory() as s:
+        for run_id, count in ((RUN_ID, 25), (OTHER_RUN_ID, 5)):
+            for i in range(count):
+                # Pairs of emissions with the same timestamp
+                s.add(
+                    sql_models.Emission(
+                        id=uuid4(),
+                        run_id=run_id,
+                        timestamp=START + timedelta(seconds=15 * (i // 2)),
+                        duration=i + 1,
+                    )
+                )
+        s.commit()
+    yield SqlAlchemyRepository(session_factory=sqlite_session_factory)
+
+
+def test_cursor_round_trip():
+    emission_id = uuid4()
+
+    assert decode_cursor(encode_cursor(START, emission_id)) == (START, emission_id)
+    with pytest.raises(ValidationError):
+        CursorParams(cursor="not a cursor")
+
+
+def test_get_emissions_from_run_selects_the_page(repository):
+    page = repository.get_emissions_from_run(RUN_ID, Params(page=3, size=10))
+
+    assert page.total == 25
+    assert sorted(e.duration for e in page.items) == list(range(21, 26))
+    assert all(e.run_id == RUN_ID for e in page.items)
+
+
+def test_get_emissions_from_run_by_cursor_reads_all_the_emissions(repository):
+    pages = [repository.get_emissions_from_run_by_cursor(RUN_ID, CursorParams(size=4))]
+    while pages[-1].next_cursor is not None:
+        params = CursorParams(cursor=pages[-1].next_cursor, size=4)
+        pages.append(repository.get_emissions_from_run_by_cursor(RUN_ID, params))
+
+    emissions = [e for page in pages for e in page.items]
+    assert len(pages) == 7
+    assert len({e.id for e in emissions}) == 25
+    assert [(e.duration - 1) // 2 for e in emissions] == [i // 2 for i in range(25)]
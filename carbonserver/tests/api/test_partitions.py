@@ -0,0 +1,100 @@
+from datetime import date, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from carbonserver.api.infra.database import sql_models
+from carbonserver.api.infra.repositories import repository_emissions, repository_rollups
+from carbonserver.api.schemas import AggregationScope, EmissionCreate
+from carbonserver.database.partitions import (
+    add_months,
+    month_start,
+    partition_name,
+    subtract_from_rollups,
+    update_first_timestamps,
+)
+
+EXPERIMENT_ID = uuid4()
+RUN_1_ID = uuid4()
+RUN_2_ID = uuid4()
+# Emissions of run 1 in March and April, of run 2 in March only
+START = datetime(2021, 3, 30)
+APRIL = datetime(2021, 4, 1)
+
+
+def get_emission(run_id, day):
+    return EmissionCreate(
+        timestamp=START + timedelta(days=day),
+        run_id=run_id,
+        duration=60,
+        emissions_sum=0.5,
+        emissions_rate=0.5 / 60,
+        cpu_power=10.0,
+        gpu_power=0.0,
+        ram_power=5.0,
+        cpu_energy=2.0,
+        gpu_energy=0.0,
+        ram_energy=1.0,
+        energy_consumed=3.0,
+    )
+
+
+@pytest.mark.parametrize(
+    "month, months, expected",
+    [
+        (date(2021, 4, 1), 1, date(2021, 5, 1)),
+        (date(2021, 12, 1), 1, date(2022, 1, 1)),
+        (date(2021, 1, 1), -1, date(2020, 12, 1)),
+        (date(2021, 4, 1), -16, date(2019, 12, 1)),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test_partition_name():
+    assert partition_name(month_start(date(2021, 4, 17))) == "emissions_y2021m04"
+
+
+def test_emissions_of_a_detached_partition_are_removed_from_the_rollups(
+    sqlite_session_factory,
+):
+    with sqlite_session_factory() as s:
+        s.add(sql_models.Experiment(id=EXPERIMENT_ID))
+        s.add(sql_models.Run(id=RUN_1_ID, experiment_id=EXPERIMENT_ID))
+        s.add(sql_models.Run(id=RUN_2_ID, experiment_id=EXPERIMENT_ID))
+        s.commit()
+    repository_emissions.SqlAlchemyRepository(sqlite_session_factory).add_emissions(
+        [get_emission(RUN_1_ID, day) for day in range(4)]
+        + [get_emission(RUN_2_ID, day) for day in range(2)]
+    )
+
+    with sqlite_session_factory() as s:
+        # What detaching the partition of March does, without partitions
+        s.execute(
+            text(
+                "CREATE TABLE emissions_y2021m03 AS"
+                + " SELECT * FROM emissions WHERE timestamp < :april"
+            ),
+            {"april": APRIL},
+        )
+        subtract_from_rollups(s, "emissions_y2021m03")
+        s.execute(
+            text("DELETE FROM emissions WHERE timestamp < :april"), {"april": APRIL}
+        )
+        update_first_timestamps(s, APRIL)
+        s.commit()
+
+    rollup_repository = repository_rollups.SqlAlchemyRepository(sqlite_session_factory)
+    assert rollup_repository.check_rollups() == []
+    run_rollup = rollup_repository.get_rollup(AggregationScope.run, RUN_1_ID)
+    assert run_rollup.emissions_count == 2
+    assert run_rollup.start == APRIL
+    assert rollup_repository.get_rollup(AggregationScope.run, RUN_2_ID) is None
+    experiment_rollup = rollup_repository.get_rollup(
+        AggregationScope.experiment, EXPERIMENT_ID
+    )
+    assert experiment_rollup.emissions_count == 2
+    assert experiment_rollup.energy_consumed == 6.0
+    assert experiment_rollup.start == APRIL
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+from unittest import mock
+from uuid import uuid4
+
+import pytest
+
+from carbonserver.api.infra.database import sql_models
+from carbonserver.api.infra.repositories import repository_emissions, repository_rollups
+from carbonserver.api.schemas import AggregationScope, EmissionCreate
+
+EXPERIMENT_ID = uuid4()
+RUN_1_ID = uuid4()
+RUN_2_ID = uuid4()
+START = datetime(2021, 4, 4, 8, 43)
+
+
+def get_emission(run_id, minutes):
+    return EmissionCreate(
+        timestamp=START + timedelta(minutes=minutes),
+        run_id=run_id,
+        duration=60,
+        emissions_sum=0.5,
+        emissions_rate=0.5 / 60,
+        cpu_power=10.0,
+        gpu_power=0.0,
+        ram_power=5.0,
+        cpu_energy=2.0,
+        gpu_energy=0.0,
+        ram_energy=1.0,
+        energy_consumed=3.0,
+    )
+
+
+@pytest.fixture
+def repositories(sqlite_session_factory):
+    with sqlite_session_factory() as s:
+        s.add(sql_models.Experiment(id=EXPERIMENT_ID))
+        s.add(sql_models.Run(id=RUN_1_ID, experiment_id=EXPERIMENT_ID))
+        s.add(sql_models.Run(id=RUN_2_ID, experiment_id=EXPERIMENT_ID))
+        s.commit()
+    yield (
+        repository_emissions.SqlAlchemyRepository(sqlite_session_factory),
+        repository_rollups.SqlAlchemyRepository(sqlite_session_factory),
+    )
+
+
+def test_emissions_are_added_to_the_rollups(repositories):
+    emission_repository, rollup_repository = repositories
+    emission_repository.add_emission(get_emission(RUN_1_ID, 2))
+    emission_repository.add_emissions(
+        [
+            get_emission(RUN_1_ID, 3),
+            get_emission(RUN_1_ID, 1),
+            get_emission(RUN_2_ID, 0),
+        ]
+    )
+
+    for scope, scope_id in (
+        (AggregationScope.run, RUN_1_ID),
+        (AggregationScope.run, RUN_2_ID),
+        (AggregationScope.experiment, EXPERIMENT_ID),
+    ):
+        rollup = rollup_repository.get_rollup(scope, scope_id)
+        (aggregate,) = emission_repository.get_emissions_aggregates(scope, scope_id)
+        assert rollup == aggregate
+    rollup = rollup_repository.get_rollup(AggregationScope.run, RUN_1_ID)
+    assert rollup.emissions_count == 3
+    assert rollup.energy_consumed == 9.0
+    assert (rollup.start, rollup.end) == (
+        START + timedelta(minutes=1),
+        START + timedelta(minutes=3),
+    )
+    assert rollup_repository.check_rollups() == []
+
+
+def test_get_rollup_without_emissions(repositories):
+    _, rollup_repository = repositories
+
+    assert rollup_repository.get_rollup(AggregationScope.run, RUN_1_ID) is None
+
+
+@pytest.mark.parametrize("batch_size", [1, 500])
+def test_check_rollups_repairs_the_inconsistent_rollups(
+    repositories, sqlite_session_factory, batch_size
+):
+    emission_repository, rollup_repository = repositories
+    emission_repository.add_emissions(
+        [get_emission(RUN_1_ID, 0), get_emission(RUN_2_ID, 0)]
+    )
+    with sqlite_session_factory() as s:
+        # Emissions changed outside of the repositories
+        s.query(sql_models.RunRollup).filter(
+            sql_models.RunRollup.run_id == RUN_1_ID
+        ).update({"emissions_sum": 100.0})
+        s.add(sql_models.Emission(id=uuid4(), run_id=RUN_2_ID, timestamp=START))
+        s.add(sql_models.RunRollup(run_id=uuid4(), emissions_count=1))
+        s.commit()
+
+    inconsistent = rollup_repository.check_rollups(repair=True, batch_size=batch_size)
+
+    assert len(inconsistent) == 4
+    assert (AggregationScope.run, RUN_1_ID) in inconsistent
+    assert (AggregationScope.experiment, EXPERIMENT_ID) in inconsistent
+    assert rollup_repository.check_rollups() == []
+    rollup = rollup_repository.get_rollup(AggregationScope.run, RUN_2_ID)
+    assert rollup.emissions_count == 2
+    assert rollup.emissions_sum == 0.5
+
+
+def test_check_rollups_locks_only_the_inconsistent_rollups(
+    repositories, sqlite_session_factory
+):
+    emission_repository, rollup_repository = repositories
+    emission_repository.add_emissions(
+        [get_emission(RUN_1_ID, 0), get_emission(RUN_2_ID, 0)]
+    )
+    with sqlite_session_factory() as s:
+        s.query(sql_models.RunRollup).filter(
+            sql_models.RunRollup.run_id == RUN_2_ID
+        ).update({"emissions_count": 3})
+        s.commit()
+
+    with mock.patch.object(
+        rollup_repository, "check_rollup", wraps=rollup_repository.check_rollup
+    ) as check_rollup:
+        inconsistent = rollup_repository.check_rollups()
+
+    assert inconsistent == [(AggregationScope.run, RUN_2_ID)]
+    check_rollup.assert_called_once_with(AggregationScope.run, RUN_2_ID, False)
@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+
+from carbonserver.api.infra.database import sql_models
+from carbonserver.api.infra.repositories.repository_emissions import (
+    SqlAlchemyRepository,
+)
+from carbonserver.api.schemas import Resolution
+
+RUN_ID = uuid4()
+START = datetime(2021, 4, 4, 8, 0)
+
+
+@pytest.fixture
+def repository(sqlite_session_factory):
+    with sqlite_session_factory() as s:
+        s.add(sql_models.Run(id=RUN_ID))
+        # 1 emission every 15 s for 2 hours, with a CPU power from 0 to 3 W
+        # each minute
+        for i in range(480):
+            s.add(
+                sql_models.Emission(
+                    id=uuid4(),
+                    run_id=RUN_ID,
+                    timestamp=START + timedelta(seconds=15 * i),
+                    duration=15,
+                    emissions_sum=1.0,
+                    emissions_rate=1 / 15,
+                    cpu_power=float(i % 4),
+                    gpu_power=None,
+                    ram_power=1.0,
+                    energy_consumed=3.0,
+                )
+            )
+        s.commit()
+    yield SqlAlchemyRepository(session_factory=sqlite_session_factory)
+
+
+def test_get_emissions_series_per_minute(repository):
+    samples = repository.get_emissions_series(RUN_ID, Resolution.minute)
+
+    assert len(samples) == 120
+    assert samples[1].timestamp == START + timedelta(minutes=1)
+    assert samples[1].emissions_count == 4
+    assert samples[1].duration == 60
+    assert (
+        samples[1].cpu_power.min,
+        samples[1].cpu_power.max,
+        samples[1].cpu_power.mean,
+    ) == (0.0, 3.0, 1.5)
+    assert samples[1].gpu_power.mean is None
+
+
+def test_get_emissions_series_per_hour_between_start_and_end(repository):
+    samples = repository.get_emissions_series(
+        RUN_ID,
+        Resolution.hour,
+        start=START + timedelta(minutes=30),
+        end=START + timedelta(minutes=90),
+    )
+
+    assert [(s.timestamp, s.emissions_count) for s in samples] == [
+        (START, 120),
+        (START + timedelta(hours=1), 120),
+    ]
+
+
+def test_get_emissions_series_raw(repository):
+    samples = repository.get_emissions_series(
+        RUN_ID, Resolution.raw, end=START + timedelta(minutes=1)
+    )
+
+    assert [s.cpu_power.max for s in samples] == [0.0, 1.0, 2.0, 3.0]
+    assert all(s.emissions_count == 1 for s in samples)
+
+
+def test_get_emissions_series_raw_limited(repository):
+    samples = repository.get_emissions_series(RUN_ID, Resolution.raw, limit=3)
+
+    assert [s.timestamp for s in samples] == [
+        START + timedelta(seconds=15 * i) for i in range(3)
+    ]
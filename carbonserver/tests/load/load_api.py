@@ -0,0 +1,107 @@
+"""
+Load test of the ingest and read endpoints of the emissions, against a
+running API:
+
+    python tests/load/load_api.py --url http://localhost:8000 --run-id <run id>
+
+Start the API on the database to test, with DATABASE_URL pointing to SQLite or
+PostgreSQL, and DATABASE_ASYNC=1 to compare with the async engine. The run must
+exist in that database.
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+EMISSION = {
+    "duration": 60,
+    "emissions_sum": 0.5,
+    "emissions_rate": 0.5 / 60,
+    "cpu_power": 10.0,
+    "gpu_power": 0.0,
+    "ram_power": 5.0,
+    "cpu_energy": 2.0,
+    "gpu_energy": 0.0,
+    "ram_energy": 1.0,
+    "energy_consumed": 3.0,
+}
+
+
+def get_emission(run_id):
+    return {
+        **EMISSION,
+        "run_id": run_id,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def load(name, request, requests_count, concurrency):
+    """Send the requests from `concurrency` threads and print the throughput
+    and the latencies"""
+
+    def send(_):
+        start = time.perf_counter()
+        response = request()
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(send, range(requests_count)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<26} {requests_count / elapsed:8.1f} req/s"
+        + f"  p50 {statistics.median(latencies) * 1000:7.1f} ms"
+        + f"  p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--run-id", required=True)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    load(
+        "POST /emission",
+        lambda: session.post(f"{args.url}/emission", json=get_emission(args.run_id)),
+        args.requests,
+        args.concurrency,
+    )
+    load(
+        "POST /emissions/batch",
+        lambda: session.post(
+            f"{args.url}/emissions/batch",
+            json=[get_emission(args.run_id) for _ in range(args.batch_size)],
+        ),
+        args.requests // args.batch_size or 1,
+        args.concurrency,
+    )
+    load(
+        "GET /emissions/run",
+        lambda: session.get(f"{args.url}/emissions/run/{args.run_id}"),
+        args.requests,
+        args.concurrency,
+    )
+    load(
+        "GET /emissions/run/cursor",
+        lambda: session.get(f"{args.url}/emissions/run/{args.run_id}/cursor"),
+        args.requests,
+        args.concurrency,
+    )
+
+
+if __name__ == "__main__":
+    main()
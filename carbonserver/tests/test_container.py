@@ -5,13 +5,20 @@ def test_container_exposes_correct_list_of_providers_at_initialisation():
     expected_providers = [
         "config",
         "db",
+        "async_db",
+        "cache_backend",
+        "cache",
+        "api_key_cache",
         "emission_repository",
+        "rollup_repository",
+        "async_emission_repository",
         "experiment_repository",
         "project_repository",
         "team_repository",
         "organization_repository",
         "user_repository",
         "emission_service",
+        "async_emission_service",
         "experiment_service",
         "project_service",
         "team_service",
@@ -19,6 +26,7 @@ def test_container_exposes_correct_list_of_providers_at_initialisation():
         "run_service",
         "organization_service",
         "user_service",
+        "auth_service",
         "sign_up_service",
     ]
 
@@ -9,6 +9,7 @@ import dataclasses
 import json
 import time
 from datetime import timedelta, tzinfo
+from typing import List, Optional
 
 import arrow
 import requests
@@ -32,6 +33,9 @@ class ApiClient:  # (AsyncClient)
 
     run_id = None
     _previous_call = time.time()
+    # Errors of the server or of a proxy, or of an expired or rotated API key:
+    # emissions are sent again later
+    RETRY_STATUS_CODES = {401, 403, 408, 429, 500, 502, 503, 504}
 
     def __init__(
         self,
@@ -49,29 +53,21 @@ class ApiClient:  # (AsyncClient)
         self.experiment_id = experiment_id
         self.api_key = api_key
         self.conf = conf
+        # Connections kept alive between the calls
+        self._session = requests.Session()
+        self._batch_endpoint = True
         if self.experiment_id is not None:
             self._create_run(self.experiment_id)
 
-    def add_emission(self, carbon_emission: dict):
-        assert self.experiment_id is not None
-        self._previous_call = time.time()
-        if self.run_id is None:
-            # TODO : raise an Exception ?
-            logger.debug(
-                "ApiClient.add_emission need a run_id : the initial call may "
-                + "have failed. Retrying..."
-            )
-            self._create_run(self.experiment_id)
-            if self.run_id is None:
-                logger.error(
-                    "ApiClient.add_emission still no run_id, aborting for this time !"
-                )
-            return False
+    def prepare_emission(self, carbon_emission: dict) -> Optional[dict]:
+        """
+        Payload of an emission for the API, None if it can't be sent
+        """
         if carbon_emission["duration"] < 1:
             logger.warning(
                 "ApiClient : emissions not sent because of a duration smaller than 1."
             )
-            return False
+            return None
         emission = EmissionCreate(
             timestamp=get_datetime_with_timezone(),
             run_id=self.run_id,
@@ -85,11 +81,41 @@ class ApiClient:  # (AsyncClient)
             gpu_energy=carbon_emission["gpu_energy"],
             ram_energy=carbon_emission["ram_energy"],
             energy_consumed=carbon_emission["energy_consumed"],
+            gpu_power_min=carbon_emission.get("gpu_power_min"),
+            gpu_power_max=carbon_emission.get("gpu_power_max"),
+            gpu_power_p95=carbon_emission.get("gpu_power_p95"),
+            ram_power_min=carbon_emission.get("ram_power_min"),
+            ram_power_max=carbon_emission.get("ram_power_max"),
+            ram_power_p95=carbon_emission.get("ram_power_p95"),
         )
+        return dataclasses.asdict(emission)
+
+    def _check_run_id(self) -> bool:
+        if self.run_id is None:
+            # TODO : raise an Exception ?
+            logger.debug(
+                "ApiClient.add_emission need a run_id : the initial call may "
+                + "have failed. Retrying..."
+            )
+            self._create_run(self.experiment_id)
+            if self.run_id is None:
+                logger.error(
+                    "ApiClient.add_emission still no run_id, aborting for this time !"
+                )
+                return False
+        return True
+
+    def add_emission(self, carbon_emission: dict):
+        assert self.experiment_id is not None
+        self._previous_call = time.time()
+        if not self._check_run_id():
+            return False
+        payload = self.prepare_emission(carbon_emission)
+        if payload is None:
+            return False
         try:
-            payload = dataclasses.asdict(emission)
             url = self.url + "/emission"
-            r = requests.post(url=url, json=payload, timeout=2)
+            r = self._session.post(url=url, json=payload, timeout=2)
             if r.status_code != 201:
                 self._log_error(url, payload, r)
                 return False
@@ -99,6 +125,57 @@ class ApiClient:  # (AsyncClient)
             return False
         return True
 
+    def send_emissions(self, payloads: List[dict]) -> List[dict]:
+        """
+        Post emission payloads, in a single request when the API has the batch
+        endpoint.
+        The payloads are sent for their run_id, which must be set.
+        :return: the payloads to send again later, empty when all of them were
+                 delivered. Payloads rejected as invalid are dropped.
+        """
+        self._previous_call = time.time()
+        if self._batch_endpoint:
+            url = self.url + "/emissions/batch"
+            try:
+                r = self._session.post(url=url, json=payloads, timeout=10)
+            except Exception as e:
+                logger.debug(f"ApiClient - {url} unreachable: {e!r}")
+                return payloads
+            if r.status_code in (404, 405):
+                logger.debug("ApiClient - No batch endpoint, sending one by one")
+                self._batch_endpoint = False
+            elif r.status_code == 422 and len(payloads) > 1:
+                # Only the invalid payloads are dropped
+                logger.warning(
+                    "ApiClient - Emissions rejected by the API, sending them one"
+                    + " by one"
+                )
+            else:
+                return self._check_delivery(url, payloads, r, payloads)
+        return self._send_one_by_one(payloads)
+
+    def _send_one_by_one(self, payloads: List[dict]) -> List[dict]:
+        url = self.url + "/emission"
+        for i, payload in enumerate(payloads):
+            try:
+                r = self._session.post(url=url, json=payload, timeout=2)
+            except Exception as e:
+                logger.debug(f"ApiClient - {url} unreachable: {e!r}")
+                return payloads[i:]
+            if self._check_delivery(url, payload, r, [payload]):
+                return payloads[i:]
+        return []
+
+    def _check_delivery(self, url, payload, response, undelivered) -> List[dict]:
+        if response.status_code == 201:
+            logger.debug(f"ApiClient - Successful upload emissions to {url}")
+            return []
+        self._log_error(url, payload, response)
+        if response.status_code in self.RETRY_STATUS_CODES:
+            return undelivered
+        # Sending it again would be rejected again
+        return []
+
     def _create_run(self, experiment_id):
         """
         Create the experiment for project_id
@@ -127,7 +204,7 @@ class ApiClient:  # (AsyncClient)
             )
             payload = dataclasses.asdict(run)
             url = self.url + "/run"
-            r = requests.post(url=url, json=payload, timeout=2)
+            r = self._session.post(url=url, json=payload, timeout=2)
             if r.status_code != 201:
                 self._log_error(url, payload, r)
                 return None
@@ -148,7 +225,7 @@ class ApiClient:  # (AsyncClient)
         """
         payload = dataclasses.asdict(experiment)
         url = self.url + "/experiment"
-        r = requests.post(url=url, json=payload, timeout=2)
+        r = self._session.post(url=url, json=payload, timeout=2)
         if r.status_code != 201:
             self._log_error(url, payload, r)
             return None
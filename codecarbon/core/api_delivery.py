@@ -0,0 +1,288 @@
+"""
+Delivery of the emissions to the Code Carbon API from a background thread, so
+that the measures of the tracker never wait for the network.
+
+Emissions are queued and posted in batches. When the API can't be reached,
+the batch is written to a spool directory and the delivery is retried with an
+exponential backoff: spooled batches are sent once the API answers again, by
+this tracker or by the next one started on the machine with the same API and
+experiment. Only emissions of a run are spooled, they are always sent for the
+run that measured them.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING, List, Optional
+
+from codecarbon.core.machine_profile import get_default_cache_dir
+from codecarbon.external.logger import logger
+
+if TYPE_CHECKING:
+    from codecarbon.core.api_client import ApiClient
+
+
+# A batch claimed by a tracker for longer than this is claimed again, in seconds
+STALE_CLAIM_SECONDS = 600
+
+
+def get_default_spool_dir() -> str:
+    return os.path.join(get_default_cache_dir(), "api_spool")
+
+
+def get_spool_dir(
+    endpoint_url: str, experiment_id: Optional[str], base_dir: Optional[str] = None
+) -> str:
+    """
+    Spool directory of the emissions of an experiment sent to an API, so that
+    they are only delivered to this API by the trackers of this experiment
+    """
+    key = hashlib.sha256(f"{endpoint_url}|{experiment_id}".encode()).hexdigest()
+    return os.path.join(base_dir or get_default_spool_dir(), key[:16])
+
+
+def is_process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        # os.kill would terminate the process, rely on the age of the claim
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Alive, but owned by another user
+        return True
+    return True
+
+
+class EmissionsDeliveryQueue:
+    """
+    >>> delivery = EmissionsDeliveryQueue(api)
+    >>> delivery.start()
+    >>> delivery.put(api.prepare_emission(emissions_data))
+    >>> delivery.close()
+    """
+
+    def __init__(
+        self,
+        api: "ApiClient",
+        max_size: int = 1000,
+        batch_size: int = 100,
+        spool_dir: Optional[str] = None,
+        max_backoff: float = 300,
+    ):
+        """
+        :param api: Client used to post the emissions
+        :param max_size: Number of emissions queued in memory, the next ones are
+                         spooled
+        :param batch_size: Maximum number of emissions posted at once
+        :param spool_dir: Directory of the emissions not delivered yet, defaults
+                          to $XDG_CACHE_HOME/codecarbon/api_spool. The emissions
+                          are spooled in a subdirectory of the API and experiment
+        :param max_backoff: Maximum time (in seconds) between two retries
+        """
+        self.api = api
+        self.batch_size = batch_size
+        self.max_size = max_size
+        self.spool_dir = get_spool_dir(api.url, api.experiment_id, spool_dir)
+        self.max_backoff = max_backoff
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=max_size)
+        # Emissions measured before the run could be created on the API
+        self._without_run: List[dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._backoff = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="codecarbon-api-delivery", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, emission: dict) -> None:
+        """
+        Queue an emission payload, never blocks
+        """
+        try:
+            self._queue.put_nowait(emission)
+        except queue.Full:
+            logger.warning("ApiClient : delivery queue full, spooling the emission")
+            self._spool([emission])
+
+    def close(self, timeout: float = 10) -> None:
+        """
+        Stop the thread and make a last delivery attempt, the emissions that
+        could not be delivered are spooled
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        batch = self._get_batch(block=False)
+        while batch:
+            if self._backoff > 0:
+                self._spool(batch)
+            else:
+                self._deliver(batch)
+            batch = self._get_batch(block=False)
+        if self._without_run and self._backoff == 0:
+            self._deliver([])
+        if self._backoff == 0:
+            self._deliver_spool()
+        if self._without_run:
+            logger.error(
+                f"ApiClient : {len(self._without_run)} emissions not delivered,"
+                + " the run could not be created on the API"
+            )
+
+    def _run(self) -> None:
+        self._deliver_spool()
+        while not self._stop.is_set():
+            batch = self._get_batch(block=True)
+            if batch and not self._deliver(batch):
+                self._stop.wait(self._backoff)
+
+    def _get_batch(self, block: bool) -> List[dict]:
+        batch = []
+        try:
+            if block:
+                batch.append(self._queue.get(timeout=1))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _deliver(self, batch: List[dict]) -> bool:
+        """
+        Post the batch, spool what could not be delivered
+        """
+        batch = self._assign_run(batch, create_run=True)
+        if not batch:
+            self._backoff = min(max(2 * self._backoff, 1), self.max_backoff)
+            return False
+        undelivered = self.api.send_emissions(batch)
+        if undelivered:
+            self._spool(undelivered)
+            self._backoff = min(max(2 * self._backoff, 1), self.max_backoff)
+            logger.warning(
+                f"ApiClient : {len(undelivered)} emissions not delivered, retrying"
+                + f" in {self._backoff:.0f} s"
+            )
+            return False
+        if self._backoff > 0:
+            self._backoff = 0
+            self._deliver_spool()
+        return True
+
+    def _assign_run(self, emissions: List[dict], create_run: bool) -> List[dict]:
+        """
+        Give the run of the tracker to the emissions measured before it was
+        created on the API. Without a run, they are kept in memory until it is
+        created, up to max_size of them, as they can't be spooled.
+
+        :param create_run: Try to create the run, calling the API
+        :return: The emissions with a run
+        """
+        if self.api.run_id is None and create_run:
+            if self._without_run or any(e["run_id"] is None for e in emissions):
+                self.api._check_run_id()
+        with self._lock:
+            emissions = self._without_run + emissions
+            self._without_run = []
+            if self.api.run_id is not None:
+                return [
+                    dict(emission, run_id=emission["run_id"] or self.api.run_id)
+                    for emission in emissions
+                ]
+            self._without_run = [e for e in emissions if e["run_id"] is None]
+            if len(self._without_run) > self.max_size:
+                logger.error(
+                    "ApiClient : no run to send"
+                    + f" {len(self._without_run) - self.max_size} emissions to,"
+                    + " dropping them"
+                )
+                self._without_run = self._without_run[-self.max_size :]
+        return [emission for emission in emissions if emission["run_id"] is not None]
+
+    def _spool(self, emissions: List[dict]) -> None:
+        emissions = self._assign_run(emissions, create_run=False)
+        if not emissions:
+            return
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            file_name = f"{time.time():.6f}-{uuid.uuid4().hex[:8]}.json"
+            fd, tmp_path = tempfile.mkstemp(dir=self.spool_dir, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(emissions, f)
+            os.replace(tmp_path, os.path.join(self.spool_dir, file_name))
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"ApiClient : could not spool {len(emissions)} emissions: {e}")
+
+    def _deliver_spool(self) -> None:
+        """
+        Send the spooled emissions, oldest first, until a delivery fails
+        """
+        self._reclaim_stale_batches()
+        try:
+            file_names = sorted(
+                name for name in os.listdir(self.spool_dir) if name.endswith(".json")
+            )
+        except OSError:
+            return
+        for file_name in file_names:
+            path = os.path.join(self.spool_dir, file_name)
+            # Claimed by renaming, so that another tracker doesn't send it too
+            claimed_path = f"{path}.{os.getpid()}.sending"
+            try:
+                os.rename(path, claimed_path)
+                # Dates the claim, a claim too old is taken over
+                os.utime(claimed_path)
+                with open(claimed_path) as f:
+                    emissions = json.load(f)
+            except (OSError, ValueError):
+                continue
+            undelivered = self.api.send_emissions(emissions)
+            if undelivered:
+                with open(claimed_path, "w") as f:
+                    json.dump(undelivered, f)
+                os.rename(claimed_path, path)
+                self._backoff = max(self._backoff, 1)
+                return
+            os.remove(claimed_path)
+
+    def _reclaim_stale_batches(self) -> None:
+        """
+        Spool again the batches claimed by a tracker which stopped before
+        sending them, so that they are not lost
+        """
+        try:
+            file_names = [
+                name for name in os.listdir(self.spool_dir) if name.endswith(".sending")
+            ]
+        except OSError:
+            return
+        for file_name in file_names:
+            # <batch>.json.<pid>.sending
+            path, pid, _ = file_name.rsplit(".", 2)
+            claimed_path = os.path.join(self.spool_dir, file_name)
+            try:
+                claim_age = time.time() - os.path.getmtime(claimed_path)
+                if claim_age < STALE_CLAIM_SECONDS and is_process_alive(int(pid)):
+                    continue
+                os.rename(claimed_path, os.path.join(self.spool_dir, path))
+                logger.debug(f"ApiClient : spooled {path} again, its sending stopped")
+            except (OSError, ValueError):
+                continue
@@ -19,9 +19,10 @@
 # CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE
 # OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-from typing import Any, Dict, Optional
-
-import requests
+import queue
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
 from codecarbon.external.logger import logger
 
@@ -54,9 +55,41 @@ CLOUD_METADATA_MAPPING: Dict[str, Dict[str, Any]] = {
 }
 
 
+def _get_provider_cloud_details(provider, timeout):
+    # type: (str, float) -> Tuple[Optional[Dict[str, Any]], bool]
+    """
+    The metadata of the provider, and whether its endpoint timed out
+    """
+    import requests
+
+    try:
+        params = CLOUD_METADATA_MAPPING[provider]
+        response = requests.get(
+            params["url"], headers=params["headers"], timeout=timeout
+        )
+        response.raise_for_status()
+        response_data = response.json()
+
+        postprocess_function = params.get("postprocess_function")
+        if postprocess_function is not None:
+            response_data = postprocess_function(response_data)
+
+        return {"provider": provider, "metadata": response_data}, False
+    except requests.exceptions.Timeout as e:
+        logger.debug("No answer of the %s metadata endpoint: %r", provider, e)
+        return None, True
+    except Exception as e:
+        logger.debug("Not running on %s, couldn't retrieve metadata: %r", provider, e)
+    return None, False
+
+
 def get_env_cloud_details(timeout=1):
-    # type: (int) -> Optional[Any]
+    # type: (float) -> Optional[Any]
     """
+    Query the metadata endpoints of all the providers at the same time, the
+    first one to answer wins. Returns None if none answered within `timeout`
+    seconds, which is how long an on-premise machine waits.
+
     >>> get_env_cloud_details()
     {'provider': 'AWS',
      'metadata': {'accountId': '26550917306',
@@ -75,23 +108,42 @@ def get_env_cloud_details(timeout=1):
         'region': 'us-east-1',
         'version': '2017-09-30'}}
     """
-    for provider in CLOUD_METADATA_MAPPING.keys():
+    return probe_env_cloud_details(timeout)[0]
+
+
+def probe_env_cloud_details(timeout=1):
+    # type: (float) -> Tuple[Optional[Any], bool]
+    """
+    Like get_env_cloud_details, also telling whether a provider didn't answer
+    within `timeout` seconds: None is then not a proof that the machine is on
+    premise.
+    """
+    providers = list(CLOUD_METADATA_MAPPING.keys())
+    deadline = time.monotonic() + timeout
+    results: "queue.Queue[Tuple[Optional[Dict[str, Any]], bool]]" = queue.Queue()
+
+    def probe(provider):
+        results.put(_get_provider_cloud_details(provider, timeout))
+
+    # Daemon threads: the probes still running past the deadline don't delay
+    # the exit of the interpreter
+    for provider in providers:
+        threading.Thread(
+            target=probe,
+            args=(provider,),
+            name=f"codecarbon-cloud-{provider}",
+            daemon=True,
+        ).start()
+    timed_out = False
+    for _ in providers:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None, True
         try:
-            params = CLOUD_METADATA_MAPPING[provider]
-            response = requests.get(
-                params["url"], headers=params["headers"], timeout=timeout
-            )
-            response.raise_for_status()
-            response_data = response.json()
-
-            postprocess_function = params.get("postprocess_function")
-            if postprocess_function is not None:
-                response_data = postprocess_function(response_data)
-
-            return {"provider": provider, "metadata": response_data}
-        except Exception as e:
-            logger.debug(
-                "Not running on %s, couldn't retrieve metadata: %r", provider, e
-            )
-
-    return None
+            cloud_details, probe_timed_out = results.get(timeout=remaining)
+        except queue.Empty:
+            return None, True
+        if cloud_details is not None:
+            return cloud_details, False
+        timed_out = timed_out or probe_timed_out
+    return None, timed_out
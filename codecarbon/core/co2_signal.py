@@ -1,7 +1,5 @@
 from typing import Any, Dict
 
-import requests
-
 from codecarbon.core.units import EmissionsPerKWh, Energy
 from codecarbon.external.geography import GeoMetadata
 
@@ -10,6 +8,8 @@ CO2_SIGNAL_API_TIMEOUT = 30
 
 
 def get_emissions(energy: Energy, geo: GeoMetadata, co2_signal_api_token: str = ""):
+    import requests
+
     params: Dict[str, Any]
     if geo.latitude:
         params = {"lat": geo.latitude, "lon": geo.longitude}
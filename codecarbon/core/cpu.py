@@ -7,19 +7,16 @@ import os
 import shutil
 import subprocess
 import sys
-import time
-import warnings
-from typing import Dict, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
-import pandas as pd
-
-with warnings.catch_warnings(record=True) as w:
-    from fuzzywuzzy import fuzz
-
-from codecarbon.core.rapl import RAPLFile
+from codecarbon.core.rapl import RAPLBulkReader, RAPLFile
+from codecarbon.core.units import Energy, Time
 from codecarbon.core.util import detect_cpu_model
 from codecarbon.external.logger import logger
-from codecarbon.input import DataSource
+from codecarbon.input import DataSource, _get_cached
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def is_powergadget_available():
@@ -46,6 +43,17 @@ def is_rapl_available():
         return False
 
 
+# RAPL zone name prefix -> label used in the metric names, following
+# Intel Power Gadget naming (ex: "Processor Power_0(Watt)", "DRAM Power_0(Watt)")
+RAPL_DOMAINS = {
+    "package": "Processor",
+    "core": "Core",
+    "uncore": "Uncore",
+    "dram": "DRAM",
+    "psys": "Psys",
+}
+
+
 class IntelPowerGadget:
     _osx_exec = "PowerLog"
     _osx_exec_backup = "/Applications/Intel Power Gadget/PowerLog"
@@ -132,6 +140,8 @@ class IntelPowerGadget:
         Fetches the CPU Power Details by fetching values from a logged csv file
         in _log_values function
         """
+        import pandas as pd
+
         self._log_values()
         cpu_details = dict()
         try:
@@ -153,11 +163,23 @@ class IntelPowerGadget:
 
 
 class IntelRAPL:
-    def __init__(self, rapl_dir="/sys/class/powercap/intel-rapl"):
+    def __init__(self, rapl_dir="/sys/class/powercap/intel-rapl", keep_files_open=True):
+        """
+        :rapl_dir: directory of the powercap intel-rapl zones
+        :keep_files_open: keep the energy files open for the object lifetime
+                          and read them all at once with `os.pread`,
+                          instead of opening them at each measure.
+        """
         self._lin_rapl_dir = rapl_dir
         self._system = sys.platform.lower()
         self._rapl_files = list()
+        self._reader = None
         self._setup_rapl()
+        self._cpu_details: Dict = dict()
+        if keep_files_open and hasattr(os, "pread") and self._rapl_files:
+            self._reader = RAPLBulkReader(
+                [rapl_file.path for rapl_file in self._rapl_files]
+            )
 
     def _is_platform_supported(self) -> bool:
         return self._system.startswith("lin")
@@ -175,65 +197,145 @@ class IntelRAPL:
             raise SystemError("Platform not supported by Intel RAPL Interface")
         return
 
-    def _fetch_rapl_files(self):
+    @staticmethod
+    def _list_rapl_zones(directory: str) -> List[str]:
         """
-        Fetches RAPL files from the RAPL directory
+        List the `intel-rapl:$i` (or nested `intel-rapl:$i:$j`) zones of a
+        directory, ordered by zone number.
         """
+        zones = [x for x in os.listdir(directory) if ":" in x]
+        return sorted(
+            zones,
+            key=lambda x: ([int(n) for n in x.split(":")[1:] if n.isdigit()], x),
+        )
 
-        # consider files like `intel-rapl:$i`
-        files = list(filter(lambda x: ":" in x, os.listdir(self._lin_rapl_dir)))
-
-        i = 0
-        for file in files:
-            path = os.path.join(self._lin_rapl_dir, file, "name")
-            with open(path) as f:
+    def _fetch_rapl_files(self):
+        """
+        Fetches RAPL files from the RAPL directory, including the sub-zones
+        (core, uncore, dram) nested in each package zone.
+        """
+        domain_counts: Dict[str, int] = dict()
+        # The same zone may be reachable from several paths
+        seen_files = set()
+        zones = [
+            os.path.join(self._lin_rapl_dir, zone)
+            for zone in self._list_rapl_zones(self._lin_rapl_dir)
+        ]
+        while zones:
+            zone = zones.pop(0)
+            # Sub-zones are read right after their parent zone
+            zones = [
+                os.path.join(zone, sub_zone) for sub_zone in self._list_rapl_zones(zone)
+            ] + zones
+            rapl_file = os.path.join(zone, "energy_uj")
+            real_path = os.path.realpath(rapl_file)
+            if real_path in seen_files:
+                continue
+            seen_files.add(real_path)
+
+            with open(os.path.join(zone, "name")) as f:
                 name = f.read().strip()
-                if "package" in name:
-                    name = f"Processor Energy Delta_{i}(kWh)"
-                    i += 1
-                rapl_file = os.path.join(self._lin_rapl_dir, file, "energy_uj")
-                try:
-                    # Try to read the file to be sure we can
-                    with open(rapl_file, "r") as f:
-                        _ = float(f.read())
-                    self._rapl_files.append(RAPLFile(name=name, path=rapl_file))
-                    logger.debug(f"We will read Intel RAPL files at {rapl_file}")
-                except PermissionError as e:
-                    logger.error(
-                        "Unable to read Intel RAPL files for CPU power, we will use a constant for your CPU power."
-                        + " Please view https://github.com/mlco2/codecarbon/issues/244"
-                        + f" for workarounds : {e}"
-                    )
+            domain = name.split("-")[0]
+            rapl_file_max = os.path.join(zone, "max_energy_range_uj")
+            try:
+                # Try to read the file to be sure we can
+                with open(rapl_file, "r") as f:
+                    _ = float(f.read())
+                # Numbered among the readable zones only, to keep the indexes
+                # of a domain contiguous
+                if domain in RAPL_DOMAINS:
+                    i = domain_counts.get(domain, 0)
+                    domain_counts[domain] = i + 1
+                    name = f"{RAPL_DOMAINS[domain]} Energy Delta_{i}(kWh)"
+                self._rapl_files.append(
+                    RAPLFile(name=name, path=rapl_file, max_path=rapl_file_max)
+                )
+                logger.debug(f"We will read Intel RAPL files at {rapl_file}")
+            except PermissionError as e:
+                logger.error(
+                    "Unable to read Intel RAPL files for CPU power, we will use a constant for your CPU power."
+                    + " Please view https://github.com/mlco2/codecarbon/issues/244"
+                    + f" for workarounds : {e}"
+                )
         return
 
-    def get_cpu_details(self, delay: float, **kwargs) -> Dict:
+    def has_domain(self, domain: str) -> bool:
+        """
+        Whether a RAPL zone of this domain (package, core, uncore, dram, psys)
+        is read.
+        """
+        label = RAPL_DOMAINS[domain]
+        return any(
+            rapl_file.name.startswith(f"{label} Energy Delta_")
+            for rapl_file in self._rapl_files
+        )
+
+    def _read_energies(self) -> List[Optional[Energy]]:
+        """
+        Read all the RAPL counters at once when the files are kept open,
+        otherwise let each RAPLFile read its own file.
+        """
+        if self._reader is None:
+            return [None] * len(self._rapl_files)
+        return [Energy.from_ujoules(uj) for uj in self._reader.read()]
+
+    def start(self) -> None:
+        """
+        Take a reference reading of every RAPL file
+        """
+        try:
+            for rapl_file, energy in zip(self._rapl_files, self._read_energies()):
+                rapl_file.start(energy)
+        except Exception as e:
+            logger.error(
+                f"Unable to read Intel RAPL files at {self._rapl_files}\n \
+                Exception occurred {e}",
+                exc_info=True,
+            )
+
+    def get_cpu_details(self, duration: Time, **kwargs) -> Dict:
         """
-        Fetches the CPU Energy Deltas by fetching values from RAPL files
+        Fetches the CPU Energy Deltas since the previous call by reading
+        the RAPL files, without waiting.
         """
         cpu_details = dict()
         try:
-            list(map(lambda rapl_file: rapl_file.start(), self._rapl_files))
-            time.sleep(delay)
-            list(map(lambda rapl_file: rapl_file.end(), self._rapl_files))
+            for rapl_file, energy in zip(self._rapl_files, self._read_energies()):
+                rapl_file.delta(duration, energy)
             for rapl_file in self._rapl_files:
                 cpu_details[rapl_file.name] = rapl_file.energy_delta.kWh
+                # Expose the power with the name used by Power Gadget
+                if "Energy" in rapl_file.name:
+                    cpu_details[
+                        rapl_file.name.replace("Energy Delta", "Power").replace(
+                            "(kWh)", "(Watt)"
+                        )
+                    ] = rapl_file.power.W
         except Exception as e:
             logger.info(
                 f"Unable to read Intel RAPL files at {self._rapl_files}\n \
                 Exception occurred {e}",
                 exc_info=True,
             )
+        self._cpu_details = cpu_details
         return cpu_details
 
+    def get_static_cpu_details(self) -> Dict:
+        """
+        Return the CPU details computed by the last call to get_cpu_details,
+        without reading the RAPL files again.
+        """
+        return self._cpu_details
+
 
 class TDP:
     def __init__(self):
         self.model, self.tdp = self._main()
 
     @staticmethod
-    def _get_cpu_constant_power(match: str, cpu_power_df: pd.DataFrame) -> int:
+    def _get_cpu_constant_power(match: str, cpu_power_df: "pd.DataFrame") -> int:
         """Extract constant power from matched CPU"""
-        return cpu_power_df[cpu_power_df["Name"] == match]["TDP"].values[0]
+        return int(cpu_power_df[cpu_power_df["Name"] == match]["TDP"].values[0])
 
     def _get_cpu_power_from_registry(self, cpu_model_raw: str) -> int:
         cpu_power_df = DataSource().get_cpu_power_data()
@@ -245,28 +347,12 @@ class TDP:
             return None
 
     @staticmethod
-    def _get_cpus(cpu_df, cpu_idxs) -> list:
-        return [cpu_df["Name"][idx] for idx in cpu_idxs]
-
-    @staticmethod
-    def _get_direct_matches(moodel: str, cpu_df: pd.DataFrame) -> list:
-        model_l = moodel.lower()
-        return [fuzz.ratio(model_l, cpu.lower()) for cpu in cpu_df["Name"]]
-
-    @staticmethod
-    def _get_token_set_matches(model: str, cpu_df: pd.DataFrame) -> list:
-        return [fuzz.token_set_ratio(model, cpu) for cpu in cpu_df["Name"]]
-
-    @staticmethod
-    def _get_single_direct_match(
-        ratios: list, max_ratio: int, cpu_df: pd.DataFrame
-    ) -> str:
-        idx = ratios.index(max_ratio)
-        cpu_matched = cpu_df["Name"].iloc[idx]
-        return cpu_matched
+    def _get_cpu_matcher(cpu_df: "pd.DataFrame") -> "CPUModelMatcher":
+        names = tuple(cpu_df["Name"])
+        return _get_cached(("cpu_matcher", names), lambda: CPUModelMatcher(names))
 
     def _get_matching_cpu(
-        self, model_raw: str, cpu_df: pd.DataFrame, greedy=False
+        self, model_raw: str, cpu_df: "pd.DataFrame", greedy=False
     ) -> str:
         """
         Get matching cpu name
@@ -289,43 +375,9 @@ class TDP:
             still enables the relative comparison of models emissions running
             on the same machine.
 
-            THRESHOLD_DIRECT defines the similarity ratio value to consider
-            almost-exact matches.
-
-            THRESHOLD_TOKEN_SET defines the similarity ratio value to consider
-            token_set matches (for more detail see fuzz.token_set_ratio).
+            See CPUModelMatcher for how models are matched.
         """
-        THRESHOLD_DIRECT = 100
-        THRESHOLD_TOKEN_SET = 100
-
-        ratios_direct = self._get_direct_matches(model_raw, cpu_df)
-        ratios_token_set = self._get_token_set_matches(model_raw, cpu_df)
-        max_ratio_direct = max(ratios_direct)
-        max_ratio_token_set = max(ratios_token_set)
-
-        # Check if a direct match exists
-        if max_ratio_direct >= THRESHOLD_DIRECT:
-            cpu_matched = self._get_single_direct_match(
-                ratios_direct, max_ratio_direct, cpu_df
-            )
-            return cpu_matched
-
-        # Check if an indirect match exists
-        if max_ratio_token_set < THRESHOLD_TOKEN_SET:
-            return None
-        else:
-            cpu_idxs = self._get_max_idxs(ratios_token_set, max_ratio_token_set)
-            cpu_machings = self._get_cpus(cpu_df, cpu_idxs)
-
-            if (cpu_machings and len(cpu_machings) == 1) or greedy:
-                cpu_matched = cpu_machings[0]
-                return cpu_matched
-            else:
-                return None
-
-    @staticmethod
-    def _get_max_idxs(ratios: list, max_ratio: int) -> list:
-        return [idx for idx, ratio in enumerate(ratios) if ratio == max_ratio]
+        return self._get_cpu_matcher(cpu_df).match(model_raw, greedy)
 
     def _main(self) -> Tuple[str, int]:
         """
@@ -355,3 +407,73 @@ class TDP:
                 + " Resorting to a default power consumption of 85W."
             )
         return "Unknown", None
+
+
+class CPUModelMatcher:
+    """
+    Matches a CPU model with the names of the CPUs of the TDP data, the same
+    way as comparing it to every name with fuzzywuzzy:
+        - a direct match has a fuzz.ratio of 100 with the model, ignoring case
+        - otherwise a token set match has a fuzz.token_set_ratio of 100: one
+          of the two is made of a subset of the alphanumeric tokens of the other
+
+    The names are tokenized once, in an inverted index from each token to the
+    names containing it, so only the names sharing a token with the model are
+    compared. Matches are memoized by model.
+    """
+
+    def __init__(self, names: Tuple[str, ...]):
+        from fuzzywuzzy.utils import full_process
+
+        self._full_process = full_process
+        self.names = names
+        self._lower_names: Dict[str, int] = dict()
+        self._tokens: List[frozenset] = []
+        self._index: Dict[str, List[int]] = dict()
+        for idx, name in enumerate(names):
+            self._lower_names.setdefault(name.lower(), idx)
+            tokens = self._tokenize(name)
+            self._tokens.append(tokens)
+            for token in tokens:
+                self._index.setdefault(token, []).append(idx)
+        self._matches: Dict[Tuple[str, bool], Optional[str]] = dict()
+
+    def _tokenize(self, name: str) -> frozenset:
+        # Same processing as fuzz.token_set_ratio
+        return frozenset(self._full_process(name, force_ascii=True).split())
+
+    def _get_token_set_matches(self, model: str) -> List[int]:
+        tokens = self._tokenize(model)
+        shared = dict()
+        for token in tokens:
+            for idx in self._index.get(token, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+        # With at least one token in common, the token set ratio is 100 when
+        # all the tokens of the model are in the name or the other way round
+        return sorted(
+            idx
+            for idx, count in shared.items()
+            if count == len(tokens) or count == len(self._tokens[idx])
+        )
+
+    def match(self, model_raw: str, greedy: bool = False) -> Optional[str]:
+        """
+        :return: name of the matching cpu model, None if there is no match or
+                 several ones, unless greedy where the first one is returned
+        """
+        key = (model_raw, greedy)
+        if key not in self._matches:
+            self._matches[key] = self._match(model_raw, greedy)
+        return self._matches[key]
+
+    def _match(self, model_raw: str, greedy: bool) -> Optional[str]:
+        # Check if a direct match exists
+        idx = self._lower_names.get(model_raw.lower())
+        if idx is not None and model_raw:
+            return self.names[idx]
+
+        # Check if an indirect match exists
+        cpu_idxs = self._get_token_set_matches(model_raw)
+        if (cpu_idxs and len(cpu_idxs) == 1) or (cpu_idxs and greedy):
+            return self.names[cpu_idxs[0]]
+        return None
@@ -0,0 +1,285 @@
+"""
+CSV file whose rows are updated in place, identified by the value of a key
+column, e.g. the row of a run updated at each flush of its tracker.
+
+A sidecar index file "<path>.idx" maps the keys to the position of their row,
+so that updating a row doesn't read the CSV. It is append-only, one line per
+row added or moved:
+
+    <offset> <length of the row> <size of the CSV> <key>
+
+The size of the CSV lets the trackers of other processes sharing the file
+follow the changes, and detect that it was modified by another program: the
+index is then rebuilt by reading the CSV.
+
+Each row is written with room to grow: the value of its padding column, a
+numeric column, is prefixed with spaces that the CSV readers strip (pandas,
+float()), up to ROW_PADDING bytes. Updating a row that fits in its slot is a
+single seek and write. A row that doesn't fit anymore is blanked out and added
+at the end of the file, when blanked out rows make more than half of the file,
+it is compacted.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from codecarbon.core.util import file_lock, is_same_file
+from codecarbon.external.logger import logger
+
+# Bytes of padding of a new row, for its values to grow
+ROW_PADDING = 128
+# Files smaller than this are never compacted
+COMPACT_MIN_SIZE = 64 * 1024
+
+
+def format_csv_row(values) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue().encode("utf-8")
+
+
+class IndexedCSVFile:
+    """
+    >>> csv_file = IndexedCSVFile(
+    ...     "emissions.csv", ["run_id", "emissions"], padding_column="emissions"
+    ... )
+    >>> csv_file.write("run-1", ["run-1", 0.2])
+    >>> csv_file.write("run-1", ["run-1", 0.3])
+    >>> csv_file.close()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fieldnames: List[str],
+        key: str = "run_id",
+        padding_column: Optional[str] = None,
+    ):
+        """
+        :padding_column: Numeric column, always set, padded with spaces for the
+                         rows to grow in place. Without it, a row whose length
+                         changes is moved to the end of the file.
+        """
+        self.path = path
+        self.index_path = path + ".idx"
+        self.fieldnames = list(fieldnames)
+        self._key_column = self.fieldnames.index(key)
+        self._padding_column = (
+            None if padding_column is None else self.fieldnames.index(padding_column)
+        )
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+        self._file: BinaryIO = os.fdopen(fd, "r+b")
+        self._index: Optional[BinaryIO] = None
+        self._index_position = 0
+        # Offset and length of the row of each key
+        self._slots: Dict[str, Tuple[int, int]] = dict()
+        # Size of the CSV after the last change recorded in the index
+        self._size: Optional[int] = None
+        self._header_length = 0
+        # Bytes of the slots of the rows, the rest is blank lines
+        self._used = 0
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self) -> None:
+        self._file.close()
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def write(self, key: str, values: List) -> None:
+        """
+        Update the row of `key`, or add it at the end of the file
+        """
+        with file_lock(self._file):
+            self._sync()
+            slot = self._slots.get(key)
+            if slot is not None and not self._has_key(slot, key):
+                logger.warning(f"Rebuilding the outdated index {self.index_path}")
+                self._rebuild()
+                slot = self._slots.get(key)
+
+            if slot is not None:
+                row = self._format_row(values, slot[1])
+                if len(row) <= slot[1]:
+                    self._write_at(slot[0], row + b"\n" * (slot[1] - len(row)))
+                    return
+                # Blank lines, skipped when the CSV is read
+                self._write_at(slot[0], b"\n" * slot[1])
+            self._add(key, values)
+            if (
+                self._size > COMPACT_MIN_SIZE
+                and self._size - self._header_length - self._used > self._size / 2
+            ):
+                self._compact()
+
+    def _format_row(self, values: List, length: int) -> bytes:
+        """
+        The row of `values`, padded to `length` bytes if it is shorter
+        """
+        row = format_csv_row(values)
+        if (
+            self._padding_column is None
+            or values[self._padding_column] is None
+            or len(row) >= length
+        ):
+            return row
+        values = list(values)
+        padding = " " * (length - len(row))
+        values[self._padding_column] = f"{padding}{values[self._padding_column]}"
+        return format_csv_row(values)
+
+    def _write_at(self, offset: int, content: bytes) -> None:
+        self._file.seek(offset)
+        self._file.write(content)
+        self._file.flush()
+
+    def _add(self, key: str, values: List) -> None:
+        header = b""
+        if self._size == 0:
+            header = format_csv_row(self.fieldnames)
+            self._header_length = len(header)
+        row = format_csv_row(values)
+        if self._padding_column is not None:
+            row = self._format_row(values, len(row) + ROW_PADDING)
+        offset = self._size + len(header)
+        self._write_at(self._size, header + row)
+        self._size = offset + len(row)
+        self._set_slot(key, offset, len(row))
+        self._index.write(f"{offset} {len(row)} {self._size} {key}\n".encode("utf-8"))
+        self._index.flush()
+        self._index_position = self._index.tell()
+
+    def _set_slot(self, key: str, offset: int, length: int) -> None:
+        previous = self._slots.get(key)
+        if previous is not None:
+            self._used -= previous[1]
+        self._slots[key] = (offset, length)
+        self._used += length
+
+    def _has_key(self, slot: Tuple[int, int], key: str) -> bool:
+        offset, length = slot
+        self._file.seek(offset)
+        line = self._file.read(length).split(b"\n", 1)[0]
+        row = next(csv.reader([line.decode("utf-8", errors="replace")]), [])
+        return len(row) > self._key_column and row[self._key_column] == key
+
+    def _sync(self) -> None:
+        """
+        Read the changes made to the index since the last write, by the
+        trackers of other processes
+        """
+        if self._index is None or not is_same_file(self.index_path, self._index):
+            self._load_index()
+        else:
+            self._read_index()
+        if self._size != os.fstat(self._file.fileno()).st_size:
+            self._rebuild()
+
+    def _load_index(self) -> None:
+        if self._index is not None:
+            self._index.close()
+        self._index = open(self.index_path, "a+b")
+        self._index_position = 0
+        self._slots = dict()
+        self._size = None
+        self._used = 0
+        self._read_index()
+        self._file.seek(0)
+        self._header_length = len(self._file.readline())
+
+    def _read_index(self) -> None:
+        self._index.seek(self._index_position)
+        for line in self._index:
+            if not line.endswith(b"\n"):
+                # Being written by another process
+                break
+            self._index_position += len(line)
+            offset, length, size, key = line.decode("utf-8").rstrip("\n").split(" ", 3)
+            if int(length) > 0:
+                self._set_slot(key, int(offset), int(length))
+            self._size = int(size)
+
+    def _iter_rows(self) -> Iterator[Tuple[str, int, int, bytes]]:
+        """
+        Key, offset, length (including the blank lines after it) and content
+        of the rows of the CSV
+        """
+        self._file.seek(0)
+        offset = len(self._file.readline())
+        current = None
+        for line in self._file:
+            if line.strip():
+                if current is not None:
+                    yield current
+                row = next(csv.reader([line.decode("utf-8", errors="replace")]))
+                key = row[self._key_column] if len(row) > self._key_column else ""
+                current = [key, offset, len(line), line]
+            elif current is not None:
+                current[2] += len(line)
+            offset += len(line)
+        if current is not None:
+            yield current
+
+    def _rebuild(self) -> None:
+        """
+        Index the rows of the CSV, when it was modified without the index
+        """
+        size = os.fstat(self._file.fileno()).st_size
+        if size > 0:
+            self._file.seek(size - 1)
+            if self._file.read(1) != b"\n":
+                # Rows are added after the last line
+                self._write_at(size, b"\n")
+        entries = []
+        keys = set()
+        for key, offset, length, _ in self._iter_rows():
+            if key in keys:
+                logger.warning(
+                    f"{self.path} contains more than 1 rows with the key {key},"
+                    + " only the last one is updated."
+                )
+            keys.add(key)
+            entries.append((offset, length, key))
+        self._write_index(entries, os.fstat(self._file.fileno()).st_size)
+
+    def _compact(self) -> None:
+        """
+        Remove the blanked out rows from the CSV, the rows keep their padding
+        """
+        self._file.seek(0)
+        content = [self._file.readline()]
+        entries = []
+        size = len(content[0])
+        for key, offset, _, line in list(self._iter_rows()):
+            if self._slots.get(key, (None,))[0] == offset:
+                entries.append((size, len(line), key))
+            content.append(line)
+            size += len(line)
+        self._file.seek(0)
+        self._file.write(b"".join(content))
+        self._file.truncate()
+        self._file.flush()
+        self._write_index(entries, size)
+
+    def _write_index(self, entries: List[Tuple[int, int, str]], size: int) -> None:
+        """
+        Replace the index, the trackers of other processes notice it is a new
+        file and load it
+        """
+        content = "".join(
+            f"{offset} {length} {size} {key}\n" for offset, length, key in entries
+        )
+        if not entries:
+            # Records the size of the file, without any row
+            content = f"0 0 {size} \n"
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.encode("utf-8"))
+        os.replace(tmp_path, self.index_path)
+        self._load_index()
@@ -8,13 +8,12 @@ https://github.com/responsibleproblemsolving/energy-usage
 
 from typing import Dict, Optional
 
-import pandas as pd
-
 from codecarbon.core import co2_signal
+from codecarbon.core.intensity_index import make_key
 from codecarbon.core.units import EmissionsPerKWh, Energy
 from codecarbon.external.geography import CloudMetadata, GeoMetadata
 from codecarbon.external.logger import logger
-from codecarbon.input import DataSource, DataSourceException
+from codecarbon.input import DataSource, DataSourceException, _get_cached
 
 
 class Emissions:
@@ -24,6 +23,35 @@ class Emissions:
         self._data_source = data_source
         self._co2_signal_api_token = co2_signal_api_token
 
+    def _get_precomputed_emissions_rate(
+        self, *key_parts: str
+    ) -> Optional[EmissionsPerKWh]:
+        """
+        Returns the emissions rate from the carbon intensity index,
+        None when it has to be computed from the reference data
+        """
+        index = self._data_source.get_carbon_intensity_index()
+        if index is None:
+            return None
+        carbon_intensity = index.get(make_key(*key_parts))
+        if carbon_intensity is None:
+            return None
+        return EmissionsPerKWh.from_g_per_kWh(carbon_intensity)
+
+    def _get_cloud_region_data(self, cloud: CloudMetadata) -> Dict:
+        """
+        Returns the row of the cloud emissions data for the cloud region
+        """
+        try:
+            return self._data_source.get_cloud_emissions_index()[
+                (cloud.provider, cloud.region)
+            ]
+        except KeyError:
+            raise ValueError(
+                f"Cloud Provider/Region {cloud.provider} {cloud.region}"
+                + " not found in cloud emissions data."
+            )
+
     def get_cloud_emissions(self, energy: Energy, cloud: CloudMetadata) -> float:
         """
         Computes emissions for cloud infra
@@ -31,14 +59,13 @@ class Emissions:
         :param cloud: Region of compute
         :return: CO2 emissions in kg
         """
-
-        df: pd.DataFrame = self._data_source.get_cloud_emissions_data()
-
-        emissions_per_kWh: EmissionsPerKWh = EmissionsPerKWh.from_g_per_kWh(
-            df.loc[(df["provider"] == cloud.provider) & (df["region"] == cloud.region)][
-                "impact"
-            ].item()
+        emissions_per_kWh = self._get_precomputed_emissions_rate(
+            "cloud", cloud.provider, cloud.region
         )
+        if emissions_per_kWh is None:
+            emissions_per_kWh = EmissionsPerKWh.from_g_per_kWh(
+                self._get_cloud_region_data(cloud)["impact"]
+            )
 
         return emissions_per_kWh.kgs_per_kWh * energy.kWh  # kgs
 
@@ -46,33 +73,23 @@ class Emissions:
         """
         Returns the Country Name where the cloud region is located
         """
-        df: pd.DataFrame = self._data_source.get_cloud_emissions_data()
-        return df.loc[
-            (df["provider"] == cloud.provider) & (df["region"] == cloud.region)
-        ]["countryName"].item()
+        return self._get_cloud_region_data(cloud)["countryName"]
 
     def get_cloud_country_iso_code(self, cloud: CloudMetadata) -> str:
         """
         Returns the Country ISO Code where the cloud region is located
         """
-        df: pd.DataFrame = self._data_source.get_cloud_emissions_data()
-        return df.loc[
-            (df["provider"] == cloud.provider) & (df["region"] == cloud.region)
-        ]["countryIsoCode"].item()
+        return self._get_cloud_region_data(cloud)["countryIsoCode"]
 
     def get_cloud_geo_region(self, cloud: CloudMetadata) -> str:
         """
         Returns the State/City where the cloud region is located
         """
-        df: pd.DataFrame = self._data_source.get_cloud_emissions_data()
-        state = df.loc[
-            (df["provider"] == cloud.provider) & (df["region"] == cloud.region)
-        ]["state"].item()
+        cloud_region_data = self._get_cloud_region_data(cloud)
+        state = cloud_region_data["state"]
         if state is not None:
             return state
-        city = df.loc[
-            (df["provider"] == cloud.provider) & (df["region"] == cloud.region)
-        ]["city"].item()
+        city = cloud_region_data["city"]
         return city
 
     def get_private_infra_emissions(self, energy: Energy, geo: GeoMetadata) -> float:
@@ -117,6 +134,12 @@ class Emissions:
         :param geo: Country and region metadata.
         :return: CO2 emissions in kg
         """
+        emissions_per_kWh = self._get_precomputed_emissions_rate(
+            "region", geo.country_iso_code.lower(), geo.region
+        )
+        if emissions_per_kWh is not None:
+            return emissions_per_kWh.kgs_per_kWh * energy.kWh  # kgs
+
         try:
             country_emissions_data = self._data_source.get_country_emissions_data(
                 geo.country_iso_code.lower()
@@ -154,6 +177,16 @@ class Emissions:
         :param geo: Country and region metadata
         :return: CO2 emissions in kg
         """
+        emissions_per_kWh = self._get_precomputed_emissions_rate(
+            "country", geo.country_iso_code
+        )
+        if emissions_per_kWh is not None:
+            logger.debug(
+                f"We apply an energy mix of {emissions_per_kWh.kgs_per_kWh*1000:.0f}"
+                + f" g.CO2eq/kWh for {geo.country_name}"
+            )
+            return emissions_per_kWh.kgs_per_kWh * energy.kWh  # kgs
+
         energy_mix = self._data_source.get_global_energy_mix_data()
 
         if geo.country_iso_code not in energy_mix:
@@ -172,8 +205,14 @@ class Emissions:
 
         country_energy_mix: Dict = energy_mix[geo.country_iso_code]
 
-        emissions_per_kWh = self._global_energy_mix_to_emissions_rate(
-            country_energy_mix
+        # The energy mix is constant: compute the rate of a country only once
+        emissions_per_kWh: EmissionsPerKWh = _get_cached(
+            (
+                "emissions_rate",
+                self._data_source.global_energy_mix_data_path,
+                geo.country_iso_code,
+            ),
+            lambda: self._global_energy_mix_to_emissions_rate(country_energy_mix),
         )
         logger.debug(
             f"We apply an energy mix of {emissions_per_kWh.kgs_per_kWh*1000:.0f}"
@@ -210,3 +210,82 @@ def is_gpu_details_available():
 
     except pynvml.NVMLError:
         return False
+
+
+def get_total_energy_consumption(handle):
+    """Returns the energy consumed by the GPU in millijoules since the driver was
+    last reloaded, or None if the device does not support it (Volta and newer only)
+    https://docs.nvidia.com/deploy/nvml-api/group__nvmlDeviceQueries.html#group__nvmlDeviceQueries_1g732ab899b5bd18ac4bfb93c02de4900a
+    """
+    try:
+        return pynvml.nvmlDeviceGetTotalEnergyConsumption(handle)
+    except Exception:
+        return None
+
+
+class GpuSampler:
+    """
+    Initializes NVML once and keeps the device handles, so that a measure only
+    queries what it needs: the energy counter of each device when supported,
+    its power usage otherwise.
+    >>> sampler = GpuSampler()
+    >>> sampler.start()
+    >>> sampler.get_energy_deltas()
+    [151240, 113762]
+    """
+
+    def __init__(self):
+        pynvml.nvmlInit()
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i)
+            for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+        self._static_info = None
+        self._last_energy = self._get_total_energies()
+
+    @property
+    def num_gpus(self) -> int:
+        return len(self._handles)
+
+    def get_static_info(self):
+        """Same as get_gpu_static_info(), computed once"""
+        if self._static_info is None:
+            self._static_info = []
+            for i, handle in enumerate(self._handles):
+                self._static_info.append(
+                    {
+                        "name": get_gpu_name(handle),
+                        "uuid": get_uuid(handle),
+                        "total_memory": get_memory_info(handle).total,
+                        "power_limit": get_power_limit(handle),
+                        "gpu_index": i,
+                    }
+                )
+        return self._static_info
+
+    def _get_total_energies(self):
+        return [get_total_energy_consumption(handle) for handle in self._handles]
+
+    def start(self):
+        """Take the reference reading of the energy counters"""
+        self._last_energy = self._get_total_energies()
+
+    def has_energy_counters(self):
+        """Returns whether each GPU counts its energy consumption"""
+        return [energy is not None for energy in self._last_energy]
+
+    def get_power_usages(self):
+        """Returns the power usage of each GPU in milliwatts"""
+        return [get_power_usage(handle) for handle in self._handles]
+
+    def get_energy_deltas(self):
+        """Returns the energy consumed by each GPU in millijoules since the
+        previous call, None for the devices without energy counter
+        """
+        energies = self._get_total_energies()
+        deltas = [
+            None if (last is None or current is None) else current - last
+            for last, current in zip(self._last_energy, energies)
+        ]
+        self._last_energy = energies
+        return deltas
@@ -0,0 +1,137 @@
+"""
+Precomputed carbon intensities (gCO2.eq/kWh) of the countries, regions and cloud
+regions, stored in a compact binary file that is memory-mapped at runtime.
+
+The file is generated from the JSON and CSV reference data, rebuild it after
+updating them with:
+
+    make carbon-intensity-index
+
+Layout, little-endian:
+    header: magic (4s) | version (H) | key size (H) | number of records (I)
+    records sorted by key: key (utf-8, NUL padded) | intensity (d)
+"""
+
+import mmap
+import struct
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+MAGIC = b"CCIX"
+VERSION = 1
+KEY_SIZE = 48
+HEADER = struct.Struct("<4sHHI")
+
+
+def make_key(*parts: str) -> str:
+    """
+    Key of a record, e.g. make_key("cloud", "gcp", "us-central1")
+    """
+    return "/".join(parts)
+
+
+class CarbonIntensityIndex:
+    """
+    Read-only view of a carbon intensity index file. Lookups are a binary search
+    on the memory-mapped records: the file is not parsed when opened.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, key_size, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a carbon intensity index")
+        self._record = struct.Struct(f"<{key_size}sd")
+        self._key_size = key_size
+        self._count = count
+        if len(self._mmap) != HEADER.size + count * self._record.size:
+            raise ValueError(f"{path} is truncated")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _offset(self, i: int) -> int:
+        return HEADER.size + i * self._record.size
+
+    def _key(self, i: int) -> bytes:
+        offset = self._offset(i)
+        return self._mmap[offset : offset + self._key_size].rstrip(b"\0")
+
+    def get(self, key: str) -> Optional[float]:
+        """
+        :return: the carbon intensity in gCO2.eq/kWh, None if the key is unknown
+        """
+        target = key.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == target:
+            return self._record.unpack_from(self._mmap, self._offset(low))[1]
+        return None
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        for i in range(self._count):
+            key, intensity = self._record.unpack_from(self._mmap, self._offset(i))
+            yield key.rstrip(b"\0").decode("utf-8"), intensity
+
+
+def write_carbon_intensity_index(intensities: Dict[str, float], path: str) -> None:
+    """
+    Write the carbon intensities (gCO2.eq/kWh) by key to an index file
+    """
+    record = struct.Struct(f"<{KEY_SIZE}sd")
+    encoded = sorted((key.encode("utf-8"), value) for key, value in intensities.items())
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, KEY_SIZE, len(encoded)))
+        for key, value in encoded:
+            if len(key) > KEY_SIZE:
+                raise ValueError(f"Key too long for the index: {key!r}")
+            f.write(record.pack(key, value))
+
+
+def compute_carbon_intensities(data_source) -> Dict[str, float]:
+    """
+    Carbon intensity (gCO2.eq/kWh) of every country of the global energy mix,
+    every region with emissions data and every cloud region, computed the same
+    way as Emissions does from the reference data.
+    Regions only described by their energy mix (Canada) are left out: their
+    emissions fall back to the country's.
+    """
+    # Imported here: codecarbon.core.emissions depends on the index reader
+    from codecarbon.core.emissions import Emissions
+    from codecarbon.core.units import EmissionsPerKWh
+
+    intensities = dict()
+    for (
+        country_iso_code,
+        energy_mix,
+    ) in data_source.get_global_energy_mix_data().items():
+        emissions_per_kWh = Emissions._global_energy_mix_to_emissions_rate(energy_mix)
+        intensities[make_key("country", country_iso_code)] = (
+            emissions_per_kWh.kgs_per_kWh / EmissionsPerKWh.G_KWH_TO_KG_KWH
+        )
+    for region, data in data_source.get_country_emissions_data("usa").items():
+        if region == "_unit":
+            continue
+        emissions_per_kWh = EmissionsPerKWh.from_lbs_per_mWh(data["emissions"])
+        intensities[make_key("region", "usa", region)] = (
+            emissions_per_kWh.kgs_per_kWh / EmissionsPerKWh.G_KWH_TO_KG_KWH
+        )
+    for (provider, region), row in data_source.get_cloud_emissions_index().items():
+        intensities[make_key("cloud", provider, region)] = float(row["impact"])
+    return intensities
+
+
+def main():
+    from codecarbon.input import DataSource
+
+    data_source = DataSource()
+    path = sys.argv[1] if len(sys.argv) > 1 else data_source.carbon_intensity_index_path
+    intensities = compute_carbon_intensities(data_source)
+    write_carbon_intensity_index(intensities, path)
+    print(f"Wrote {len(intensities)} carbon intensities to {path}")
@@ -0,0 +1,139 @@
+"""
+On-disk cache of what the tracker detects about the machine it runs on: CPU
+model and TDP, GPU inventory, RAM size, cloud and geographical metadata.
+
+Detecting them takes seconds (cloud metadata endpoints, geojs, cpuinfo, fuzzy
+matching of the TDP, scontrol), while they don't change until the machine
+reboots. The profile is keyed by hostname, boot id and configuration, so that
+the trackers started on the same machine with the same configuration reuse it.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional
+
+import psutil
+
+from codecarbon.external.logger import logger
+
+# Detected values older than this are detected again, in seconds
+MACHINE_PROFILE_MAX_AGE = 24 * 3600
+
+
+def get_default_cache_dir() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "codecarbon")
+
+
+def get_boot_id() -> str:
+    """
+    Identifier of the current boot of the machine
+    """
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        # Not on Linux
+        return str(int(psutil.boot_time()))
+
+
+class MachineProfile:
+    """
+    Detected values persisted in a JSON file.
+    >>> profile = MachineProfile(config={"tracking_mode": "machine"})
+    >>> profile.get_or_detect("cpu_model", detect_cpu_model)
+    'Intel(R) Xeon(R) CPU @ 2.20GHz'
+    >>> profile.save()
+    """
+
+    def __init__(
+        self,
+        config: Dict,
+        cache_dir: Optional[str] = None,
+        max_age: float = MACHINE_PROFILE_MAX_AGE,
+    ):
+        """
+        :param config: configuration of the tracker, a different configuration
+                       uses a different profile
+        :param cache_dir: directory of the profiles, defaults to
+                          $XDG_CACHE_HOME/codecarbon
+        :param max_age: age (in seconds) after which the profile is ignored
+        """
+        key = json.dumps(
+            [
+                socket.gethostname(),
+                get_boot_id(),
+                # The CPUs and memory of a SLURM job depend on its allocation
+                os.environ.get("SLURM_JOB_ID"),
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                config,
+            ],
+            sort_keys=True,
+            default=str,
+        )
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(
+            cache_dir or get_default_cache_dir(), f"machine_profile_{digest}.json"
+        )
+        self._values: Dict[str, Any] = self._load(max_age)
+        self._updated = False
+
+    def _load(self, max_age: float) -> Dict[str, Any]:
+        try:
+            if time.time() - os.path.getmtime(self.path) > max_age:
+                return dict()
+            with open(self.path) as f:
+                values = json.load(f)
+        except (OSError, ValueError):
+            return dict()
+        if not isinstance(values, dict):
+            return dict()
+        logger.debug(f"Using the machine profile {self.path}")
+        return values
+
+    def get(self, name: str) -> Any:
+        return self._values.get(name)
+
+    def set(self, name: str, value: Any) -> None:
+        """
+        Add a value to the profile, it must be serializable to JSON
+        """
+        self._values[name] = value
+        self._updated = True
+
+    def get_or_detect(self, name: str, detect: Callable[[], Any]) -> Any:
+        """
+        Returns the value from the profile, or detects it and adds it to the
+        profile. The value must be serializable to JSON.
+        """
+        if name in self._values:
+            return self._values[name]
+        value = detect()
+        self.set(name, value)
+        return value
+
+    def save(self) -> None:
+        """
+        Write the profile if values were detected since it was loaded
+        """
+        if not self._updated:
+            return
+        try:
+            content = json.dumps(self._values)
+            directory = os.path.dirname(self.path)
+            os.makedirs(directory, exist_ok=True)
+            # Written to a temporary file then renamed: concurrent trackers
+            # never read a partial profile
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                f.write(content)
+            os.replace(tmp_path, self.path)
+            self._updated = False
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not save the machine profile ({str(e)})")
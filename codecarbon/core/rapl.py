@@ -1,14 +1,33 @@
-from dataclasses import dataclass
+import os
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Optional
 
-from codecarbon.core.units import Energy
+from codecarbon.core.units import Energy, Power, Time
 
 
 @dataclass
 class RAPLFile:
+    # RAPL device being measured
     name: str
+    # Path to the energy counter file
     path: str
-    energy_reading: Energy = Energy(0)  # kWh
-    energy_delta: Energy = Energy(0)  # kWh
+    # Path to the file holding the counter's maximum value, for wraparound
+    max_path: Optional[str] = None
+    # Last counter value read, in kWh
+    energy_reading: Energy = field(default_factory=lambda: Energy(0))
+    # Energy consumed between the last two readings, in kWh
+    energy_delta: Energy = field(default_factory=lambda: Energy(0))
+    # Mean power between the last two readings, in kW
+    power: Power = field(default_factory=lambda: Power(0))
+    # Value at which the counter wraps around, in kWh
+    max_energy_reading: Optional[Energy] = None
+
+    def __post_init__(self):
+        if self.max_path is not None and os.path.exists(self.max_path):
+            with open(self.max_path, "r") as f:
+                self.max_energy_reading = Energy.from_ujoules(float(f.read()))
+        self.start()
 
     def _get_value(self) -> Energy:
         """
@@ -18,10 +37,81 @@ class RAPLFile:
             micro_joules = float(f.read())
             return Energy.from_ujoules(micro_joules)
 
-    def start(self) -> None:
-        self.energy_reading = self._get_value()
+    def start(self, energy: Optional[Energy] = None) -> None:
+        """
+        Reset the reference reading, the next delta will be computed from now.
+        :energy: counter value already read by the caller, the file is read
+                 if None.
+        """
+        self.energy_reading = self._get_value() if energy is None else energy
         return
 
-    def end(self) -> None:
-        self.energy_delta = self.energy_reading - self._get_value()
+    def delta(self, duration: Time, energy: Optional[Energy] = None) -> None:
+        """
+        Compute the energy consumed since the previous reading and
+        the corresponding mean power, then keep the new reading as reference.
+        :energy: counter value already read by the caller, the file is read
+                 if None.
+        """
+        if energy is None:
+            energy = self._get_value()
+        new_reading = energy
+        if energy.kWh < self.energy_reading.kWh:
+            # The counter went back to zero since the previous reading
+            if self.max_energy_reading is not None:
+                energy = energy + self.max_energy_reading
+            else:
+                energy = self.energy_reading
+        self.energy_delta = energy - self.energy_reading
+        if duration.seconds > 0:
+            self.power = Power.from_energies_and_delay(
+                energy, self.energy_reading, duration
+            )
+        else:
+            self.power = Power(0)
+        self.energy_reading = new_reading
         return
+
+
+class RAPLBulkReader:
+    """
+    Keeps the energy counter files of the RAPL domains open and reads all of
+    them in a single pass with `os.pread`, instead of opening, reading and
+    closing every file at each measure.
+    """
+
+    # energy_uj holds an unsigned 64 bits integer: at most 20 digits
+    _READ_SIZE = 32
+
+    def __init__(self, paths: List[str]):
+        self._fds: List[int] = list()
+        try:
+            for path in paths:
+                self._fds.append(os.open(path, os.O_RDONLY))
+        except OSError:
+            self.close()
+            raise
+        # Preallocated once, updated in place by read()
+        self.values = array("Q", bytes(8 * len(self._fds)))
+
+    def read(self) -> array:
+        """
+        Read every counter, in micro-joules, into `self.values`
+        """
+        values = self.values
+        pread = os.pread
+        size = self._READ_SIZE
+        for i, fd in enumerate(self._fds):
+            values[i] = int(pread(fd, size, 0))
+        return values
+
+    def close(self) -> None:
+        for fd in self._fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = list()
+
+    def __del__(self):
+        self.close()
@@ -21,6 +21,12 @@ class EmissionBase:
     gpu_energy: float
     ram_energy: float
     energy_consumed: float
+    gpu_power_min: Optional[float] = None
+    gpu_power_max: Optional[float] = None
+    gpu_power_p95: Optional[float] = None
+    ram_power_min: Optional[float] = None
+    ram_power_max: Optional[float] = None
+    ram_power_p95: Optional[float] = None
 
 
 class EmissionCreate(EmissionBase):
@@ -4,13 +4,18 @@ import subprocess
 from contextlib import contextmanager
 from os.path import expandvars
 from pathlib import Path
-from typing import Optional, Union
+from typing import IO, Optional, Union
 
-import cpuinfo
 import psutil
 
 from codecarbon.external.logger import logger
 
+try:
+    import fcntl
+except ImportError:
+    # Windows: files are only locked within the process
+    fcntl = None
+
 
 @contextmanager
 def suppress(*exceptions):
@@ -67,7 +72,38 @@ def backup(file_path: Union[str, Path], ext: Optional[str] = ".bak") -> None:
     file_path.rename(backup)
 
 
+@contextmanager
+def file_lock(file: IO):
+    """
+    Exclusive lock of an open file, for the trackers of other processes
+    writing to it
+    """
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def is_same_file(path: Union[str, Path], file: IO) -> bool:
+    """
+    Whether the open file is still the one at path: it was not moved, deleted
+    or replaced since it was opened.
+    """
+    try:
+        stat = os.stat(path)
+        file_stat = os.fstat(file.fileno())
+    except OSError:
+        return False
+    return (stat.st_dev, stat.st_ino) == (file_stat.st_dev, file_stat.st_ino)
+
+
 def detect_cpu_model() -> str:
+    import cpuinfo
+
     cpu_info = cpuinfo.get_cpu_info()
     if cpu_info:
         cpu_model_detected = cpu_info.get("brand_raw", "")
@@ -11,13 +11,14 @@ from abc import ABC, abstractmethod
 from collections import Counter
 from datetime import datetime
 from functools import wraps
-from typing import Callable, List, Optional, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
 
-from codecarbon.core import cpu, gpu
+from codecarbon.core import cpu
 from codecarbon.core.config import get_hierarchical_config, parse_gpu_ids
 from codecarbon.core.emissions import Emissions
+from codecarbon.core.machine_profile import MachineProfile
 from codecarbon.core.units import Energy, Power, Time
-from codecarbon.core.util import count_cpus, suppress
+from codecarbon.core.util import count_cpus, detect_cpu_model, suppress
 from codecarbon.external.geography import CloudMetadata, GeoMetadata
 from codecarbon.external.hardware import CPU, GPU, RAM
 from codecarbon.external.logger import logger, set_logger_format, set_logger_level
@@ -26,11 +27,16 @@ from codecarbon.input import DataSource
 from codecarbon.output import (
     BaseOutput,
     CodeCarbonAPIOutput,
+    ColumnarOutput,
     EmissionsData,
     FileOutput,
     HTTPOutput,
+    SQLiteOutput,
 )
 
+if TYPE_CHECKING:
+    from codecarbon.external.power_sampler import PowerStats
+
 # /!\ Warning: current implementation prevents the user from setting any value to None
 # from the script call
 # Imagine:
@@ -150,6 +156,9 @@ class BaseEmissionsTracker(ABC):
         log_level: Optional[Union[int, str]] = _sentinel,
         on_csv_write: Optional[str] = _sentinel,
         logger_preamble: Optional[str] = _sentinel,
+        power_sampling_hz: Optional[float] = _sentinel,
+        cache_machine_profile: Optional[bool] = _sentinel,
+        output_format: Optional[str] = _sentinel,
     ):
         """
         :param project_name: Project name for current experiment run, default name
@@ -189,6 +198,22 @@ class BaseEmissionsTracker(ABC):
                              Accepts one of "append" or "update".
         :param logger_preamble: String to systematically include in the logger's.
                                 messages. Defaults to "".
+        :param power_sampling_hz: Frequency (in Hz) at which the power of the GPUs
+                                  and RAM is sampled in the background between two
+                                  measures, to integrate their energy instead of
+                                  extrapolating a single reading. 0 disables the
+                                  sampling. Defaults to 0.
+        :param cache_machine_profile: Save what is detected about the machine
+                                      (CPU, TDP, GPUs, RAM, cloud and geo) on disk
+                                      and reuse it in the next trackers started
+                                      on the machine until it reboots. Defaults
+                                      to False.
+        :param output_format: "csv", "parquet", "arrow" or "sqlite". With "parquet"
+                              or "arrow", the emissions are saved in a directory
+                              named after `output_file` without extension,
+                              partitioned by project and date. With "sqlite", in
+                              a SQLite database named after `output_file` with a
+                              .db extension. Defaults to "csv".
         """
 
         # logger.info("base tracker init")
@@ -209,27 +234,50 @@ class BaseEmissionsTracker(ABC):
         self._set_from_conf(tracking_mode, "tracking_mode", "machine")
         self._set_from_conf(on_csv_write, "on_csv_write", "append")
         self._set_from_conf(logger_preamble, "logger_preamble", "")
+        self._set_from_conf(power_sampling_hz, "power_sampling_hz", 0, float)
+        self._set_from_conf(cache_machine_profile, "cache_machine_profile", False, bool)
+        self._set_from_conf(output_format, "output_format", "csv")
 
         assert self._tracking_mode in ["machine", "process"]
+        assert self._output_format in ["csv", "parquet", "arrow", "sqlite"]
+        if self._output_format in ["parquet", "arrow"] and (
+            not ColumnarOutput.is_available()
+        ):
+            logger.warning(
+                f"pyarrow is required to save emissions in {self._output_format}"
+                + " files, saving them to CSV instead. Install it with"
+                + " `pip install codecarbon[columnar]`"
+            )
+            self._output_format = "csv"
         set_logger_level(self._log_level)
         set_logger_format(self._logger_preamble)
 
+        self._machine_profile: Optional[MachineProfile] = None
+        if self._cache_machine_profile:
+            # What is detected only depends on the machine and the kind of tracker
+            self._machine_profile = MachineProfile(
+                config={"tracker": self.__class__.__name__}
+            )
+
         self._start_time: Optional[float] = None
         self._last_measured_time: float = time.time()
         self._total_energy: Energy = Energy.from_energy(kWh=0)
         self._total_cpu_energy: Energy = Energy.from_energy(kWh=0)
         self._total_gpu_energy: Energy = Energy.from_energy(kWh=0)
         self._total_ram_energy: Energy = Energy.from_energy(kWh=0)
+        self._total_rapl_domains_energy: Dict[str, Energy] = dict()
         self._cpu_power: Power = Power.from_watts(watts=0)
         self._gpu_power: Power = Power.from_watts(watts=0)
         self._ram_power: Power = Power.from_watts(watts=0)
+        self._gpu_power_stats: Optional["PowerStats"] = None
+        self._ram_power_stats: Optional["PowerStats"] = None
         self._cc_api__out = None
         self._measure_occurrence: int = 0
         self._cloud = None
         self._previous_emissions = None
         self._conf["os"] = platform.platform()
         self._conf["python_version"] = platform.python_version()
-        self._conf["cpu_count"] = count_cpus()
+        self._conf["cpu_count"] = self._detect("cpu_count", count_cpus)
         self._geo = None
 
         if isinstance(self._gpu_ids, str):
@@ -238,45 +286,70 @@ class BaseEmissionsTracker(ABC):
             self._conf["gpu_count"] = len(self._gpu_ids)
 
         logger.info("[setup] RAM Tracking...")
-        ram = RAM(tracking_mode=self._tracking_mode)
-        self._conf["ram_total_size"] = ram.machine_memory_GB
+        self._conf["ram_total_size"] = self._detect(
+            "ram_total_size",
+            lambda: RAM(tracking_mode=self._tracking_mode).machine_memory_GB,
+        )
+        ram = RAM(
+            tracking_mode=self._tracking_mode,
+            machine_memory_GB=self._conf["ram_total_size"],
+        )
         self._hardware: List[Union[RAM, CPU, GPU]] = [ram]
 
         # Hardware detection
         logger.info("[setup] GPU Tracking...")
-        if gpu.is_gpu_details_available():
+        if self._detect("gpu_available", self._is_gpu_available):
             logger.info("Tracking Nvidia GPU via pynvml")
-            self._hardware.append(GPU.from_utils(self._gpu_ids))
-            gpu_names = [n["name"] for n in gpu.get_gpu_static_info()]
+            gpu_devices = GPU.from_utils(self._gpu_ids)
+            self._hardware.append(gpu_devices)
+            gpu_static_info = gpu_devices.sampler.get_static_info()
+            gpu_names = [n["name"] for n in gpu_static_info]
             gpu_names_dict = Counter(gpu_names)
             self._conf["gpu_model"] = "".join(
                 [f"{i} x {name}" for name, i in gpu_names_dict.items()]
             )
-            self._conf["gpu_count"] = len(gpu.get_gpu_static_info())
+            self._conf["gpu_count"] = len(gpu_static_info)
         else:
             logger.info("No GPU found.")
 
         logger.info("[setup] CPU Tracking...")
         if cpu.is_powergadget_available():
             logger.info("Tracking Intel CPU via Power Gadget")
-            hardware = CPU.from_utils(self._output_dir, "intel_power_gadget")
+            hardware = CPU.from_utils(
+                self._output_dir,
+                "intel_power_gadget",
+                self._detect("cpu_model", detect_cpu_model),
+            )
             self._hardware.append(hardware)
             self._conf["cpu_model"] = hardware.get_model()
         elif cpu.is_rapl_available():
             logger.info("Tracking Intel CPU via RAPL interface")
-            hardware = CPU.from_utils(self._output_dir, "intel_rapl")
+            hardware = CPU.from_utils(
+                self._output_dir,
+                "intel_rapl",
+                self._detect("cpu_model", detect_cpu_model),
+            )
             self._hardware.append(hardware)
             self._conf["cpu_model"] = hardware.get_model()
+            if self._tracking_mode == "machine" and hardware.has_rapl_dram():
+                logger.info("Tracking RAM via RAPL DRAM domain")
+                # The DRAM energy is read along with the CPU RAPL files:
+                # the RAM has to be measured after the CPU.
+                self._hardware.remove(ram)
+                ram = RAM(
+                    tracking_mode=self._tracking_mode,
+                    intel_rapl=hardware.intel_interface,
+                    machine_memory_GB=self._conf["ram_total_size"],
+                )
+                self._hardware.append(ram)
         else:
             logger.warning(
                 "No CPU tracking mode found. Falling back on CPU constant mode."
             )
-            tdp = cpu.TDP()
-            power = tdp.tdp
-            model = tdp.model
+            model, power = self._detect("cpu_tdp", self._get_tdp)
             logger.info(f"CPU Model on constant consumption mode: {model}")
             self._conf["cpu_model"] = model
-            if tdp:
+            if power:
                 hardware = CPU.from_utils(self._output_dir, "constant", model, power)
                 self._hardware.append(hardware)
             else:
@@ -284,7 +357,7 @@ class BaseEmissionsTracker(ABC):
                     "Failed to match CPU TDP constant. "
                     + "Falling back on a global constant."
                 )
-                hardware = CPU.from_utils(self._output_dir, "constant")
+                hardware = CPU.from_utils(self._output_dir, "constant", model)
                 self._hardware.append(hardware)
 
         self._conf["hardware"] = list(map(lambda x: x.description(), self._hardware))
@@ -304,6 +377,17 @@ class BaseEmissionsTracker(ABC):
             function=self._measure_power_and_energy,
             interval=self._measure_power_secs,
         )
+        self._power_sampler = None
+        if self._power_sampling_hz and self._power_sampling_hz > 0:
+            # NumPy is only imported when the power is sampled
+            from codecarbon.external.power_sampler import PowerSampler
+
+            # Keep twice the samples of an interval, in case a measure is late
+            self._power_sampler = PowerSampler(
+                self._hardware,
+                frequency=self._power_sampling_hz,
+                window=2 * self._measure_power_secs,
+            )
 
         self._data_source = DataSource()
 
@@ -319,18 +403,40 @@ class BaseEmissionsTracker(ABC):
             self._conf["region"] = cloud.region
             self._conf["provider"] = cloud.provider
 
+        if self._machine_profile is not None:
+            self._machine_profile.save()
+
         self._emissions: Emissions = Emissions(
             self._data_source, self._co2_signal_api_token
         )
         self.persistence_objs: List[BaseOutput] = list()
 
-        if self._save_to_file:
+        if self._save_to_file and self._output_format == "csv":
             self.persistence_objs.append(
                 FileOutput(
                     os.path.join(self._output_dir, self._output_file),
                     self._on_csv_write,
                 )
             )
+        elif self._save_to_file and self._output_format == "sqlite":
+            self.persistence_objs.append(
+                SQLiteOutput(
+                    os.path.join(
+                        self._output_dir,
+                        os.path.splitext(self._output_file)[0] + ".db",
+                    ),
+                    self._on_csv_write,
+                )
+            )
+        elif self._save_to_file:
+            self.persistence_objs.append(
+                ColumnarOutput(
+                    os.path.join(
+                        self._output_dir, os.path.splitext(self._output_file)[0]
+                    ),
+                    self._output_format,
+                )
+            )
 
         if self._emissions_endpoint:
             self.persistence_objs.append(HTTPOutput(emissions_endpoint))
@@ -350,6 +456,27 @@ class BaseEmissionsTracker(ABC):
         else:
             self.run_id = uuid.uuid4()
 
+    def _detect(self, name: str, detect: Callable):
+        """
+        Run `detect`, or reuse the value it returned in a previous run
+        when the machine profile is cached.
+        """
+        if self._machine_profile is None:
+            return detect()
+        return self._machine_profile.get_or_detect(name, detect)
+
+    @staticmethod
+    def _is_gpu_available() -> bool:
+        # pynvml is only imported to look for GPUs
+        from codecarbon.core import gpu
+
+        return gpu.is_gpu_details_available()
+
+    @staticmethod
+    def _get_tdp() -> List:
+        tdp = cpu.TDP()
+        return [tdp.model, tdp.tdp]
+
     @suppress(Exception)
     def start(self) -> None:
         """
@@ -362,6 +489,10 @@ class BaseEmissionsTracker(ABC):
             return
 
         self._last_measured_time = self._start_time = time.time()
+        for hardware in self._hardware:
+            hardware.start()
+        if self._power_sampler is not None:
+            self._power_sampler.start()
         self._scheduler.start()
 
     @suppress(Exception)
@@ -384,6 +515,8 @@ class BaseEmissionsTracker(ABC):
             if isinstance(persistence, CodeCarbonAPIOutput):
                 emissions_data = self._prepare_emissions_data(delta=True)
             persistence.out(emissions_data)
+            # Visible in the buffered outputs too
+            persistence.flush()
 
         return emissions_data.emissions
 
@@ -404,6 +537,9 @@ class BaseEmissionsTracker(ABC):
         # scheduled measurement to shutdown
         self._measure_power_and_energy()
 
+        if self._power_sampler is not None:
+            self._power_sampler.stop()
+
         emissions_data = self._prepare_emissions_data()
 
         for persistence in self.persistence_objs:
@@ -411,6 +547,7 @@ class BaseEmissionsTracker(ABC):
                 emissions_data = self._prepare_emissions_data(delta=True)
 
             persistence.out(emissions_data)
+            persistence.close()
 
         self.final_emissions_data = emissions_data
         self.final_emissions = emissions_data.emissions
@@ -471,6 +608,12 @@ class BaseEmissionsTracker(ABC):
             latitude=self._conf.get("latitude"),
             ram_total_size=self._conf.get("ram_total_size"),
             tracking_mode=self._conf.get("tracking_mode"),
+            **{
+                f"rapl_{domain}_energy": energy.kWh
+                for domain, energy in self._total_rapl_domains_energy.items()
+                if domain != "package"
+            },
+            **self._get_power_stats_values(),
         )
         if delta:
             if self._previous_emissions is None:
@@ -487,6 +630,22 @@ class BaseEmissionsTracker(ABC):
         logger.debug(total_emissions)
         return total_emissions
 
+    def _get_power_stats_values(self) -> Dict[str, float]:
+        """
+        Minimum, maximum and 95th percentile of the power sampled during the
+        last measure, for the hardware sampled
+        """
+        values = dict()
+        for name, power_stats in (
+            ("gpu", self._gpu_power_stats),
+            ("ram", self._ram_power_stats),
+        ):
+            if power_stats is not None:
+                values[f"{name}_power_min"] = power_stats.min.W
+                values[f"{name}_power_max"] = power_stats.max.W
+                values[f"{name}_power_p95"] = power_stats.p95.W
+        return values
+
     @abstractmethod
     def _get_geo_metadata(self) -> GeoMetadata:
         """
@@ -507,7 +666,8 @@ class BaseEmissionsTracker(ABC):
         every `self._measure_power_secs` seconds.
         :return: None
         """
-        last_duration = time.time() - self._last_measured_time
+        measured_time = time.time()
+        last_duration = measured_time - self._last_measured_time
 
         warning_duration = self._measure_power_secs * 3
         if last_duration > warning_duration:
@@ -519,8 +679,13 @@ class BaseEmissionsTracker(ABC):
 
         for hardware in self._hardware:
             h_time = time.time()
+            power_stats = None
+            if self._power_sampler is not None:
+                power_stats = self._power_sampler.get_power_stats(
+                    hardware, self._last_measured_time, measured_time
+                )
             power, energy = hardware.measure_power_and_energy(
-                last_duration=last_duration
+                last_duration=last_duration, power_stats=power_stats
             )
             logger.info(
                 "Energy consumed for all "
@@ -533,23 +698,39 @@ class BaseEmissionsTracker(ABC):
             if isinstance(hardware, CPU):
                 self._total_cpu_energy += energy
                 self._cpu_power = power
+                for domain, domain_energy in hardware.get_rapl_domains_energy().items():
+                    self._total_rapl_domains_energy[domain] = (
+                        self._total_rapl_domains_energy.get(domain, Energy(0))
+                        + domain_energy
+                    )
             elif isinstance(hardware, GPU):
                 self._total_gpu_energy += energy
                 self._gpu_power = power
+                self._gpu_power_stats = power_stats
             elif isinstance(hardware, RAM):
                 self._total_ram_energy += energy
                 self._ram_power = power
+                self._ram_power_stats = power_stats
             else:
                 logger.error(f"Unknown hardware type: {hardware} ({type(hardware)})")
             h_time = time.time() - h_time
             logger.debug(
-                f"{hardware.__class__.__name__} : {hardware.total_power().W:,.2f} "
+                f"{hardware.__class__.__name__} : {power.W:,.2f} "
                 + f"W during {last_duration:,.2f} s [measurement time: {h_time:,.4f}]"
             )
+            if power_stats is not None:
+                logger.debug(
+                    f"{hardware.__class__.__name__} : {power_stats.samples} samples,"
+                    + f" min {power_stats.min.W:,.2f} W,"
+                    + f" max {power_stats.max.W:,.2f} W,"
+                    + f" p95 {power_stats.p95.W:,.2f} W"
+                )
         logger.info(
             f"{self._total_energy.kWh:.6f} kWh of electricity used since the begining."
         )
-        self._last_measured_time = time.time()
+        # The next interval starts where this one ended, so that the sampled
+        # power is integrated without gap
+        self._last_measured_time = measured_time
         self._measure_occurrence += 1
         if self._cc_api__out is not None and self._api_call_interval != -1:
             if self._measure_occurrence >= self._api_call_interval:
@@ -560,6 +741,10 @@ class BaseEmissionsTracker(ABC):
                 )
                 self._cc_api__out.out(emissions)
                 self._measure_occurrence = 0
+        # Rows buffered by the outputs are written after max_seconds even when
+        # no other row is added
+        for persistence in self.persistence_objs:
+            persistence.write_expired()
 
     def __enter__(self):
         self.start()
@@ -625,16 +810,11 @@ class OfflineEmissionsTracker(BaseEmissionsTracker):
                     "Cloud Region must be provided " + " if cloud provider is set"
                 )
 
-            df = DataSource().get_cloud_emissions_data()
+            cloud_emissions_index = DataSource().get_cloud_emissions_index()
             if (
-                len(
-                    df.loc[
-                        (df["provider"] == self._cloud_provider)
-                        & (df["region"] == self._cloud_region)
-                    ]
-                )
-                == 0
-            ):
+                self._cloud_provider,
+                self._cloud_region,
+            ) not in cloud_emissions_index:
                 logger.error(
                     "Cloud Provider/Region "
                     f"{self._cloud_provider} {self._cloud_region} "
@@ -681,11 +861,31 @@ class EmissionsTracker(BaseEmissionsTracker):
     """
 
     def _get_geo_metadata(self) -> GeoMetadata:
-        return GeoMetadata.from_geo_js(self._data_source.geo_js_url)
+        if self._machine_profile is not None:
+            geo = self._machine_profile.get("geo")
+            if geo is not None:
+                return GeoMetadata(**geo)
+        geo = GeoMetadata.from_geo_js(self._data_source.geo_js_url)
+        # Without coordinates, it is the default used when geojs can't be reached
+        if self._machine_profile is not None and geo.latitude is not None:
+            self._machine_profile.set("geo", vars(geo))
+        return geo
 
     def _get_cloud_metadata(self) -> CloudMetadata:
-        if self._cloud is None:
-            self._cloud = CloudMetadata.from_utils()
+        if self._cloud is not None:
+            return self._cloud
+        if self._machine_profile is not None:
+            cloud = self._machine_profile.get("cloud")
+            if cloud is not None:
+                self._cloud = CloudMetadata(**cloud)
+                return self._cloud
+        self._cloud = CloudMetadata.from_utils()
+        # On premise is also the result when a metadata endpoint timed out
+        if self._machine_profile is not None and not self._cloud.timed_out:
+            self._machine_profile.set(
+                "cloud",
+                {"provider": self._cloud.provider, "region": self._cloud.region},
+            )
         return self._cloud
 
 
@@ -710,6 +910,8 @@ def track_emissions(
     gpu_ids: Optional[List] = _sentinel,
     co2_signal_api_token: Optional[str] = _sentinel,
     log_level: Optional[Union[int, str]] = _sentinel,
+    power_sampling_hz: Optional[float] = _sentinel,
+    cache_machine_profile: Optional[bool] = _sentinel,
 ):
     """
     Decorator that supports both `EmissionsTracker` and `OfflineEmissionsTracker`
@@ -744,6 +946,11 @@ def track_emissions(
     :param log_level: Global codecarbon log level. Accepts one of:
                         {"debug", "info", "warning", "error", "critical"}.
                       Defaults to "info".
+    :param power_sampling_hz: Frequency (in Hz) at which the power of the GPUs and
+                              RAM is sampled between two measures, 0 to disable.
+                              Defaults to 0.
+    :param cache_machine_profile: Reuse what previous trackers detected about the
+                                  machine until it reboots. Defaults to False.
 
     :return: The decorated function
     """
@@ -770,6 +977,8 @@ def track_emissions(
                     gpu_ids=gpu_ids,
                     log_level=log_level,
                     co2_signal_api_token=co2_signal_api_token,
+                    power_sampling_hz=power_sampling_hz,
+                    cache_machine_profile=cache_machine_profile,
                 )
                 tracker.start()
                 fn_result = fn(*args, **kwargs)
@@ -790,6 +999,8 @@ def track_emissions(
                     api_endpoint=api_endpoint,
                     save_to_api=save_to_api,
                     co2_signal_api_token=co2_signal_api_token,
+                    power_sampling_hz=power_sampling_hz,
+                    cache_machine_profile=cache_machine_profile,
                 )
                 tracker.start()
                 try:
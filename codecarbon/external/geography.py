@@ -3,12 +3,10 @@ Encapsulates external dependencies to retrieve cloud and geographical metadata
 """
 
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Callable, Dict, Optional
 
-import requests
-
-from codecarbon.core.cloud import get_env_cloud_details
+from codecarbon.core.cloud import probe_env_cloud_details
 from codecarbon.external.logger import logger
 
 
@@ -17,6 +15,8 @@ class CloudMetadata:
 
     provider: Optional[str]
     region: Optional[str]
+    # A metadata endpoint didn't answer in time, on premise may be wrong
+    timed_out: bool = field(default=False, compare=False)
 
     @property
     def is_on_private_infra(self) -> bool:
@@ -37,10 +37,10 @@ class CloudMetadata:
             "gcp": lambda x: extract_gcp_region(x["metadata"]["zone"]),
         }
 
-        cloud_metadata: Dict = get_env_cloud_details()
+        cloud_metadata, timed_out = probe_env_cloud_details()
 
         if cloud_metadata is None:
-            return cls(provider=None, region=None)
+            return cls(provider=None, region=None, timed_out=timed_out)
 
         provider: str = cloud_metadata["provider"].lower()
         region: str = extract_region_for_provider.get(provider)(cloud_metadata)
@@ -79,6 +79,8 @@ class GeoMetadata:
 
     @classmethod
     def from_geo_js(cls, url: str) -> "GeoMetadata":
+        import requests
+
         try:
             response: Dict = requests.get(url, timeout=0.5).json()
         except requests.exceptions.Timeout:
@@ -7,16 +7,19 @@ import re
 import subprocess
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
 import psutil
 
-from codecarbon.core.cpu import IntelPowerGadget, IntelRAPL
-from codecarbon.core.gpu import get_gpu_details
+from codecarbon.core.cpu import RAPL_DOMAINS, IntelPowerGadget, IntelRAPL
 from codecarbon.core.units import Energy, Power, Time
 from codecarbon.core.util import detect_cpu_model
 from codecarbon.external.logger import logger
 
+if TYPE_CHECKING:
+    from codecarbon.core.gpu import GpuSampler
+    from codecarbon.external.power_sampler import PowerStats
+
 # default W value for a CPU if no model is found in the ref csv
 POWER_CONSTANT = 85
 
@@ -33,11 +36,30 @@ class BaseHardware(ABC):
     def description(self) -> str:
         return repr(self)
 
-    def measure_power_and_energy(self, last_duration: float) -> Tuple[Power, Energy]:
+    def start(self) -> None:
+        """
+        Called when the tracker starts, to take reference measurements.
+        """
+        pass
+
+    def sample_power(self) -> Optional[Power]:
+        """
+        Instantaneous power read by the high frequency PowerSampler,
+        None when the hardware is not worth sampling.
+        """
+        return None
+
+    def measure_power_and_energy(
+        self, last_duration: float, power_stats: Optional["PowerStats"] = None
+    ) -> Tuple[Power, Energy]:
         """
         Base implementation: we get the power from the
         hardware and convert it to energy.
+        When the power was sampled during the interval, use the energy
+        integrated from the samples instead.
         """
+        if power_stats is not None:
+            return power_stats.mean, power_stats.energy
         power = self.total_power()
         energy = Energy.from_power_and_time(
             power=power, time=Time.from_seconds(last_duration)
@@ -49,44 +71,90 @@ class BaseHardware(ABC):
 class GPU(BaseHardware):
     num_gpus: int
     gpu_ids: Optional[List]
+    sampler: Optional["GpuSampler"] = None
 
     def __repr__(self) -> str:
+        if self.sampler is None:
+            return super().__repr__() + f" ({len(self._get_gpu_ids())} GPUs)"
         return super().__repr__() + " ({})".format(
-            ", ".join([d["name"] for d in get_gpu_details()])
+            ", ".join([d["name"] for d in self.sampler.get_static_info()])
         )
 
+    def _get_gpu_ids(self) -> Iterable[int]:
+        if self.gpu_ids is not None:
+            gpu_ids = self.gpu_ids
+            assert set(gpu_ids).issubset(
+                set(range(self.num_gpus))
+            ), f"Unknown GPU ids {gpu_ids}"
+        else:
+            gpu_ids = set(range(self.num_gpus))
+        return gpu_ids
+
     def _get_power_for_gpus(self, gpu_ids: Iterable[int]) -> Power:
         """
         Get total power consumed by specific GPUs identified by `gpu_ids`
         :param gpu_ids:
         :return: power in kW
         """
-        all_gpu_details: List[Dict] = get_gpu_details()
         return Power.from_milli_watts(
             sum(
                 [
-                    gpu_details["power_usage"]
-                    for idx, gpu_details in enumerate(all_gpu_details)
+                    power_usage
+                    for idx, power_usage in enumerate(self.sampler.get_power_usages())
                     if idx in gpu_ids
                 ]
             )
         )
 
     def total_power(self) -> Power:
-        if self.gpu_ids is not None:
-            gpu_ids = self.gpu_ids
-            assert set(gpu_ids).issubset(
-                set(range(self.num_gpus))
-            ), f"Unknown GPU ids {gpu_ids}"
-        else:
-            gpu_ids = set(range(self.num_gpus))
-
-        gpu_power = self._get_power_for_gpus(gpu_ids=gpu_ids)
+        gpu_power = self._get_power_for_gpus(gpu_ids=self._get_gpu_ids())
         return gpu_power
 
+    def sample_power(self) -> Optional[Power]:
+        gpu_ids = self._get_gpu_ids()
+        if all(
+            has_counter
+            for idx, has_counter in enumerate(self.sampler.has_energy_counters())
+            if idx in gpu_ids
+        ):
+            # Their energy counters already cover the whole interval
+            return None
+        return self.total_power()
+
+    def measure_power_and_energy(
+        self, last_duration: float, power_stats: Optional["PowerStats"] = None
+    ) -> Tuple[Power, Energy]:
+        """
+        Use the energy counted by the driver since the previous measure when all
+        the tracked GPUs support it, the sampled or current power usage otherwise.
+        """
+        gpu_ids = self._get_gpu_ids()
+        energy_deltas = [
+            delta
+            for idx, delta in enumerate(self.sampler.get_energy_deltas())
+            if idx in gpu_ids
+        ]
+        if None in energy_deltas or last_duration <= 0:
+            return super().measure_power_and_energy(
+                last_duration=last_duration, power_stats=power_stats
+            )
+        # millijoules to microjoules
+        energy = Energy.from_ujoules(sum(energy_deltas) * 1000)
+        power = Power.from_energy_delta_and_delay(
+            energy, Time.from_seconds(last_duration)
+        )
+        return power, energy
+
+    def start(self) -> None:
+        self.sampler.start()
+
     @classmethod
     def from_utils(cls, gpu_ids: Optional[List] = None) -> "GPU":
-        return cls(num_gpus=len(get_gpu_details()), gpu_ids=gpu_ids)
+        # pynvml is only imported once a GPU is tracked
+        from codecarbon.core.gpu import GpuSampler
+
+        sampler = GpuSampler()
+        return cls(num_gpus=sampler.num_gpus, gpu_ids=gpu_ids, sampler=sampler)
 
 
 @dataclass
@@ -99,10 +167,14 @@ class CPU(BaseHardware):
         self._model = model
         self._tdp = tdp
         self._is_generic_tdp = False
+        self._rapl_domains_energy: Dict[str, Energy] = dict()
         if self._mode == "intel_power_gadget":
             self._intel_interface = IntelPowerGadget(self._output_dir)
         elif self._mode == "intel_rapl":
-            self._intel_interface = IntelRAPL(rapl_dir=rapl_dir)
+            if rapl_dir is None:
+                self._intel_interface = IntelRAPL()
+            else:
+                self._intel_interface = IntelRAPL(rapl_dir=rapl_dir)
 
     def __repr__(self) -> str:
         if self._mode != "constant":
@@ -126,7 +198,11 @@ class CPU(BaseHardware):
             power = self._tdp * CONSUMPTION_PERCENTAGE_CONSTANT
             return Power.from_watts(power)
 
-        all_cpu_details: Dict = self._intel_interface.get_cpu_details()
+        if self._mode == "intel_rapl":
+            # Reading the RAPL files again would consume the energy delta
+            all_cpu_details: Dict = self._intel_interface.get_static_cpu_details()
+        else:
+            all_cpu_details: Dict = self._intel_interface.get_cpu_details()
 
         power = 0
         for metric, value in all_cpu_details.items():
@@ -134,31 +210,61 @@ class CPU(BaseHardware):
                 power += value
         return Power.from_watts(power)
 
-    def _get_energy_from_cpus(self, delay: float) -> Energy:
+    def _get_energy_from_cpus(self, duration: Time) -> Energy:
         """
         Get CPU energy deltas from RAPL files
         :return: energy in kWh
         """
-        all_cpu_details: Dict = self._intel_interface.get_cpu_details(delay=delay)
+        all_cpu_details: Dict = self._intel_interface.get_cpu_details(duration=duration)
+
+        self._rapl_domains_energy = dict()
+        for domain, label in RAPL_DOMAINS.items():
+            domain_energy = [
+                value
+                for metric, value in all_cpu_details.items()
+                if re.match(rf"^{label} Energy Delta_\d+\(kWh\)$", metric)
+            ]
+            if domain_energy:
+                self._rapl_domains_energy[domain] = Energy.from_energy(
+                    sum(domain_energy)
+                )
+        return self._rapl_domains_energy.get("package", Energy.from_energy(0))
+
+    def get_rapl_domains_energy(self) -> Dict[str, Energy]:
+        """
+        Energy consumed during the last measure by each RAPL domain
+        (package, core, uncore, dram, psys), summed over the sockets.
+        Empty when the CPU is not tracked with RAPL.
+        """
+        return self._rapl_domains_energy
 
-        energy = 0
-        for metric, value in all_cpu_details.items():
-            if re.match(r"^Processor Energy Delta_\d+\(Watt\)$", metric):
-                energy += value
-        return Energy.from_energy(energy)
+    def has_rapl_dram(self) -> bool:
+        return self._mode == "intel_rapl" and self._intel_interface.has_domain("dram")
+
+    @property
+    def intel_interface(self):
+        return self._intel_interface
 
     def total_power(self) -> Power:
         cpu_power = self._get_power_from_cpus()
         return cpu_power
 
-    def measure_power_and_energy(self, last_duration: float) -> Tuple[Power, Energy]:
+    def measure_power_and_energy(
+        self, last_duration: float, power_stats: Optional["PowerStats"] = None
+    ) -> Tuple[Power, Energy]:
         if self._mode == "intel_rapl":
-            energy = self._get_energy_from_cpus(delay=last_duration)
-            power = Power.from_energy_delta_and_delay(
-                energy, Time.from_seconds(last_duration)
+            energy = self._get_energy_from_cpus(
+                duration=Time.from_seconds(last_duration)
             )
+            power = self.total_power()
             return power, energy
-        return super().measure_power_and_energy(last_duration=last_duration)
+        return super().measure_power_and_energy(
+            last_duration=last_duration, power_stats=power_stats
+        )
+
+    def start(self) -> None:
+        if self._mode == "intel_rapl":
+            self._intel_interface.start()
 
     def get_model(self):
         return self._model
@@ -198,6 +304,8 @@ class RAM(BaseHardware):
         pid: int = psutil.Process().pid,
         children: bool = True,
         tracking_mode: str = "machine",
+        intel_rapl: Optional[IntelRAPL] = None,
+        machine_memory_GB: Optional[float] = None,
     ):
         """
         Instantiate a RAM object from a reference pid. If none is provided, will use the
@@ -209,10 +317,19 @@ class RAM(BaseHardware):
                                  children). Defaults to psutil.Process().pid.
             children (int, optional): Look for children of the process when computing
                                       total RAM used. Defaults to True.
+            intel_rapl (IntelRAPL, optional): RAPL interface with a dram domain,
+                                      read by the CPU. When provided, the DRAM
+                                      energy it measured is used instead of the
+                                      `power_per_GB` estimation. Defaults to None.
+            machine_memory_GB (float, optional): RAM of the machine, when already
+                                      known. Detected when first needed
+                                      otherwise. Defaults to None.
         """
         self._pid = pid
         self._children = children
         self._tracking_mode = tracking_mode
+        self._intel_rapl = intel_rapl
+        self._machine_memory_GB: Optional[float] = machine_memory_GB
 
     def _get_children_memories(self):
         """
@@ -292,10 +409,41 @@ class RAM(BaseHardware):
 
     @property
     def machine_memory_GB(self):
-        return (
-            self.slurm_memory_GB
-            if os.environ.get("SLURM_JOB_ID")
-            else psutil.virtual_memory().total / 1e9
+        # Doesn't change while the process runs, and scontrol is slow
+        if self._machine_memory_GB is None:
+            self._machine_memory_GB = (
+                self.slurm_memory_GB
+                if os.environ.get("SLURM_JOB_ID")
+                else psutil.virtual_memory().total / 1e9
+            )
+        return self._machine_memory_GB
+
+    def _get_rapl_dram_details(self, metric_type: str) -> float:
+        """
+        Sum the DRAM metric of all the sockets from the last RAPL measure
+        """
+        all_details: Dict = self._intel_rapl.get_static_cpu_details()
+        return sum(
+            value
+            for metric, value in all_details.items()
+            if re.match(rf"^DRAM {metric_type}_\d+\(", metric)
+        )
+
+    def sample_power(self) -> Optional[Power]:
+        if self._intel_rapl is not None:
+            # The DRAM energy counter already covers the whole interval
+            return None
+        return self.total_power()
+
+    def measure_power_and_energy(
+        self, last_duration: float, power_stats: Optional["PowerStats"] = None
+    ) -> Tuple[Power, Energy]:
+        if self._intel_rapl is not None:
+            return self.total_power(), Energy.from_energy(
+                self._get_rapl_dram_details("Energy Delta")
+            )
+        return super().measure_power_and_energy(
+            last_duration=last_duration, power_stats=power_stats
         )
 
     def total_power(self) -> Power:
@@ -306,6 +454,8 @@ class RAM(BaseHardware):
         Returns:
             Power: kW of power consumption, using self.power_per_GB W/GB
         """
+        if self._intel_rapl is not None:
+            return Power.from_watts(self._get_rapl_dram_details("Power"))
         try:
             memory_GB = (
                 self.machine_memory_GB
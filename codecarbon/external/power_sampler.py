@@ -0,0 +1,178 @@
+"""
+High frequency sampling of the hardware power, between two measures of the
+tracker's scheduler.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from threading import Event, Lock, Thread
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from codecarbon.core.units import Energy, Power
+from codecarbon.external.logger import logger
+
+
+@dataclass
+class PowerStats:
+    """
+    Power sampled during a measure interval and the energy integrated from it
+    """
+
+    energy: Energy
+    mean: Power
+    min: Power
+    max: Power
+    p95: Power
+    samples: int
+
+
+class PowerRingBuffer:
+    """
+    Fixed size buffer of (timestamp, power in W) samples. The arrays are
+    allocated once, appending a sample overwrites the oldest one when the
+    buffer is full.
+    """
+
+    def __init__(self, size: int):
+        assert size > 1, "The buffer must hold at least two samples"
+        self._times = np.zeros(size, dtype=np.float64)
+        self._powers = np.zeros(size, dtype=np.float64)
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, watts: float) -> None:
+        i = self._next
+        self._times[i] = timestamp
+        self._powers[i] = watts
+        self._next = (i + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+    def samples(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Copy of the samples in the buffer, oldest first
+        """
+        if self._count < self._size:
+            return self._times[: self._count].copy(), self._powers[: self._count].copy()
+        order = np.r_[self._next : self._size, 0 : self._next]
+        return self._times[order], self._powers[order]
+
+    def power_stats(self, start: float, end: float) -> Optional[PowerStats]:
+        """
+        Integrate the power between `start` and `end` (seconds since epoch) with
+        the trapezoidal rule. The power at the bounds of the interval is
+        interpolated from the neighbouring samples.
+        :return: None if there is no sample in the buffer
+        """
+        if self._count == 0 or end <= start:
+            return None
+        times, powers = self.samples()
+        inside = (times > start) & (times < end)
+        window_times = np.concatenate(([start], times[inside], [end]))
+        window_powers = np.interp(window_times, times, powers)
+        joules = float(
+            np.sum((window_powers[1:] + window_powers[:-1]) * np.diff(window_times) / 2)
+        )
+        sampled = powers[inside] if inside.any() else window_powers
+        return PowerStats(
+            energy=Energy.from_ujoules(joules * 1e6),
+            mean=Power.from_watts(joules / (end - start)),
+            min=Power.from_watts(float(sampled.min())),
+            max=Power.from_watts(float(sampled.max())),
+            p95=Power.from_watts(float(np.percentile(sampled, 95))),
+            samples=int(inside.sum()),
+        )
+
+
+class PowerSampler:
+    """
+    Background thread reading the instantaneous power of the hardware at
+    `frequency` Hz into a ring buffer per hardware. Only the hardware whose
+    `sample_power()` returns a value is sampled.
+    >>> sampler = PowerSampler(hardware, frequency=50, window=30)
+    >>> sampler.start()
+    >>> sampler.get_power_stats(gpu, start, time.time())
+    PowerStats(energy=..., mean=..., min=..., max=..., p95=..., samples=750)
+    """
+
+    def __init__(self, hardware: Iterable, frequency: float, window: float):
+        """
+        :param hardware: the tracked hardware
+        :param frequency: number of samples per second
+        :param window: duration (in seconds) of the samples kept in the buffers,
+                       must cover the interval between two measures
+        """
+        assert frequency > 0
+        self._interval = 1 / frequency
+        size = max(2, math.ceil(frequency * window) + 1)
+        self._buffers: Dict[int, Tuple[object, PowerRingBuffer]] = dict()
+        for h in hardware:
+            if h.sample_power() is not None:
+                self._buffers[id(h)] = (h, PowerRingBuffer(size))
+        self._lock = Lock()
+        self._stop_event = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def sampled_hardware(self):
+        return [h for h, _ in self._buffers.values()]
+
+    def _sample(self) -> None:
+        timestamp = time.time()
+        for key, (hardware, buffer) in list(self._buffers.items()):
+            try:
+                power = hardware.sample_power()
+            except Exception as e:
+                logger.warning(
+                    f"Stop sampling the power of {hardware.__class__.__name__}"
+                    + f" ({str(e)})"
+                )
+                with self._lock:
+                    del self._buffers[key]
+                continue
+            if power is None:
+                continue
+            with self._lock:
+                buffer.append(timestamp, power.W)
+
+    def _run(self) -> None:
+        next_time = time.time()
+        while True:
+            self._sample()
+            next_time += self._interval
+            if self._stop_event.wait(max(0.0, next_time - time.time())):
+                return
+
+    def start(self) -> None:
+        if self._thread is not None or not self._buffers:
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="codecarbon-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def get_power_stats(
+        self, hardware, start: float, end: float
+    ) -> Optional[PowerStats]:
+        """
+        Statistics of the power sampled for `hardware` between `start` and `end`
+        :return: None if the hardware is not sampled or has no sample yet
+        """
+        with self._lock:
+            if id(hardware) not in self._buffers:
+                return None
+            _, buffer = self._buffers[id(hardware)]
+            return buffer.power_stats(start, end)
@@ -3,10 +3,53 @@ App configuration: This will likely change when we have a common location for da
 """
 
 import json
-from typing import Dict
+import os
+import sys
+from threading import RLock
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Tuple
 
-import pandas as pd
-import pkg_resources
+from codecarbon.core.intensity_index import CarbonIntensityIndex
+from codecarbon.external.logger import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Parsed reference data, shared by all the DataSource instances of the process.
+# The files shipped with the package don't change while it runs, so each one
+# is read at most once. Values are shared: callers must not modify them.
+_reference_data_cache: Dict[Hashable, Any] = dict()
+_reference_data_lock = RLock()
+
+
+def _get_cached(key: Hashable, load: Callable[[], Any]) -> Any:
+    try:
+        return _reference_data_cache[key]
+    except KeyError:
+        pass
+    with _reference_data_lock:
+        if key not in _reference_data_cache:
+            _reference_data_cache[key] = load()
+        return _reference_data_cache[key]
+
+
+def clear_reference_data_cache() -> None:
+    """
+    Forget the reference data read so far, the next lookups read the files again
+    """
+    with _reference_data_lock:
+        _reference_data_cache.clear()
+
+
+def _read_json(path: str) -> Dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _read_csv(path: str) -> "pd.DataFrame":
+    # pandas is slow to import, only load it when a CSV file is read
+    import pandas as pd
+
+    return pd.read_csv(path)
 
 
 class DataSource:
@@ -18,6 +61,7 @@ class DataSource:
             "can_energy_mix_data_path": "data/private_infra/2016/canada_energy_mix.json",  # noqa: E501
             "global_energy_mix_data_path": "data/private_infra/global_energy_mix.json",  # noqa: E501
             "carbon_intensity_per_source_path": "data/private_infra/carbon_intensity_per_source.json",
+            "carbon_intensity_index_path": "data/private_infra/carbon_intensity_index.bin",  # noqa: E501
             "cpu_power_path": "data/hardware/cpu_power.csv",
         }
         self.module_name = "codecarbon"
@@ -26,60 +70,69 @@ class DataSource:
     def geo_js_url(self):
         return self.config["geo_js_url"]
 
-    @property
-    def cloud_emissions_path(self):
+    def _resource_filename(self, resource_name: str) -> str:
         """
-        Resource Extraction from a package
-        https://setuptools.readthedocs.io/en/latest/pkg_resources.html#resource-extraction
+        Path of a data file of the package, like pkg_resources.resource_filename
+        but without importing pkg_resources, which is slow.
         """
-        return pkg_resources.resource_filename(
-            self.module_name, self.config["cloud_emissions_path"]
-        )
+        module_dir = os.path.dirname(sys.modules[self.module_name].__file__)
+        return os.path.join(module_dir, *resource_name.split("/"))
+
+    @property
+    def cloud_emissions_path(self):
+        return self._resource_filename(self.config["cloud_emissions_path"])
 
     @property
     def carbon_intensity_per_source_path(self):
         """
         Get the path from the package resources.
         """
-        return pkg_resources.resource_filename(
-            self.module_name, self.config["carbon_intensity_per_source_path"]
-        )
+        return self._resource_filename(self.config["carbon_intensity_per_source_path"])
+
+    @property
+    def carbon_intensity_index_path(self):
+        return self._resource_filename(self.config["carbon_intensity_index_path"])
 
     def country_emissions_data_path(self, country: str):
-        return pkg_resources.resource_filename(
-            self.module_name, self.config[f"{country}_emissions_data_path"]
-        )
+        return self._resource_filename(self.config[f"{country}_emissions_data_path"])
 
     def country_energy_mix_data_path(self, country: str):
-        return pkg_resources.resource_filename(
-            self.module_name, self.config[f"{country}_energy_mix_data_path"]
-        )
+        return self._resource_filename(self.config[f"{country}_energy_mix_data_path"])
 
     @property
     def global_energy_mix_data_path(self):
-        return pkg_resources.resource_filename(
-            self.module_name, self.config["global_energy_mix_data_path"]
-        )
+        return self._resource_filename(self.config["global_energy_mix_data_path"])
 
     @property
     def cpu_power_path(self):
-        return pkg_resources.resource_filename(
-            self.module_name, self.config["cpu_power_path"]
-        )
+        return self._resource_filename(self.config["cpu_power_path"])
 
     def get_global_energy_mix_data(self) -> Dict:
         """
         Returns Global Energy Mix Data
         """
-        with open(self.global_energy_mix_data_path) as f:
-            global_energy_mix: Dict = json.load(f)
-        return global_energy_mix
+        path = self.global_energy_mix_data_path
+        return _get_cached(("json", path), lambda: _read_json(path))
 
-    def get_cloud_emissions_data(self) -> pd.DataFrame:
+    def get_cloud_emissions_data(self) -> "pd.DataFrame":
         """
         Returns Cloud Regions Impact Data
         """
-        return pd.read_csv(self.cloud_emissions_path)
+        path = self.cloud_emissions_path
+        return _get_cached(("csv", path), lambda: _read_csv(path))
+
+    def get_cloud_emissions_index(self) -> Dict[Tuple[str, str], Dict]:
+        """
+        Returns Cloud Regions Impact Data indexed by (provider, region)
+        """
+
+        def build_index() -> Dict[Tuple[str, str], Dict]:
+            return {
+                (row["provider"], row["region"]): row
+                for row in self.get_cloud_emissions_data().to_dict("records")
+            }
+
+        return _get_cached(("cloud_index", self.cloud_emissions_path), build_index)
 
     def get_country_emissions_data(self, country_iso_code: str) -> Dict:
         """
@@ -88,9 +141,8 @@ class DataSource:
         :return: emissions in lbs/MWh and region code
         """
         try:
-            with open(self.country_emissions_data_path(country_iso_code)) as f:
-                country_emissions_data: Dict = json.load(f)
-            return country_emissions_data
+            path = self.country_emissions_data_path(country_iso_code)
+            return _get_cached(("json", path), lambda: _read_json(path))
         except KeyError:
             # KeyError raised from line 39, when there is no data path specified for
             # the given country
@@ -102,23 +154,38 @@ class DataSource:
         :param country_iso_code: ISO code similar to one used in file names
         :return: energy mix by region code
         """
-        with open(self.country_energy_mix_data_path(country_iso_code)) as f:
-            country_energy_mix_data: Dict = json.load(f)
-        return country_energy_mix_data
+        path = self.country_energy_mix_data_path(country_iso_code)
+        return _get_cached(("json", path), lambda: _read_json(path))
 
     def get_carbon_intensity_per_source_data(self) -> Dict:
         """
         Returns Carbon intensity per source. In gCO2.eq/kWh.
         """
-        with open(self.carbon_intensity_per_source_path) as f:
-            carbon_intensity_per_source: Dict = json.load(f)
-        return carbon_intensity_per_source
+        path = self.carbon_intensity_per_source_path
+        return _get_cached(("json", path), lambda: _read_json(path))
+
+    def get_carbon_intensity_index(self) -> Optional[CarbonIntensityIndex]:
+        """
+        Returns the precomputed carbon intensities, None if the index file
+        can't be read: the intensities are then computed from the JSON and CSV data
+        """
+        path = self.carbon_intensity_index_path
+
+        def open_index() -> Optional[CarbonIntensityIndex]:
+            try:
+                return CarbonIntensityIndex(path)
+            except (OSError, ValueError) as e:
+                logger.debug(f"Carbon intensity index not available ({str(e)})")
+                return None
+
+        return _get_cached(("index", path), open_index)
 
-    def get_cpu_power_data(self) -> pd.DataFrame:
+    def get_cpu_power_data(self) -> "pd.DataFrame":
         """
         Returns CPU power Data
         """
-        return pd.read_csv(self.cpu_power_path)
+        path = self.cpu_power_path
+        return _get_cached(("csv", path), lambda: _read_csv(path))
 
 
 class DataSourceException(Exception):
@@ -5,19 +5,27 @@ Provides functionality for persistence of data
 import csv
 import dataclasses
 import getpass
+import importlib.util
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+from urllib.parse import quote
 
-import pandas as pd
-import requests
-
-# from core.schema import EmissionCreate, Emission
-from codecarbon.core.api_client import ApiClient
-from codecarbon.core.util import backup
+from codecarbon.core.csv_index import IndexedCSVFile
+from codecarbon.core.util import backup, file_lock, is_same_file
 from codecarbon.external.logger import logger
 
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
 
 @dataclass
 class EmissionsData:
@@ -54,6 +62,19 @@ class EmissionsData:
     ram_total_size: float
     tracking_mode: str
     on_cloud: str = "N"
+    # Energy measured by each RAPL domain, when available (kWh)
+    rapl_core_energy: Optional[float] = None
+    rapl_uncore_energy: Optional[float] = None
+    rapl_dram_energy: Optional[float] = None
+    rapl_psys_energy: Optional[float] = None
+    # Power sampled by the PowerSampler during the last measure, when sampled:
+    # the mean is gpu_power and ram_power (W)
+    gpu_power_min: Optional[float] = None
+    gpu_power_max: Optional[float] = None
+    gpu_power_p95: Optional[float] = None
+    ram_power_min: Optional[float] = None
+    ram_power_max: Optional[float] = None
+    ram_power_p95: Optional[float] = None
 
     @property
     def values(self) -> OrderedDict:
@@ -86,6 +107,26 @@ class BaseOutput(ABC):
     def out(self, data: EmissionsData):
         pass
 
+    def close(self) -> None:
+        """
+        Called when the tracker stops, to write what is buffered and release
+        the files or connections. The output may be used again afterwards.
+        """
+        pass
+
+    def flush(self) -> None:
+        """
+        Called when the tracker is flushed, to write what is buffered
+        """
+        pass
+
+    def write_expired(self) -> None:
+        """
+        Called at each measure of the tracker, to write what is buffered for
+        too long
+        """
+        pass
+
 
 class FileOutput(BaseOutput):
     """
@@ -93,6 +134,9 @@ class FileOutput(BaseOutput):
     """
 
     def __init__(self, save_file_path: str, on_csv_write: str = "append"):
+        # Kept open between two writes
+        self._file: Optional[Union[IO, IndexedCSVFile]] = None
+        self._lock = threading.Lock()
         if on_csv_write not in {"append", "update"}:
             raise ValueError(
                 f"Unknown `on_csv_write` value: {on_csv_write}"
@@ -101,44 +145,440 @@ class FileOutput(BaseOutput):
         self.on_csv_write: str = on_csv_write
         self.save_file_path: str = save_file_path
 
+    def _read_header(self) -> Optional[List[str]]:
+        with open(self.save_file_path, newline="") as csv_file:
+            return next(csv.reader(csv_file), None)
+
     def has_valid_headers(self, data: EmissionsData):
-        with open(self.save_file_path) as csv_file:
-            csv_reader = csv.DictReader(csv_file)
-            dict_from_csv = dict(list(csv_reader)[0])
-            list_of_column_names = list(dict_from_csv.keys())
-            return list(data.values.keys()) == list_of_column_names
+        return list(data.values.keys()) == self._read_header()
 
-    def out(self, data: EmissionsData):
-        file_exists: bool = os.path.isfile(self.save_file_path)
-        if file_exists and not self.has_valid_headers(data):
+    def _backup_if_invalid_headers(self, data: EmissionsData) -> None:
+        if (
+            not os.path.isfile(self.save_file_path)
+            or os.path.getsize(self.save_file_path) == 0
+        ):
+            return
+        header = self._read_header()
+        fieldnames = list(data.values.keys())
+        if header == fieldnames:
+            return
+        if header and header == fieldnames[: len(header)]:
+            # Written by a previous version, without the newer columns
+            logger.info("Adding the new columns to the emission file")
+            self._migrate_headers(fieldnames)
+        else:
             logger.info("Backing up old emission file")
             backup(self.save_file_path)
-            file_exists = False
-
-        if not file_exists:
-            df = pd.DataFrame(columns=data.values.keys())
-            df = df.append(dict(data.values), ignore_index=True)
-        elif self.on_csv_write == "append":
-            df = pd.read_csv(self.save_file_path)
-            df = df.append(dict(data.values), ignore_index=True)
+
+    def _migrate_headers(self, fieldnames: List[str]) -> None:
+        """
+        Rewrite the file with the columns of `fieldnames`, empty in the rows
+        written before they were added
+        """
+        directory = os.path.dirname(os.path.abspath(self.save_file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with open(self.save_file_path, newline="") as old_file, os.fdopen(
+            fd, "w", newline=""
+        ) as new_file:
+            writer = csv.DictWriter(new_file, fieldnames, lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(row for row in csv.DictReader(old_file))
+        os.replace(tmp_path, self.save_file_path)
+
+    def _get_file(self, data: EmissionsData) -> Union[IO, IndexedCSVFile]:
+        """
+        Returns the open file, the headers of the file are only checked when it
+        is opened: when it was moved or deleted since the last write, it is
+        opened again.
+        """
+        if self._file is not None:
+            if is_same_file(self.save_file_path, self._file):
+                return self._file
+            self.close()
+        self._backup_if_invalid_headers(data)
+        if self.on_csv_write == "append":
+            self._file = open(self.save_file_path, "a", newline="")
         else:
-            df = pd.read_csv(self.save_file_path)
-            df_run = df.loc[df.run_id == data.run_id]
-            if len(df_run) < 1:
-                df = df.append(dict(data.values), ignore_index=True)
-            elif len(df_run) > 1:
-                logger.warning(
-                    f"CSV contains more than 1 ({len(df_run)})"
-                    + f" rows with current run ID ({data.run_id})."
-                    + "Appending instead of updating."
+            self._file = IndexedCSVFile(
+                self.save_file_path,
+                list(data.values.keys()),
+                key="run_id",
+                padding_column="duration",
+            )
+        return self._file
+
+    def _append(self, data: EmissionsData) -> None:
+        with self._lock:
+            file = self._get_file(data)
+            writer = csv.writer(file, lineterminator="\n")
+            with file_lock(file):
+                # Checked under the lock: another process may have created it
+                if os.fstat(file.fileno()).st_size == 0:
+                    writer.writerow(data.values.keys())
+                writer.writerow(data.values.values())
+                file.flush()
+
+    def _update(self, data: EmissionsData) -> None:
+        with self._lock:
+            file = self._get_file(data)
+            file.write(str(data.run_id), list(data.values.values()))
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __del__(self):
+        self.close()
+
+    def out(self, data: EmissionsData):
+        if self.on_csv_write == "append":
+            self._append(data)
+        else:
+            self._update(data)
+
+
+class BufferedOutput(BaseOutput):
+    """
+    Output writing the rows in batches: they are buffered in memory until
+    `max_rows` rows are buffered, `max_seconds` after the first buffered row,
+    or until the output is flushed or closed. The age of the rows is checked
+    when a row is added and at each measure of the tracker. Rows that could
+    not be written are kept for the next write, up to MAX_BUFFERED_WRITES times
+    `max_rows` rows.
+    """
+
+    MAX_BUFFERED_WRITES = 10
+
+    def __init__(self, max_rows: int, max_seconds: float):
+        self.max_rows: int = max_rows
+        self.max_seconds: float = max_seconds
+        self._rows: List[EmissionsData] = []
+        self._first_row_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _write(self, rows: List[EmissionsData]) -> None:
+        pass
+
+    def out(self, data: EmissionsData):
+        with self._lock:
+            if not self._rows:
+                self._first_row_time = time.monotonic()
+            self._rows.append(data)
+            if (
+                len(self._rows) >= self.max_rows
+                or time.monotonic() - self._first_row_time >= self.max_seconds
+            ):
+                self._write_buffer()
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_buffer()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._write_buffer()
+
+    def write_expired(self) -> None:
+        with self._lock:
+            if (
+                self._rows
+                and time.monotonic() - self._first_row_time >= self.max_seconds
+            ):
+                self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        if not self._rows:
+            return
+        try:
+            self._write(self._rows)
+        except Exception as e:
+            logger.error(e, exc_info=True)
+            max_buffered = self.MAX_BUFFERED_WRITES * self.max_rows
+            if len(self._rows) > max_buffered:
+                logger.error(
+                    f"Dropping the {len(self._rows) - max_buffered} oldest rows"
+                    + " that could not be written"
                 )
-                df = df.append(dict(data.values), ignore_index=True)
-            else:
-                df.at[
-                    df.run_id == data.run_id, data.values.keys()
-                ] = data.values.values()
+                self._rows = self._rows[-max_buffered:]
+            # Retried at the next write, after max_seconds
+            self._first_row_time = time.monotonic()
+            return
+        self._rows = []
+        self._first_row_time = None
+
+
+class ColumnarOutput(BufferedOutput):
+    """
+    Saves experiment artifacts to Parquet or Arrow IPC files, partitioned by
+    project and date:
+        <output_dir>/<project_name>/<YYYY-MM-DD>/emissions-<time>-<id>.parquet
+    Rows are buffered in memory and written, one file per partition, when
+    `max_rows` rows are buffered, `max_seconds` after the first buffered row,
+    or when the output is flushed or closed. Read them back with
+    `read_emissions`.
+    """
+
+    FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+    def __init__(
+        self,
+        output_dir: str,
+        file_format: str = "parquet",
+        max_rows: int = 10000,
+        max_seconds: float = 60,
+        compression: Optional[str] = None,
+    ):
+        """
+        :param output_dir: Directory of the partitions
+        :param file_format: "parquet" or "arrow" (Arrow IPC file format)
+        :param max_rows: Number of buffered rows written at once
+        :param max_seconds: Maximum time (in seconds) rows stay buffered
+        :param compression: Compression codec, defaults to snappy for Parquet
+                            and to no compression for Arrow
+        """
+        if file_format not in self.FORMATS:
+            raise ValueError(
+                f"Unknown file format: {file_format}"
+                + " (should be one of 'parquet' or 'arrow')"
+            )
+        if not self.is_available():
+            raise ImportError(
+                "pyarrow is required to save emissions to Parquet or Arrow files,"
+                + " install it with `pip install codecarbon[columnar]`"
+            )
+        super().__init__(max_rows, max_seconds)
+        self.output_dir: str = output_dir
+        self.file_format: str = file_format
+        self.compression: Optional[str] = compression
 
-        df.to_csv(self.save_file_path, index=False)
+    @staticmethod
+    def is_available() -> bool:
+        """
+        Whether pyarrow is installed, without importing it
+        """
+        return importlib.util.find_spec("pyarrow") is not None
+
+    @staticmethod
+    def get_schema() -> "pa.Schema":
+        """
+        Arrow schema of the emissions data, typed from the EmissionsData fields
+        """
+        import pyarrow as pa
+
+        types = {str: pa.string(), float: pa.float64(), Optional[float]: pa.float64()}
+        return pa.schema(
+            [
+                pa.field(field.name, types[field.type])
+                for field in dataclasses.fields(EmissionsData)
+            ]
+        )
+
+    def _write(self, rows: List[EmissionsData]) -> None:
+        partitions: Dict[Tuple[str, str], List[EmissionsData]] = dict()
+        for data in rows:
+            key = (str(data.project_name), str(data.timestamp)[:10])
+            partitions.setdefault(key, []).append(data)
+        for (project_name, date), partition_rows in partitions.items():
+            directory = os.path.join(
+                self.output_dir, quote(project_name, safe=" "), date
+            )
+            self._write_table(directory, self._to_table(partition_rows))
+
+    def _to_table(self, rows: List[EmissionsData]) -> "pa.Table":
+        import pyarrow as pa
+
+        schema = self.get_schema()
+        columns = {}
+        for field in schema:
+            convert = str if pa.types.is_string(field.type) else float
+            columns[field.name] = [
+                None if value is None else convert(value)
+                for value in (getattr(row, field.name) for row in rows)
+            ]
+        return pa.Table.from_pydict(columns, schema=schema)
+
+    def _write_table(self, directory: str, table: "pa.Table") -> None:
+        import pyarrow as pa
+
+        os.makedirs(directory, exist_ok=True)
+        file_name = (
+            f"emissions-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            + self.FORMATS[self.file_format]
+        )
+        # Readers ignore the files starting with a dot until they are complete
+        tmp_path = os.path.join(directory, "." + file_name)
+        if self.file_format == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(
+                table,
+                tmp_path,
+                row_group_size=self.max_rows,
+                compression=self.compression or "snappy",
+            )
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=self.compression)
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                    writer.write_table(table)
+        os.replace(tmp_path, os.path.join(directory, file_name))
+
+
+class SQLiteOutput(BufferedOutput):
+    """
+    Saves experiment artifacts to the `emissions` table of a SQLite database,
+    in WAL mode so that the trackers of several processes can write to it
+    while it is read. Rows are inserted in batches, see BufferedOutput.
+    """
+
+    TABLE = "emissions"
+    INDEXED_COLUMNS = ["run_id", "project_name", "timestamp"]
+
+    def __init__(
+        self,
+        db_path: str,
+        on_csv_write: str = "append",
+        max_rows: int = 100,
+        max_seconds: float = 60,
+        timeout: float = 30,
+    ):
+        """
+        :param db_path: Path of the SQLite database
+        :param on_csv_write: "append" to insert a row at each write, "update" to
+                             update the row of the run (upsert)
+        :param max_rows: Number of buffered rows inserted at once
+        :param max_seconds: Maximum time (in seconds) rows stay buffered
+        :param timeout: Time (in seconds) to wait for the other writers
+        """
+        if on_csv_write not in {"append", "update"}:
+            raise ValueError(
+                f"Unknown `on_csv_write` value: {on_csv_write}"
+                + " (should be one of 'append' or 'update'"
+            )
+        super().__init__(max_rows, max_seconds)
+        self.db_path: str = db_path
+        self.on_csv_write: str = on_csv_write
+        self.timeout: float = timeout
+        self._connection: Optional[sqlite3.Connection] = None
+        self._columns = [field.name for field in dataclasses.fields(EmissionsData)]
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+        connection = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        # Durable at each checkpoint instead of each transaction, safe with WAL
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            self._create_table(connection)
+        self._connection = connection
+        return connection
+
+    def _create_table(self, connection: sqlite3.Connection) -> None:
+        sql_types = {str: "TEXT", float: "REAL", Optional[float]: "REAL"}
+        columns = {
+            field.name: sql_types[field.type]
+            for field in dataclasses.fields(EmissionsData)
+        }
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TABLE} ("
+            + ", ".join(f"{name} {sql_type}" for name, sql_type in columns.items())
+            + ")"
+        )
+        # Tables created by a previous version miss the newer columns
+        existing = {
+            row[1] for row in connection.execute(f"PRAGMA table_info({self.TABLE})")
+        }
+        for name, sql_type in columns.items():
+            if name not in existing:
+                connection.execute(
+                    f"ALTER TABLE {self.TABLE} ADD COLUMN {name} {sql_type}"
+                )
+        for column in self.INDEXED_COLUMNS:
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.TABLE}_{column}"
+                + f" ON {self.TABLE} ({column})"
+            )
+
+    def _to_row(self, data: EmissionsData) -> Tuple:
+        return tuple(
+            value if value is None or isinstance(value, (int, float)) else str(value)
+            for value in data.values.values()
+        )
+
+    def _write(self, rows: List[EmissionsData]) -> None:
+        connection = self._connect()
+        insert = (
+            f"INSERT INTO {self.TABLE} ({', '.join(self._columns)})"
+            + f" VALUES ({', '.join('?' * len(self._columns))})"
+        )
+        with connection:
+            if self.on_csv_write == "append":
+                connection.executemany(insert, [self._to_row(row) for row in rows])
+                return
+            # Upsert: run_id isn't unique as append mode can share the table
+            update = (
+                f"UPDATE {self.TABLE} SET "
+                + ", ".join(f"{name} = ?" for name in self._columns)
+                + " WHERE run_id = ?"
+            )
+            latest = {str(row.run_id): row for row in rows}
+            new_rows = []
+            for run_id, row in latest.items():
+                values = self._to_row(row)
+                if connection.execute(update, values + (run_id,)).rowcount == 0:
+                    new_rows.append(values)
+            connection.executemany(insert, new_rows)
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+def read_emissions(path: str) -> "pd.DataFrame":
+    """
+    Read the emissions saved by FileOutput (CSV file), ColumnarOutput
+    (directory, or one of its Parquet or Arrow files) or SQLiteOutput (.db
+    file)
+    """
+    import pandas as pd
+
+    if os.path.isdir(path):
+        import pyarrow.dataset as ds
+
+        file_format = "parquet"
+        for _, _, file_names in os.walk(path):
+            if any(name.endswith(".arrow") for name in file_names):
+                file_format = "ipc"
+                break
+            if any(name.endswith(".parquet") for name in file_names):
+                break
+        # Files written by a previous version miss the newer columns
+        dataset = ds.dataset(
+            path,
+            schema=ColumnarOutput.get_schema(),
+            format=file_format,
+            partitioning=None,
+        )
+        return dataset.to_table().to_pandas()
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    if path.endswith((".arrow", ".feather")):
+        return pd.read_feather(path)
+    if path.endswith((".db", ".sqlite")):
+        connection = sqlite3.connect(path)
+        try:
+            return pd.read_sql(f"SELECT * FROM {SQLiteOutput.TABLE}", connection)
+        finally:
+            connection.close()
+    return pd.read_csv(path)
 
 
 class HTTPOutput(BaseOutput):
@@ -152,6 +592,8 @@ class HTTPOutput(BaseOutput):
         self.endpoint_url: str = endpoint_url
 
     def out(self, data: EmissionsData):
+        import requests
+
         try:
             payload = dataclasses.asdict(data)
             payload["user"] = getpass.getuser()
@@ -173,6 +615,9 @@ class CodeCarbonAPIOutput(BaseOutput):
     run_id = None
 
     def __init__(self, endpoint_url: str, experiment_id: str, api_key: str, conf):
+        from codecarbon.core.api_client import ApiClient
+        from codecarbon.core.api_delivery import EmissionsDeliveryQueue
+
         self.endpoint_url: str = endpoint_url
         self.api = ApiClient(
             experiment_id=experiment_id,
@@ -181,9 +626,17 @@ class CodeCarbonAPIOutput(BaseOutput):
             conf=conf,
         )
         self.run_id = self.api.run_id
+        # Emissions are posted from a background thread
+        self._delivery = EmissionsDeliveryQueue(self.api)
 
     def out(self, data: EmissionsData):
         try:
-            self.api.add_emission(dataclasses.asdict(data))
+            payload = self.api.prepare_emission(dataclasses.asdict(data))
+            if payload is not None:
+                self._delivery.start()
+                self._delivery.put(payload)
         except Exception as e:
             logger.error(e, exc_info=True)
+
+    def close(self) -> None:
+        self._delivery.close()
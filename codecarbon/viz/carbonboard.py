@@ -6,6 +6,7 @@ import fire
 import pandas as pd
 from dash.dependencies import Input, Output
 
+from codecarbon.output import read_emissions
 from codecarbon.viz.components import Components
 from codecarbon.viz.data import Data
 
@@ -270,7 +271,7 @@ def render_app(df: pd.DataFrame):
 
 
 def viz(filepath: str, port: int = 8050, debug: bool = False) -> None:
-    df = pd.read_csv(filepath)
+    df = read_emissions(filepath)
     app = render_app(df)
     app.run_server(port=port, debug=debug)
 
@@ -14,7 +14,15 @@ DEPENDENCIES = [
     "fuzzywuzzy",
 ]
 
-TEST_DEPENDENCIES = ["mock", "pytest", "responses", "tox", "numpy", "requests-mock"]
+TEST_DEPENDENCIES = [
+    "mock",
+    "pytest",
+    "responses",
+    "tox",
+    "numpy",
+    "requests-mock",
+    "pyarrow",
+]
 
 
 setuptools.setup(
@@ -28,7 +36,10 @@ setuptools.setup(
     ),
     install_requires=DEPENDENCIES,
     tests_require=TEST_DEPENDENCIES,
-    extras_require={"viz": ["dash", "dash_bootstrap_components", "fire"]},
+    extras_require={
+        "viz": ["dash", "dash_bootstrap_components", "fire"],
+        "columnar": ["pyarrow"],
+    },
     classifiers=[
         "Natural Language :: English",
         "Programming Language :: Python :: 3.6",
@@ -43,6 +54,8 @@ setuptools.setup(
             "data/private_infra/2016/usa_emissions.json",
             "data/private_infra/2016/canada_energy_mix.json",
             "data/private_infra/global_energy_mix.json",
+            "data/private_infra/carbon_intensity_per_source.json",
+            "data/private_infra/carbon_intensity_index.bin",
             "viz/assets/*.png",
         ],
     },
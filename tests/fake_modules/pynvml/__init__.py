@@ -82,3 +82,9 @@ def nvmlDeviceGetComputeRunningProcesses(handle):
 
 def nvmlDeviceGetGraphicsRunningProcesses(handle):
     return DETAILS[handle]["graphics_processes"]
+
+
+def nvmlDeviceGetTotalEnergyConsumption(handle):
+    if "total_energy" not in DETAILS[handle]:
+        raise NVMLError("Not Supported")
+    return DETAILS[handle]["total_energy"]
@@ -1,9 +1,14 @@
 import dataclasses
+import os
+import tempfile
+import time
 from uuid import uuid4
 
+import requests
 import requests_mock
 
 from codecarbon.core.api_client import ApiClient
+from codecarbon.core.api_delivery import STALE_CLAIM_SECONDS, EmissionsDeliveryQueue
 from codecarbon.output import EmissionsData
 
 conf = {
@@ -87,3 +92,171 @@ def test_call_api():
             tracking_mode="Machine",
         )
         assert api.add_emission(dataclasses.asdict(carbon_emission))
+
+
+def get_api_client():
+    api = ApiClient(endpoint_url="http://test.com")
+    api.experiment_id = "experiment_id"
+    api.run_id = "82ba0923-0713-4da1-9e57-cea70b460ee9"
+    return api
+
+
+def get_payloads(api, count):
+    emission = {
+        "duration": 15,
+        "emissions": 2.0,
+        "emissions_rate": 2.0,
+        "cpu_power": 3.0,
+        "gpu_power": 0,
+        "ram_power": 0.15,
+        "cpu_energy": 2,
+        "gpu_energy": 0,
+        "ram_energy": 1,
+        "energy_consumed": 3.0,
+    }
+    return [api.prepare_emission(emission) for _ in range(count)]
+
+
+def test_send_emissions_batch():
+    api = get_api_client()
+    with requests_mock.Mocker() as m:
+        m.post("http://test.com/emissions/batch", status_code=201)
+        assert api.send_emissions(get_payloads(api, 3)) == []
+        assert m.call_count == 1
+        assert len(m.last_request.json()) == 3
+
+
+def test_send_emissions_without_batch_endpoint():
+    api = get_api_client()
+    with requests_mock.Mocker() as m:
+        m.post("http://test.com/emissions/batch", status_code=404)
+        m.post("http://test.com/emission", status_code=201)
+        assert api.send_emissions(get_payloads(api, 3)) == []
+        assert api.send_emissions(get_payloads(api, 2)) == []
+        # The batch endpoint is only tried once
+        assert m.call_count == 1 + 3 + 2
+
+
+def test_send_emissions_server_error():
+    api = get_api_client()
+    payloads = get_payloads(api, 3)
+    with requests_mock.Mocker() as m:
+        m.post("http://test.com/emissions/batch", status_code=503)
+        assert api.send_emissions(payloads) == payloads
+        # Expired or rotated API key
+        m.post("http://test.com/emissions/batch", status_code=401)
+        assert api.send_emissions(payloads) == payloads
+        m.post("http://test.com/emissions/batch", status_code=403)
+        assert api.send_emissions(payloads) == payloads
+
+
+def test_send_emissions_invalid_emission():
+    api = get_api_client()
+    payloads = get_payloads(api, 3)
+    with requests_mock.Mocker() as m:
+        m.post("http://test.com/emissions/batch", status_code=422)
+        m.post(
+            "http://test.com/emission",
+            [{"status_code": 201}, {"status_code": 422}, {"status_code": 201}],
+        )
+        assert api.send_emissions(payloads) == []
+        # Only the invalid emission is dropped
+        assert m.call_count == 1 + 3
+        assert api._batch_endpoint
+        m.post("http://test.com/emission", status_code=401)
+        assert api.send_emissions(payloads) == payloads
+
+
+def test_delivery_queue_spools_during_outage():
+    api = get_api_client()
+    with tempfile.TemporaryDirectory() as spool_dir:
+        with requests_mock.Mocker() as m:
+            m.post(
+                "http://test.com/emissions/batch",
+                exc=requests.exceptions.ConnectionError,
+            )
+            delivery = EmissionsDeliveryQueue(api, spool_dir=spool_dir)
+            delivery.start()
+            for payload in get_payloads(api, 5):
+                delivery.put(payload)
+            delivery.close()
+        assert len(os.listdir(delivery.spool_dir)) > 0
+
+        # Delivered by the next tracker, once the API is back
+        with requests_mock.Mocker() as m:
+            m.post("http://test.com/emissions/batch", status_code=201)
+            delivery = EmissionsDeliveryQueue(api, spool_dir=spool_dir)
+            delivery.start()
+            delivery.close()
+            delivered = sum(len(r.json()) for r in m.request_history)
+        assert delivered == 5
+        assert os.listdir(delivery.spool_dir) == []
+
+
+def test_delivery_queue_full():
+    api = get_api_client()
+    with tempfile.TemporaryDirectory() as spool_dir:
+        delivery = EmissionsDeliveryQueue(api, max_size=2, spool_dir=spool_dir)
+        for payload in get_payloads(api, 3):
+            delivery.put(payload)
+        assert len(os.listdir(delivery.spool_dir)) == 1
+        with requests_mock.Mocker() as m:
+            m.post("http://test.com/emissions/batch", status_code=201)
+            delivery.close()
+            delivered = sum(len(r.json()) for r in m.request_history)
+        assert delivered == 3
+
+
+def test_delivery_queue_sends_spooled_emissions_for_their_run():
+    api = get_api_client()
+    api.run_id = "run-of-A"
+    with tempfile.TemporaryDirectory() as spool_dir:
+        with requests_mock.Mocker() as m:
+            m.post("http://test.com/run", status_code=503)
+            m.post(
+                "http://test.com/emissions/batch",
+                exc=requests.exceptions.ConnectionError,
+            )
+            delivery = EmissionsDeliveryQueue(api, spool_dir=spool_dir)
+            delivery.put(get_payloads(api, 1)[0])
+            delivery.close()
+            # Without a run, emissions are not spooled
+            api_without_run = get_api_client()
+            api_without_run.run_id = None
+            delivery = EmissionsDeliveryQueue(api_without_run, spool_dir=spool_dir)
+            delivery.put(get_payloads(api_without_run, 1)[0])
+            delivery.close()
+        assert len(os.listdir(delivery.spool_dir)) == 1
+
+        # Only delivered to the same API, for run A
+        other_api = ApiClient(endpoint_url="http://other.com")
+        other_api.experiment_id = api.experiment_id
+        other_api.run_id = "run-of-B"
+        with requests_mock.Mocker() as m:
+            m.post("http://other.com/emissions/batch", status_code=201)
+            EmissionsDeliveryQueue(other_api, spool_dir=spool_dir).close()
+            assert m.call_count == 0
+        api_of_b = get_api_client()
+        api_of_b.run_id = "run-of-B"
+        with requests_mock.Mocker() as m:
+            m.post("http://test.com/emissions/batch", status_code=201)
+            EmissionsDeliveryQueue(api_of_b, spool_dir=spool_dir).close()
+            assert [p["run_id"] for p in m.last_request.json()] == ["run-of-A"]
+
+
+def test_delivery_queue_reclaims_stale_claims():
+    api = get_api_client()
+    with tempfile.TemporaryDirectory() as spool_dir:
+        delivery = EmissionsDeliveryQueue(api, spool_dir=spool_dir)
+        delivery._spool(get_payloads(api, 2))
+        (file_name,) = os.listdir(delivery.spool_dir)
+        # Claimed by a tracker which crashed while sending it
+        claimed_path = os.path.join(delivery.spool_dir, f"{file_name}.1.sending")
+        os.rename(os.path.join(delivery.spool_dir, file_name), claimed_path)
+        claimed_at = time.time() - STALE_CLAIM_SECONDS - 1
+        os.utime(claimed_path, (claimed_at, claimed_at))
+        with requests_mock.Mocker() as m:
+            m.post("http://test.com/emissions/batch", status_code=201)
+            delivery.close()
+            assert len(m.last_request.json()) == 2
+        assert os.listdir(delivery.spool_dir) == []
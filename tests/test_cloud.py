@@ -19,9 +19,20 @@
 # OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
 # OTHER DEALINGS IN THE SOFTWARE.
 
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import requests
 import responses
 
-from codecarbon.core.cloud import CLOUD_METADATA_MAPPING, get_env_cloud_details
+from codecarbon.core.cloud import (
+    CLOUD_METADATA_MAPPING,
+    get_env_cloud_details,
+    probe_env_cloud_details,
+)
 
 
 def setup_cloud_details_responses(tested_provider, provider_metadata):
@@ -71,3 +82,127 @@ def test_get_env_cloud_details_mapping_nothing():
     setup_cloud_details_responses("localhost", metadata)
 
     assert get_env_cloud_details() is None
+
+
+class MetadataServer:
+    """
+    Local stand-in for the metadata endpoint of the providers: answers
+    /<provider> after a delay, with the metadata or a 404
+    """
+
+    def __init__(self, delays, metadata=None):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                provider = self.path.strip("/")
+                time.sleep(delays.get(provider, 0))
+                if metadata is not None and provider in metadata:
+                    body = json.dumps(metadata[provider]).encode()
+                    self.send_response(200)
+                else:
+                    body = b""
+                    self.send_response(404)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped waiting, past its deadline
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        host, port = self.server.server_address
+        mapping = {
+            provider: dict(params, url=f"http://{host}:{port}/{provider}")
+            for provider, params in CLOUD_METADATA_MAPPING.items()
+        }
+        self.patch = mock.patch.dict(CLOUD_METADATA_MAPPING, mapping)
+        self.patch.start()
+        return self
+
+    def __exit__(self, *args):
+        self.patch.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_get_env_cloud_details_probes_in_parallel():
+    metadata = {"compute": {"azEnvironment": "AzurePublicCloud"}}
+    delays = {"AWS": 0.4, "Azure": 0.4, "GCP": 0.4}
+    with MetadataServer(delays, {"Azure": metadata}):
+        start = time.monotonic()
+        cloud_details = get_env_cloud_details(timeout=2)
+        elapsed = time.monotonic() - start
+
+    assert cloud_details == {"provider": "Azure", "metadata": metadata}
+    # Sequential probes would take 0.8 s before reaching Azure
+    assert elapsed < 0.75
+
+
+def test_get_env_cloud_details_first_success_wins():
+    metadata = {"AWS": {"region": "us-east-1"}, "GCP": {"zone": "us-central1-a"}}
+    delays = {"AWS": 0.8, "Azure": 0, "GCP": 0.1}
+    with MetadataServer(delays, metadata):
+        start = time.monotonic()
+        cloud_details = get_env_cloud_details(timeout=2)
+        elapsed = time.monotonic() - start
+
+    assert cloud_details == {"provider": "GCP", "metadata": metadata["GCP"]}
+    # Doesn't wait for the slower provider
+    assert elapsed < 0.7
+
+
+def test_get_env_cloud_details_deadline():
+    delays = {"AWS": 3, "Azure": 3, "GCP": 3}
+    with MetadataServer(delays):
+        start = time.monotonic()
+        cloud_details = get_env_cloud_details(timeout=0.5)
+        elapsed = time.monotonic() - start
+
+    assert cloud_details is None
+    # One deadline for all the providers, not one timeout each
+    assert elapsed < 1
+
+
+@responses.activate
+def test_probe_env_cloud_details_reports_connect_timeouts():
+    setup_cloud_details_responses("localhost", {})
+    responses.replace(
+        responses.GET,
+        CLOUD_METADATA_MAPPING["AWS"]["url"],
+        body=requests.exceptions.ConnectTimeout(),
+    )
+
+    assert probe_env_cloud_details() == (None, True)
+
+
+def test_probe_env_cloud_details_reports_timeouts():
+    with MetadataServer({}):
+        assert probe_env_cloud_details(timeout=2) == (None, False)
+    with MetadataServer({"AWS": 0, "Azure": 0, "GCP": 1}):
+        assert probe_env_cloud_details(timeout=0.3) == (None, True)
+
+
+def test_get_env_cloud_details_probes_dont_block_exit():
+    delays = {"AWS": 1, "Azure": 1, "GCP": 1}
+    with MetadataServer(delays):
+        assert get_env_cloud_details(timeout=0.2) is None
+        probes = [
+            thread
+            for thread in threading.enumerate()
+            if thread.name.startswith("codecarbon-cloud")
+        ]
+
+    # Still waiting for their answer, without keeping the interpreter alive
+    assert probes
+    assert all(thread.daemon for thread in probes)
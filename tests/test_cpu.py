@@ -1,13 +1,15 @@
 import os
 import sys
+import tempfile
+import time
 import unittest
 from unittest import mock
 
 import pytest
 
-from codecarbon.core.cpu import TDP, IntelPowerGadget, IntelRAPL
-from codecarbon.core.units import Energy, Power
-from codecarbon.external.hardware import CPU
+from codecarbon.core.cpu import TDP, CPUModelMatcher, IntelPowerGadget, IntelRAPL
+from codecarbon.core.units import Energy, Power, Time
+from codecarbon.external.hardware import CPU, RAM
 from codecarbon.input import DataSource
 
 
@@ -66,6 +68,10 @@ class TestIntelRAPL(unittest.TestCase):
                 f.write("package-0")
             with open(os.path.join(self.rapl_dir, "intel-rapl:0/energy_uj"), "w") as f:
                 f.write("52649883221")
+            with open(
+                os.path.join(self.rapl_dir, "intel-rapl:0/max_energy_range_uj"), "w"
+            ) as f:
+                f.write("262143328850")
 
             os.makedirs(os.path.join(self.rapl_dir, "intel-rapl:1"), exist_ok=True)
             with open(os.path.join(self.rapl_dir, "intel-rapl:1/name"), "w") as f:
@@ -73,12 +79,174 @@ class TestIntelRAPL(unittest.TestCase):
             with open(os.path.join(self.rapl_dir, "intel-rapl:1/energy_uj"), "w") as f:
                 f.write("117870082040")
 
+            # Sub-zones nested in the package zone
+            for sub_zone, name, energy in (
+                ("intel-rapl:0:0", "core", "32649883221"),
+                ("intel-rapl:0:1", "dram", "7870082040"),
+            ):
+                sub_zone_dir = os.path.join(self.rapl_dir, "intel-rapl:0", sub_zone)
+                os.makedirs(sub_zone_dir, exist_ok=True)
+                with open(os.path.join(sub_zone_dir, "name"), "w") as f:
+                    f.write(name)
+                with open(os.path.join(sub_zone_dir, "energy_uj"), "w") as f:
+                    f.write(energy)
+
     @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
     def test_intel_rapl(self):
-        expected_cpu_details = {"Processor Energy Delta_0(kWh)": 0.0, "psys": 0.0}
+        expected_cpu_details = {
+            "Processor Energy Delta_0(kWh)": 0.0,
+            "Processor Power_0(Watt)": 0.0,
+            "Core Energy Delta_0(kWh)": 0.0,
+            "Core Power_0(Watt)": 0.0,
+            "DRAM Energy Delta_0(kWh)": 0.0,
+            "DRAM Power_0(Watt)": 0.0,
+            "Psys Energy Delta_0(kWh)": 0.0,
+            "Psys Power_0(Watt)": 0.0,
+        }
+
+        rapl = IntelRAPL(rapl_dir=self.rapl_dir)
+        self.assertDictEqual(
+            expected_cpu_details, rapl.get_cpu_details(duration=Time(0.01))
+        )
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_delta_since_last_call(self):
+        rapl = IntelRAPL(rapl_dir=self.rapl_dir)
+        with open(os.path.join(self.rapl_dir, "intel-rapl:0/energy_uj"), "w") as f:
+            # 3.6e9 uJ = 3600 J = 1 Wh
+            f.write(str(52649883221 + 3600000000))
+
+        cpu_details = rapl.get_cpu_details(duration=Time(3600))
+        self.assertAlmostEqual(
+            cpu_details["Processor Energy Delta_0(kWh)"], 0.001, places=6
+        )
+        self.assertAlmostEqual(cpu_details["Processor Power_0(Watt)"], 1, places=3)
+        self.assertDictEqual(cpu_details, rapl.get_static_cpu_details())
+
+        # Nothing consumed since the previous call
+        cpu_details = rapl.get_cpu_details(duration=Time(1))
+        self.assertEqual(cpu_details["Processor Energy Delta_0(kWh)"], 0)
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_counter_wraparound(self):
+        rapl = IntelRAPL(rapl_dir=self.rapl_dir)
+        with open(os.path.join(self.rapl_dir, "intel-rapl:0/energy_uj"), "w") as f:
+            # The counter overflowed: 262143328850 - 52649883221 + 3600000000 uJ
+            # were consumed since the previous reading
+            f.write("3600000000")
+
+        cpu_details = rapl.get_cpu_details(duration=Time(3600))
+        expected = Energy.from_ujoules(262143328850 - 52649883221 + 3600000000)
+        self.assertAlmostEqual(
+            cpu_details["Processor Energy Delta_0(kWh)"], expected.kWh, places=9
+        )
 
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_start_logs_read_errors(self):
+        rapl = IntelRAPL(rapl_dir=self.rapl_dir, keep_files_open=False)
+        with mock.patch.object(
+            rapl, "_read_energies", side_effect=OSError("No data available")
+        ), mock.patch("codecarbon.core.cpu.logger") as logger:
+            rapl.start()
+
+        logger.error.assert_called_once()
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_sub_zones(self):
         rapl = IntelRAPL(rapl_dir=self.rapl_dir)
-        self.assertDictEqual(expected_cpu_details, rapl.get_cpu_details(delay=0.01))
+        self.assertEqual(
+            [rapl_file.name for rapl_file in rapl._rapl_files],
+            [
+                "Processor Energy Delta_0(kWh)",
+                "Core Energy Delta_0(kWh)",
+                "DRAM Energy Delta_0(kWh)",
+                "Psys Energy Delta_0(kWh)",
+            ],
+        )
+        self.assertTrue(rapl.has_domain("dram"))
+        self.assertFalse(rapl.has_domain("uncore"))
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_unreadable_zones_are_not_numbered(self):
+        with tempfile.TemporaryDirectory() as rapl_dir:
+            for zone in ("intel-rapl:0", "intel-rapl:1"):
+                os.makedirs(os.path.join(rapl_dir, zone))
+                with open(os.path.join(rapl_dir, zone, "name"), "w") as f:
+                    f.write("package-" + zone[-1])
+                with open(os.path.join(rapl_dir, zone, "energy_uj"), "w") as f:
+                    f.write("52649883221")
+            unreadable_file = os.path.join(rapl_dir, "intel-rapl:0", "energy_uj")
+            builtin_open = open
+
+            def open_mock(file, *args, **kwargs):
+                if file == unreadable_file:
+                    raise PermissionError(file)
+                return builtin_open(file, *args, **kwargs)
+
+            with mock.patch("builtins.open", side_effect=open_mock):
+                rapl = IntelRAPL(rapl_dir=rapl_dir, keep_files_open=False)
+
+        self.assertEqual(
+            [rapl_file.name for rapl_file in rapl._rapl_files],
+            ["Processor Energy Delta_0(kWh)"],
+        )
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_rapl_dram_energy_for_ram(self):
+        cpu = CPU(
+            output_dir="",
+            mode="intel_rapl",
+            model=None,
+            tdp=None,
+            rapl_dir=self.rapl_dir,
+        )
+        ram = RAM(intel_rapl=cpu.intel_interface)
+        self.assertTrue(cpu.has_rapl_dram())
+        cpu.start()
+        dram_file = os.path.join(self.rapl_dir, "intel-rapl:0/intel-rapl:0:1/energy_uj")
+        with open(dram_file, "w") as f:
+            f.write(str(7870082040 + 3600000000))
+
+        _, cpu_energy = cpu.measure_power_and_energy(last_duration=3600)
+        power, energy = ram.measure_power_and_energy(last_duration=3600)
+        self.assertEqual(cpu_energy.kWh, 0)
+        self.assertAlmostEqual(energy.kWh, 0.001, places=6)
+        self.assertAlmostEqual(power.W, 1, places=3)
+        domains_energy = cpu.get_rapl_domains_energy()
+        self.assertEqual(
+            set(domains_energy.keys()), {"package", "core", "dram", "psys"}
+        )
+        self.assertAlmostEqual(domains_energy["dram"].kWh, 0.001, places=6)
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_keep_files_open(self):
+        rapl = IntelRAPL(rapl_dir=self.rapl_dir, keep_files_open=True)
+        self.assertIsNotNone(rapl._reader)
+        self.assertEqual(
+            sorted(rapl._reader.read()),
+            [7870082040, 32649883221, 52649883221, 117870082040],
+        )
+        with open(os.path.join(self.rapl_dir, "intel-rapl:0/energy_uj"), "w") as f:
+            f.write(str(52649883221 + 3600000000))
+
+        cpu_details = rapl.get_cpu_details(duration=Time(3600))
+        self.assertAlmostEqual(
+            cpu_details["Processor Energy Delta_0(kWh)"], 0.001, places=6
+        )
+        rapl._reader.close()
+        self.assertEqual(rapl._reader._fds, [])
+
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_intel_rapl_reopen_files(self):
+        rapl = IntelRAPL(rapl_dir=self.rapl_dir, keep_files_open=False)
+        self.assertIsNone(rapl._reader)
+        with open(os.path.join(self.rapl_dir, "intel-rapl:0/energy_uj"), "w") as f:
+            f.write(str(52649883221 + 3600000000))
+
+        cpu_details = rapl.get_cpu_details(duration=Time(3600))
+        self.assertAlmostEqual(
+            cpu_details["Processor Energy Delta_0(kWh)"], 0.001, places=6
+        )
 
     @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
     def test_rapl_cpu_hardware(self):
@@ -95,6 +263,24 @@ class TestIntelRAPL(unittest.TestCase):
             last_duration=0.01
         )
 
+    @unittest.skipUnless(sys.platform.lower().startswith("lin"), "requires Linux")
+    def test_rapl_cpu_hardware_does_not_sleep(self):
+        cpu = CPU(
+            output_dir="",
+            mode="intel_rapl",
+            model=None,
+            tdp=None,
+            rapl_dir=self.rapl_dir,
+        )
+        cpu.start()
+        with open(os.path.join(self.rapl_dir, "intel-rapl:0/energy_uj"), "w") as f:
+            f.write(str(52649883221 + 36000000))
+        start = time.time()
+        power, energy = cpu.measure_power_and_energy(last_duration=10)
+        self.assertLess(time.time() - start, 1)
+        self.assertAlmostEqual(energy.kWh, 1e-5, places=8)
+        self.assertAlmostEqual(power.W, 3.6, places=3)
+
 
 class TestTDP(unittest.TestCase):
     def test_get_cpu_power_from_registry(self):
@@ -260,3 +446,30 @@ class TestTDP(unittest.TestCase):
         self.assertIsNone(
             tdp._get_matching_cpu(model, cpu_data, greedy=False),
         )
+
+
+class TestCPUModelMatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.names = ("Intel Xeon E5-2630", "AMD Ryzen 5 3600", "Intel Xeon E5-2630 v4")
+
+    def test_direct_match(self):
+        matcher = CPUModelMatcher(self.names)
+        self.assertEqual(matcher.match("intel xeon e5-2630"), "Intel Xeon E5-2630")
+
+    def test_token_set_match(self):
+        matcher = CPUModelMatcher(self.names)
+        self.assertEqual(
+            matcher.match("AMD Ryzen 5 3600 6-Core Processor"), "AMD Ryzen 5 3600"
+        )
+        # Subset of two names
+        self.assertIsNone(matcher.match("Xeon E5-2630"))
+        self.assertEqual(matcher.match("Xeon E5-2630", greedy=True), self.names[0])
+        self.assertIsNone(matcher.match("Intel Core i7"))
+        self.assertIsNone(matcher.match(""))
+
+    def test_memoized(self):
+        matcher = CPUModelMatcher(self.names)
+        with mock.patch.object(matcher, "_match", wraps=matcher._match) as match_mock:
+            for _ in range(3):
+                matcher.match("AMD Ryzen 5 3600 6-Core Processor")
+        self.assertEqual(match_mock.call_count, 1)
@@ -0,0 +1,186 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from codecarbon.core import csv_index
+from codecarbon.core.csv_index import IndexedCSVFile
+
+FIELDNAMES = ["run_id", "duration", "emissions"]
+
+
+class TestIndexedCSVFile(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "emissions.csv")
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def open_csv(self):
+        return IndexedCSVFile(self.path, FIELDNAMES, padding_column="duration")
+
+    def read_rows(self):
+        # The readers strip the padding of the numeric values
+        with open(self.path, newline="") as f:
+            return [[value.strip() for value in row] for row in csv.reader(f) if row]
+
+    def test_update_in_place(self):
+        csv_file = self.open_csv()
+        csv_file.write("run-1", ["run-1", 1, 0.1])
+        csv_file.write("run-2", ["run-2", 1, 0.2])
+        size = os.path.getsize(self.path)
+        with mock.patch.object(csv_file, "_add") as add:
+            csv_file.write("run-1", ["run-1", 2, 0.3])
+            # The values grow and shrink within the padding of the row
+            csv_file.write("run-2", ["run-2", 2.000123456789, 0.2123456789012345])
+            csv_file.write("run-2", ["run-2", 3, 0.2])
+        csv_file.close()
+
+        add.assert_not_called()
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual(
+            self.read_rows(),
+            [FIELDNAMES, ["run-1", "2", "0.3"], ["run-2", "3", "0.2"]],
+        )
+        df = pd.read_csv(self.path)
+        self.assertEqual(list(df.duration), [2, 3])
+        self.assertEqual(list(df.emissions), [0.3, 0.2])
+
+    def test_floats_updated_in_place(self):
+        fieldnames = ["run_id", "duration"] + [f"energy_{i}" for i in range(15)]
+        csv_file = IndexedCSVFile(self.path, fieldnames, padding_column="duration")
+        rng = random.Random(0)
+        csv_file.write("run-1", ["run-1", 15.0] + [rng.random() for _ in range(15)])
+        size = os.path.getsize(self.path)
+        with mock.patch.object(csv_file, "_add") as add:
+            for flush in range(1, 200):
+                csv_file.write(
+                    "run-1",
+                    ["run-1", flush * 15.0] + [rng.random() * flush for _ in range(15)],
+                )
+        csv_file.close()
+
+        add.assert_not_called()
+        self.assertEqual(os.path.getsize(self.path), size)
+        df = pd.read_csv(self.path)
+        self.assertEqual(df.duration.dtype, float)
+        self.assertEqual(list(df.duration), [199 * 15.0])
+
+    def test_rows_moved_when_they_outgrow_their_slot(self):
+        csv_file = self.open_csv()
+        csv_file.write("run-1", ["run-1", 1, 0.1])
+        csv_file.write("run-2", ["run-2", 1, 0.2])
+        csv_file.write("run-3", ["run-3", 1, 0.3])
+        csv_file.write("run-1", ["run-1", 2, "x" * 200])
+        csv_file.write("run-2", ["run-2", 2, 0.25])
+        csv_file.write("run-1", ["run-1", 3, "y"])
+        csv_file.write("run-3", ["run-3", 2, 0.35])
+        csv_file.close()
+
+        self.assertEqual(
+            self.read_rows(),
+            [
+                FIELDNAMES,
+                ["run-2", "2", "0.25"],
+                ["run-3", "2", "0.35"],
+                ["run-1", "3", "y"],
+            ],
+        )
+        # The index follows the moved rows
+        csv_file = self.open_csv()
+        with mock.patch.object(csv_file, "_rebuild") as rebuild:
+            csv_file.write("run-1", ["run-1", 4, "z"])
+        csv_file.close()
+        rebuild.assert_not_called()
+        self.assertEqual(self.read_rows()[3], ["run-1", "4", "z"])
+
+    def test_compaction(self):
+        csv_file = self.open_csv()
+        csv_file.write("run-1", ["run-1", 1, 0.1])
+        csv_file.write("run-2", ["run-2", 1, 0.2])
+        with mock.patch.object(csv_file, "_compact") as compact:
+            for length in (200, 400, 600, 800):
+                csv_file.write("run-2", ["run-2", 2, "y" * length])
+        # Compacted once the blank lines make more than half of the file
+        compact.assert_not_called()
+        with mock.patch.object(csv_index, "COMPACT_MIN_SIZE", 0):
+            csv_file.write("run-2", ["run-2", 3, "y" * 1000])
+        csv_file.write("run-1", ["run-1", 3, 0.15])
+        csv_file.close()
+
+        # No blank lines are left, the index follows the moved rows
+        with open(self.path, newline="") as f:
+            rows = [[value.strip() for value in row] for row in csv.reader(f)]
+        self.assertEqual(
+            rows,
+            [FIELDNAMES, ["run-1", "3", "0.15"], ["run-2", "3", "y" * 1000]],
+        )
+
+    def test_blank_lines_of_previous_versions_reused(self):
+        with open(self.path, "w") as f:
+            f.write("run_id,duration,emissions\nrun-1,1,0.1\n\n\n\nrun-2,1,0.2\n\n")
+        csv_file = self.open_csv()
+        csv_file.write("run-1", ["run-1", 2, 0.15])
+        csv_file.write("run-2", ["run-2", 2, 0.25])
+        csv_file.close()
+
+        with open(self.path, newline="") as f:
+            rows = [[value.strip() for value in row] for row in csv.reader(f)]
+        self.assertEqual(
+            rows, [FIELDNAMES, ["run-1", "2", "0.15"], ["run-2", "2", "0.25"]]
+        )
+
+    def test_without_padding_column(self):
+        csv_file = IndexedCSVFile(self.path, FIELDNAMES)
+        csv_file.write("run-1", ["run-1", 1, 0.1])
+        csv_file.write("run-1", ["run-1", 2, 0.2])
+        csv_file.close()
+
+        with open(self.path, newline="") as f:
+            self.assertEqual(list(csv.reader(f)), [FIELDNAMES, ["run-1", "2", "0.2"]])
+
+    def test_shared_file(self):
+        first = self.open_csv()
+        second = self.open_csv()
+        first.write("run-1", ["run-1", 1, 0.1])
+        second.write("run-2", ["run-2", 1, 0.2])
+        first.write("run-2", ["run-2", 2, "x" * 200])
+        second.write("run-1", ["run-1", 2, 0.15])
+        first.close()
+        second.close()
+
+        self.assertEqual(
+            sorted(self.read_rows()[1:]),
+            [["run-1", "2", "0.15"], ["run-2", "2", "x" * 200]],
+        )
+
+    def test_existing_file_without_index(self):
+        with open(self.path, "w") as f:
+            f.write("run_id,duration,emissions\nrun-1,1,0.1\nrun-2,1,0.2")
+        csv_file = self.open_csv()
+        csv_file.write("run-1", ["run-1", 2, 0.15])
+        csv_file.write("run-3", ["run-3", 1, 0.3])
+        csv_file.close()
+
+        self.assertEqual(
+            sorted(self.read_rows()[1:]),
+            [["run-1", "2", "0.15"], ["run-2", "1", "0.2"], ["run-3", "1", "0.3"]],
+        )
+
+    def test_file_modified_without_index(self):
+        csv_file = self.open_csv()
+        csv_file.write("run-1", ["run-1", 1, 0.1])
+        with open(self.path, "a") as f:
+            f.write("run-2,1,0.2\n")
+        csv_file.write("run-2", ["run-2", 2, 0.25])
+        csv_file.close()
+
+        self.assertEqual(
+            sorted(self.read_rows()[1:]),
+            [["run-1", "1", "0.1"], ["run-2", "2", "0.25"]],
+        )
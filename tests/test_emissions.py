@@ -1,9 +1,10 @@
 import unittest
+from unittest import mock
 
 from codecarbon.core.emissions import Emissions
 from codecarbon.core.units import Energy
 from codecarbon.external.geography import CloudMetadata, GeoMetadata
-from codecarbon.input import DataSource
+from codecarbon.input import DataSource, clear_reference_data_cache
 from tests.testutils import get_test_data_source
 
 
@@ -175,3 +176,37 @@ class TestEmissions(unittest.TestCase):
         )
         assert isinstance(emissions, float)
         self.assertAlmostEqual(emissions, 0.475, places=2)
+
+    def test_cloud_lookups(self):
+        cloud = CloudMetadata(provider="gcp", region="us-central1")
+        self.assertEqual(self._emissions.get_cloud_country_name(cloud), "USA")
+        self.assertEqual(self._emissions.get_cloud_country_iso_code(cloud), "USA")
+        self.assertEqual(self._emissions.get_cloud_geo_region(cloud), "Iowa")
+        with self.assertRaises(ValueError):
+            self._emissions.get_cloud_emissions(
+                Energy.from_energy(kWh=1),
+                CloudMetadata(provider="gcp", region="unknown-region"),
+            )
+
+    def test_reference_data_read_once(self):
+        clear_reference_data_cache()
+        cloud = CloudMetadata(provider="aws", region="us-east-1")
+        geo = GeoMetadata(country_iso_code="JOR", country_name="Jordan")
+        energy = Energy.from_energy(kWh=1)
+        expected = (
+            self._emissions.get_cloud_emissions(energy, cloud),
+            self._emissions.get_country_emissions(energy, geo),
+        )
+        with mock.patch("builtins.open") as mocked_open, mock.patch(
+            "pandas.read_csv"
+        ) as mocked_read_csv:
+            emissions = Emissions(DataSource())
+            self.assertEqual(
+                (
+                    emissions.get_cloud_emissions(energy, cloud),
+                    emissions.get_country_emissions(energy, geo),
+                ),
+                expected,
+            )
+            mocked_open.assert_not_called()
+            mocked_read_csv.assert_not_called()
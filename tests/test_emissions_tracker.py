@@ -16,7 +16,7 @@ from codecarbon.emissions_tracker import (
     track_emissions,
 )
 from codecarbon.external.geography import CloudMetadata
-from tests.testdata import GEO_METADATA_CANADA, TWO_GPU_DETAILS_RESPONSE
+from tests.testdata import GEO_METADATA_CANADA, TWO_GPU_SAMPLER_CONFIG
 from tests.testutils import get_custom_mock_open, get_test_data_source
 
 
@@ -30,10 +30,7 @@ empty_conf = "[codecarbon]"
 
 
 @mock.patch("codecarbon.core.gpu.is_gpu_details_available", return_value=True)
-@mock.patch(
-    "codecarbon.external.hardware.get_gpu_details",
-    return_value=TWO_GPU_DETAILS_RESPONSE,
-)
+@mock.patch("codecarbon.core.gpu.GpuSampler", **TWO_GPU_SAMPLER_CONFIG)
 @mock.patch(
     "codecarbon.emissions_tracker.EmissionsTracker._get_cloud_metadata",
     return_value=CloudMetadata(provider=None, region=None),
@@ -64,8 +61,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # GIVEN
@@ -83,8 +80,8 @@ class TestCarbonTracker(unittest.TestCase):
 
         # THEN
         self.assertGreaterEqual(
-            mocked_get_gpu_details.call_count, 2
-        )  # at least 2 times in 5 seconds + once for init >= 3
+            mocked_gpu_sampler.return_value.get_energy_deltas.call_count, 2
+        )  # at least 2 times in 3 seconds
         self.assertEqual(1, mocked_is_gpu_details_available.call_count)
         self.assertEqual(1, len(responses.calls))
         self.assertEqual(
@@ -93,14 +90,14 @@ class TestCarbonTracker(unittest.TestCase):
         self.assertIsInstance(emissions, float)
         self.assertAlmostEqual(emissions, 6.262572537957655e-05, places=2)
 
-    @mock.patch("codecarbon.external.geography.requests.get")
+    @mock.patch("requests.get")
     def test_carbon_tracker_timeout(
         self,
         mocked_requests_get,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # GIVEN
@@ -126,8 +123,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
 
@@ -145,8 +142,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
 
@@ -165,8 +162,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
 
@@ -193,8 +190,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # GIVEN
@@ -219,8 +216,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # WHEN
@@ -235,8 +232,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # GIVEN
@@ -257,8 +254,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # GIVEN
@@ -279,8 +276,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         tracker = OfflineEmissionsTracker(
@@ -299,8 +296,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         tracker = OfflineEmissionsTracker(
@@ -329,8 +326,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         tracker = OfflineEmissionsTracker(
@@ -364,8 +361,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         # GIVEN
@@ -382,8 +379,8 @@ class TestCarbonTracker(unittest.TestCase):
 
         # THEN
         self.assertGreaterEqual(
-            mocked_get_gpu_details.call_count, 2
-        )  # at least 2 times in 5 seconds + once for init >= 3
+            mocked_gpu_sampler.return_value.get_energy_deltas.call_count, 2
+        )  # at least 2 times in 3 seconds
         self.assertEqual(1, mocked_is_gpu_details_available.call_count)
         self.assertEqual(1, len(responses.calls))
         self.assertEqual(
@@ -397,8 +394,8 @@ class TestCarbonTracker(unittest.TestCase):
         self,
         mock_setup_intel_cli,
         mock_log_values,
-        mocked_get_gpu_details,
         mocked_env_cloud_details,
+        mocked_gpu_sampler,
         mocked_is_gpu_details_available,
     ):
         with OfflineEmissionsTracker(
@@ -15,10 +15,10 @@ from tests.testdata import (
 
 class TestCloudMetadata(unittest.TestCase):
     @mock.patch(
-        "codecarbon.external.geography.get_env_cloud_details",
-        return_value=CLOUD_METADATA_AWS,
+        "codecarbon.external.geography.probe_env_cloud_details",
+        return_value=(CLOUD_METADATA_AWS, False),
     )
-    def test_cloud_metadata_AWS(self, mock_get_env_cloud_details):
+    def test_cloud_metadata_AWS(self, mock_probe_env_cloud_details):
         # WHEN
         cloud = CloudMetadata.from_utils()
 
@@ -27,10 +27,10 @@ class TestCloudMetadata(unittest.TestCase):
         self.assertEqual("us-east-1", cloud.region)
 
     @mock.patch(
-        "codecarbon.external.geography.get_env_cloud_details",
-        return_value=CLOUD_METADATA_AZURE,
+        "codecarbon.external.geography.probe_env_cloud_details",
+        return_value=(CLOUD_METADATA_AZURE, False),
     )
-    def test_cloud_metadata_AZURE(self, mock_get_env_cloud_details):
+    def test_cloud_metadata_AZURE(self, mock_probe_env_cloud_details):
         # WHEN
         cloud = CloudMetadata.from_utils()
 
@@ -39,10 +39,10 @@ class TestCloudMetadata(unittest.TestCase):
         self.assertEqual("eastus", cloud.region)
 
     @mock.patch(
-        "codecarbon.external.geography.get_env_cloud_details",
-        return_value=CLOUD_METADATA_GCP,
+        "codecarbon.external.geography.probe_env_cloud_details",
+        return_value=(CLOUD_METADATA_GCP, False),
     )
-    def test_cloud_metadata_GCP(self, mock_get_env_cloud_details):
+    def test_cloud_metadata_GCP(self, mock_probe_env_cloud_details):
         # WHEN
         cloud = CloudMetadata.from_utils()
 
@@ -172,6 +172,94 @@ class TestGpu(FakeGPUEnv):
         assert get_gpu_details() == expected_power_limit
 
 
+class TestGpuSampler(FakeGPUEnv):
+    def test_init_once(self):
+        import pynvml
+
+        from codecarbon.core.gpu import GpuSampler
+
+        sampler = GpuSampler()
+        sampler.get_power_usages()
+        sampler.get_energy_deltas()
+        sampler.get_static_info()
+
+        assert sampler.num_gpus == 2
+        assert pynvml.INIT_MOCK.call_count == 1
+
+    def test_power_usages(self):
+        from codecarbon.core.gpu import GpuSampler
+
+        assert GpuSampler().get_power_usages() == [26, 29]
+
+    def test_static_info_cached(self):
+        import pynvml
+
+        from codecarbon.core.gpu import GpuSampler, get_gpu_static_info
+
+        sampler = GpuSampler()
+        expected = get_gpu_static_info()
+        assert sampler.get_static_info() == expected
+
+        pynvml.DETAILS["handle_0"]["name"] = b"Changed"
+        assert sampler.get_static_info() == expected
+
+    def test_energy_deltas(self):
+        import pynvml
+
+        from codecarbon.core.gpu import GpuSampler
+
+        pynvml.DETAILS["handle_0"]["total_energy"] = 1000
+        sampler = GpuSampler()
+        sampler.start()
+        pynvml.DETAILS["handle_0"]["total_energy"] = 4600
+
+        # handle_1 has no energy counter
+        assert sampler.get_energy_deltas() == [3600, None]
+        assert sampler.get_energy_deltas() == [0, None]
+
+    def test_gpu_hardware_energy_from_counters(self):
+        import pynvml
+
+        from codecarbon.core.gpu import GpuSampler
+        from codecarbon.external.hardware import GPU
+
+        pynvml.DETAILS["handle_0"]["total_energy"] = 1000
+        pynvml.DETAILS["handle_1"]["total_energy"] = 2000
+        gpu = GPU(num_gpus=2, gpu_ids=None, sampler=GpuSampler())
+        gpu.start()
+        # 3.6e6 mJ = 3600 J = 1 Wh
+        pynvml.DETAILS["handle_0"]["total_energy"] = 1000 + 3600000
+        pynvml.DETAILS["handle_1"]["total_energy"] = 2000 + 3600000
+
+        power, energy = gpu.measure_power_and_energy(last_duration=3600)
+        assert round(energy.kWh, 6) == 0.002
+        assert round(power.W, 3) == 2
+        # Not sampled, the energy counters cover the whole interval
+        assert gpu.sample_power() is None
+
+    def test_gpu_hardware_energy_from_power(self):
+        from codecarbon.core.gpu import GpuSampler
+        from codecarbon.external.hardware import GPU
+
+        gpu = GPU(num_gpus=2, gpu_ids=[1], sampler=GpuSampler())
+        gpu.start()
+
+        power, energy = gpu.measure_power_and_energy(last_duration=3600)
+        # 29 mW during one hour
+        assert round(power.W, 3) == 0.029
+        assert round(energy.kWh, 9) == 0.000029
+        assert gpu.sample_power() is not None
+
+    def test_gpu_hardware_repr(self):
+        from codecarbon.core.gpu import GpuSampler
+        from codecarbon.external.hardware import GPU
+
+        assert repr(GPU(num_gpus=2, gpu_ids=[1])) == "GPU() (1 GPUs)"
+        assert "GeForce GTX 1080" in repr(
+            GPU(num_gpus=2, gpu_ids=None, sampler=GpuSampler())
+        )
+
+
 class TestGpuNotAvailable(object):
     def setup_method(self):
         self.old_sys_path = copy(sys.path)
@@ -2,23 +2,20 @@ import unittest
 from unittest import mock
 
 from codecarbon.external.hardware import GPU
-from tests.testdata import TWO_GPU_DETAILS_RESPONSE
+from tests.testdata import TWO_GPU_SAMPLER_CONFIG
 
 
 @mock.patch("codecarbon.core.gpu.is_gpu_details_available", return_value=True)
-@mock.patch(
-    "codecarbon.external.hardware.get_gpu_details",
-    return_value=TWO_GPU_DETAILS_RESPONSE,
-)
+@mock.patch("codecarbon.core.gpu.GpuSampler", **TWO_GPU_SAMPLER_CONFIG)
 class TestGPUMetadata(unittest.TestCase):
     def test_gpu_metadata_total_power(
-        self, mocked_get_gpu_details, mocked_is_gpu_details_available
+        self, mocked_gpu_sampler, mocked_is_gpu_details_available
     ):
         gpu = GPU.from_utils()
         self.assertAlmostEqual(0.074318, gpu.total_power().kW, places=2)
 
     def test_gpu_metadata_one_gpu_power(
-        self, mocked_get_gpu_details, mocked_is_gpu_details_available
+        self, mocked_gpu_sampler, mocked_is_gpu_details_available
     ):
         gpu = GPU.from_utils()
         self.assertAlmostEqual(
@@ -0,0 +1,15 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestImports(unittest.TestCase):
+    def test_heavy_modules_not_imported(self):
+        # Run in a fresh interpreter: the tests have already imported everything
+        heavy_modules = ["pandas", "numpy", "requests", "pkg_resources", "pynvml"]
+        code = (
+            "import sys, codecarbon\n"
+            + f"print(','.join(m for m in {heavy_modules!r} if m in sys.modules))"
+        )
+        output = subprocess.check_output([sys.executable, "-c", code])
+        self.assertEqual(output.decode().strip(), "")
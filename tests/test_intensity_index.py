@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from codecarbon.core.emissions import Emissions
+from codecarbon.core.intensity_index import (
+    CarbonIntensityIndex,
+    compute_carbon_intensities,
+    write_carbon_intensity_index,
+)
+from codecarbon.core.units import Energy
+from codecarbon.external.geography import CloudMetadata, GeoMetadata
+from codecarbon.input import DataSource
+
+
+class TestCarbonIntensityIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._tmp_dir.name, "index.bin")
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def test_write_and_read(self):
+        intensities = {"country/FRA": 55.0, "cloud/gcp/us-central1": 105.4, "a": 1.5}
+        write_carbon_intensity_index(intensities, self._path)
+        index = CarbonIntensityIndex(self._path)
+        self.assertEqual(len(index), 3)
+        for key, value in intensities.items():
+            self.assertEqual(index.get(key), value)
+        self.assertIsNone(index.get("country/AAA"))
+        self.assertIsNone(index.get(""))
+        self.assertEqual(dict(index.items()), intensities)
+
+    def test_invalid_file(self):
+        with open(self._path, "wb") as f:
+            f.write(b"not an index")
+        with self.assertRaises(ValueError):
+            CarbonIntensityIndex(self._path)
+
+    def test_shipped_index_is_up_to_date(self):
+        # Rebuild with `make carbon-intensity-index` when this fails
+        data_source = DataSource()
+        expected = compute_carbon_intensities(data_source)
+        index = CarbonIntensityIndex(data_source.carbon_intensity_index_path)
+        self.assertEqual(dict(index.items()), expected)
+
+    def test_same_emissions_without_index(self):
+        energy = Energy.from_energy(kWh=1)
+        cloud = CloudMetadata(provider="aws", region="us-east-1")
+        geos = [
+            GeoMetadata(country_iso_code="FRA", country_name="France"),
+            GeoMetadata(country_iso_code="JOR", country_name="Jordan"),
+            GeoMetadata(
+                country_iso_code="USA", country_name="United States", region="illinois"
+            ),
+        ]
+        with_index = Emissions(DataSource())
+        with mock.patch.object(
+            DataSource, "get_carbon_intensity_index", return_value=None
+        ):
+            without_index = Emissions(DataSource())
+            self.assertAlmostEqual(
+                with_index.get_cloud_emissions(energy, cloud),
+                without_index.get_cloud_emissions(energy, cloud),
+            )
+            for geo in geos:
+                self.assertAlmostEqual(
+                    with_index.get_private_infra_emissions(energy, geo),
+                    without_index.get_private_infra_emissions(energy, geo),
+                )
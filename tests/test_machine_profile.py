@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from codecarbon.core.machine_profile import MachineProfile
+from codecarbon.emissions_tracker import EmissionsTracker, OfflineEmissionsTracker
+from codecarbon.external.geography import CloudMetadata
+from codecarbon.external.hardware import RAM
+
+
+class TestMachineProfile(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._cache_dir = self._tmp_dir.name
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def test_detect_once(self):
+        detect = mock.Mock(return_value=["Intel(R) Xeon(R) CPU @ 2.20GHz", 40])
+        profile = MachineProfile({"a": 1}, cache_dir=self._cache_dir)
+        self.assertEqual(profile.get_or_detect("cpu_tdp", detect), detect.return_value)
+        profile.save()
+
+        profile = MachineProfile({"a": 1}, cache_dir=self._cache_dir)
+        self.assertEqual(profile.get_or_detect("cpu_tdp", detect), detect.return_value)
+        self.assertEqual(detect.call_count, 1)
+
+    def test_config_in_key(self):
+        first = MachineProfile({"a": 1}, cache_dir=self._cache_dir)
+        second = MachineProfile({"a": 2}, cache_dir=self._cache_dir)
+        self.assertNotEqual(first.path, second.path)
+
+    def test_expired(self):
+        profile = MachineProfile({}, cache_dir=self._cache_dir)
+        profile.set("cpu_count", 4)
+        profile.save()
+        old = time.time() - 3600
+        os.utime(profile.path, (old, old))
+
+        self.assertEqual(
+            MachineProfile({}, cache_dir=self._cache_dir, max_age=7200).get(
+                "cpu_count"
+            ),
+            4,
+        )
+        self.assertIsNone(
+            MachineProfile({}, cache_dir=self._cache_dir, max_age=60).get("cpu_count")
+        )
+
+    def test_invalid_file(self):
+        profile = MachineProfile({}, cache_dir=self._cache_dir)
+        with open(profile.path, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(MachineProfile({}, cache_dir=self._cache_dir).get("a"))
+
+    def test_tracker_reuses_profile(self):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self._cache_dir}):
+            with mock.patch(
+                "codecarbon.emissions_tracker.count_cpus", return_value=3
+            ) as count_cpus:
+                for _ in range(2):
+                    tracker = OfflineEmissionsTracker(
+                        country_iso_code="FRA",
+                        save_to_file=False,
+                        cache_machine_profile=True,
+                    )
+                    self.assertEqual(tracker._conf["cpu_count"], 3)
+            self.assertEqual(count_cpus.call_count, 1)
+            self.assertTrue(os.path.isfile(tracker._machine_profile.path))
+
+    def test_tracker_reuses_ram_total_size(self):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self._cache_dir}):
+            OfflineEmissionsTracker(
+                country_iso_code="FRA", save_to_file=False, cache_machine_profile=True
+            )
+            with mock.patch(
+                "codecarbon.external.hardware.psutil.virtual_memory"
+            ) as virtual_memory:
+                tracker = OfflineEmissionsTracker(
+                    country_iso_code="FRA",
+                    save_to_file=False,
+                    cache_machine_profile=True,
+                )
+                ram = next(h for h in tracker._hardware if isinstance(h, RAM))
+                self.assertEqual(ram.machine_memory_GB, tracker._conf["ram_total_size"])
+            virtual_memory.assert_not_called()
+
+    def test_tracker_reuses_cloud_metadata_unless_timed_out(self):
+        timed_out = CloudMetadata(provider=None, region=None, timed_out=True)
+        on_premise = CloudMetadata(provider=None, region=None)
+        with mock.patch.dict(
+            os.environ, {"XDG_CACHE_HOME": self._cache_dir}
+        ), mock.patch.object(
+            CloudMetadata, "from_utils", side_effect=[timed_out, on_premise]
+        ) as from_utils, mock.patch.object(
+            EmissionsTracker, "_get_geo_metadata"
+        ):
+            for _ in range(3):
+                tracker = EmissionsTracker(
+                    save_to_file=False, cache_machine_profile=True
+                )
+            # Detected again after a timeout, not after an on premise result
+            self.assertEqual(from_utils.call_count, 2)
+            self.assertTrue(tracker._get_cloud_metadata().is_on_private_infra)
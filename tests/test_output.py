@@ -0,0 +1,393 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from codecarbon.emissions_tracker import OfflineEmissionsTracker
+from codecarbon.output import (
+    ColumnarOutput,
+    EmissionsData,
+    FileOutput,
+    SQLiteOutput,
+    read_emissions,
+)
+
+
+def get_emissions_data(run_id="run-1", duration=1.5) -> EmissionsData:
+    return EmissionsData(
+        timestamp="2021-04-04T08:43:00",
+        project_name="codecarbon",
+        run_id=run_id,
+        duration=duration,
+        emissions=2.0,
+        emissions_rate=2.0,
+        cpu_power=3.0,
+        gpu_power=0,
+        ram_power=0.15,
+        cpu_energy=2,
+        gpu_energy=0,
+        ram_energy=1,
+        energy_consumed=3.0,
+        country_name="France",
+        country_iso_code="FRA",
+        region="",
+        cloud_provider="",
+        cloud_region="",
+        os="Linux",
+        python_version="3.8.0",
+        cpu_count=12,
+        cpu_model="Intel",
+        gpu_count=0,
+        gpu_model="",
+        longitude=2.35,
+        latitude=48.85,
+        ram_total_size=16.0,
+        tracking_mode="machine",
+    )
+
+
+class TestFileOutput(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp_dir.name, "emissions.csv")
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def test_append(self):
+        output = FileOutput(self.path)
+        for i in range(3):
+            output.out(get_emissions_data(duration=i))
+        output.close()
+
+        df = pd.read_csv(self.path)
+        self.assertEqual(list(df.columns), list(get_emissions_data().values.keys()))
+        self.assertEqual(list(df.duration), [0, 1, 2])
+        self.assertTrue(df.rapl_core_energy.isna().all())
+
+    def test_append_checks_headers_once(self):
+        output = FileOutput(self.path)
+        output.out(get_emissions_data())
+        with mock.patch.object(
+            output, "has_valid_headers", wraps=output.has_valid_headers
+        ) as has_valid_headers:
+            for _ in range(10):
+                output.out(get_emissions_data())
+        output.close()
+
+        has_valid_headers.assert_not_called()
+        self.assertEqual(len(pd.read_csv(self.path)), 11)
+
+    def test_append_to_existing_file(self):
+        FileOutput(self.path).out(get_emissions_data(run_id="run-1"))
+        FileOutput(self.path).out(get_emissions_data(run_id="run-2"))
+
+        self.assertEqual(list(pd.read_csv(self.path).run_id), ["run-1", "run-2"])
+
+    def test_invalid_headers_backup(self):
+        with open(self.path, "w") as f:
+            f.write("project_name,timestamp\nold,2021-04-04T08:43:00\n")
+        output = FileOutput(self.path)
+        output.out(get_emissions_data())
+        output.close()
+
+        self.assertTrue(os.path.isfile(self.path + ".bak"))
+        self.assertEqual(len(pd.read_csv(self.path)), 1)
+
+    def test_headers_of_a_previous_version_migrated(self):
+        fieldnames = list(get_emissions_data().values.keys())
+        previous = get_emissions_data(run_id="run-1")
+        with open(self.path, "w") as f:
+            f.write(",".join(fieldnames[:-3]) + "\n")
+            f.write(",".join(str(v) for v in list(previous.values.values())[:-3]))
+            f.write("\n")
+        data = get_emissions_data(run_id="run-2")
+        data.ram_power_p95 = 0.2
+        output = FileOutput(self.path)
+        output.out(data)
+        output.close()
+
+        self.assertFalse(os.path.isfile(self.path + ".bak"))
+        df = pd.read_csv(self.path)
+        self.assertEqual(list(df.columns), fieldnames)
+        self.assertEqual(list(df.run_id), ["run-1", "run-2"])
+        self.assertTrue(pd.isna(df.ram_power_p95[0]))
+        self.assertEqual(df.ram_power_p95[1], 0.2)
+
+    def test_tracker_saves_to_csv_without_pyarrow(self):
+        with mock.patch.object(ColumnarOutput, "is_available", return_value=False):
+            tracker = OfflineEmissionsTracker(
+                country_iso_code="FRA",
+                output_dir=self._tmp_dir.name,
+                output_format="parquet",
+            )
+        tracker.start()
+        emissions = tracker.stop()
+
+        self.assertIsNotNone(emissions)
+        self.assertEqual(list(pd.read_csv(self.path).run_id), [str(tracker.run_id)])
+
+    def test_file_removed_between_appends(self):
+        output = FileOutput(self.path)
+        output.out(get_emissions_data(run_id="run-1"))
+        os.remove(self.path)
+        output.out(get_emissions_data(run_id="run-2"))
+        output.close()
+
+        self.assertEqual(list(pd.read_csv(self.path).run_id), ["run-2"])
+
+    def test_concurrent_appends(self):
+        outputs = [FileOutput(self.path) for _ in range(4)]
+
+        def append(output):
+            for _ in range(25):
+                output.out(get_emissions_data())
+
+        threads = [threading.Thread(target=append, args=(o,)) for o in outputs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for output in outputs:
+            output.close()
+
+        df = pd.read_csv(self.path)
+        self.assertEqual(len(df), 100)
+        self.assertTrue((df.project_name == "codecarbon").all())
+
+    def test_update(self):
+        output = FileOutput(self.path, on_csv_write="update")
+        output.out(get_emissions_data(run_id="run-1", duration=1))
+        output.out(get_emissions_data(run_id="run-2", duration=1))
+        output.out(get_emissions_data(run_id="run-1", duration=2))
+
+        df = pd.read_csv(self.path)
+        self.assertEqual(list(df.run_id), ["run-1", "run-2"])
+        self.assertEqual(list(df.duration), [2, 1])
+
+    def test_update_in_place(self):
+        output = FileOutput(self.path, on_csv_write="update")
+        output.out(get_emissions_data(run_id="run-1", duration=1))
+        output.out(get_emissions_data(run_id="run-2", duration=1))
+        size = os.path.getsize(self.path)
+        with mock.patch("pandas.read_csv") as read_csv:
+            for duration in range(2, 10):
+                output.out(get_emissions_data(run_id="run-1", duration=duration))
+        output.close()
+
+        read_csv.assert_not_called()
+        self.assertEqual(os.path.getsize(self.path), size)
+        df = pd.read_csv(self.path)
+        self.assertEqual(list(df.duration), [9, 1])
+
+
+class TestColumnarOutput(unittest.TestCase):
+    def setUp(self) -> None:
+        pytest.importorskip("pyarrow")
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self._tmp_dir.name, "emissions")
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def list_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.output_dir)
+            for root, _, names in os.walk(self.output_dir)
+            for name in names
+        )
+
+    def test_partitions(self):
+        output = ColumnarOutput(self.output_dir)
+        output.out(get_emissions_data(run_id="run-1"))
+        data = get_emissions_data(run_id="run-2")
+        data.project_name = "other/project"
+        data.timestamp = "2021-04-05T00:00:01"
+        output.out(data)
+        self.assertEqual(self.list_files(), [])
+        output.close()
+
+        files = self.list_files()
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].startswith(os.path.join("codecarbon", "2021-04-04")))
+        self.assertTrue(
+            files[1].startswith(os.path.join("other%2Fproject", "2021-04-05"))
+        )
+        df = read_emissions(self.output_dir).sort_values("run_id")
+        self.assertEqual(list(df.run_id), ["run-1", "run-2"])
+        self.assertEqual(list(df.project_name), ["codecarbon", "other/project"])
+        self.assertEqual(df.duration.dtype, "float64")
+        self.assertEqual(list(df.columns), list(data.values.keys()))
+
+    def test_flush_by_rows(self):
+        output = ColumnarOutput(self.output_dir, max_rows=3)
+        for i in range(7):
+            output.out(get_emissions_data(duration=i))
+        self.assertEqual(len(self.list_files()), 2)
+        output.close()
+
+        self.assertEqual(len(self.list_files()), 3)
+        df = read_emissions(self.output_dir)
+        self.assertEqual(sorted(df.duration), list(range(7)))
+
+    def test_flush_by_time(self):
+        output = ColumnarOutput(self.output_dir, max_seconds=60)
+        output.out(get_emissions_data())
+        with mock.patch("time.monotonic", return_value=time.monotonic() + 61):
+            output.out(get_emissions_data())
+        self.assertEqual(len(self.list_files()), 1)
+
+    def test_arrow(self):
+        output = ColumnarOutput(self.output_dir, file_format="arrow")
+        output.out(get_emissions_data())
+        output.close()
+
+        (file_name,) = self.list_files()
+        self.assertTrue(file_name.endswith(".arrow"))
+        self.assertEqual(len(read_emissions(self.output_dir)), 1)
+        self.assertEqual(
+            len(read_emissions(os.path.join(self.output_dir, file_name))), 1
+        )
+
+    def test_read_csv(self):
+        path = os.path.join(self._tmp_dir.name, "emissions.csv")
+        output = FileOutput(path)
+        output.out(get_emissions_data())
+        output.close()
+
+        self.assertEqual(len(read_emissions(path)), 1)
+
+    def test_tracker(self):
+        tracker = OfflineEmissionsTracker(
+            country_iso_code="FRA",
+            output_dir=self._tmp_dir.name,
+            output_format="parquet",
+        )
+        tracker.start()
+        tracker.stop()
+
+        df = read_emissions(self.output_dir)
+        self.assertEqual(list(df.run_id), [str(tracker.run_id)])
+
+    def test_tracker_flush(self):
+        tracker = OfflineEmissionsTracker(
+            country_iso_code="FRA",
+            output_dir=self._tmp_dir.name,
+            output_format="parquet",
+        )
+        tracker.start()
+        self.addCleanup(tracker.stop)
+        tracker.flush()
+
+        df = read_emissions(self.output_dir)
+        self.assertEqual(list(df.run_id), [str(tracker.run_id)])
+
+
+class TestSQLiteOutput(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self._tmp_dir.name, "emissions.db")
+
+    def tearDown(self) -> None:
+        self._tmp_dir.cleanup()
+
+    def test_append(self):
+        output = SQLiteOutput(self.db_path, max_rows=2)
+        for i in range(3):
+            output.out(get_emissions_data(duration=i))
+        self.assertEqual(len(read_emissions(self.db_path)), 2)
+        output.close()
+
+        df = read_emissions(self.db_path)
+        self.assertEqual(list(df.duration), [0, 1, 2])
+        self.assertEqual(list(df.columns), list(get_emissions_data().values.keys()))
+        connection = sqlite3.connect(self.db_path)
+        journal_mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        indexes = {row[1] for row in connection.execute("PRAGMA index_list(emissions)")}
+        connection.close()
+        self.assertEqual(journal_mode, "wal")
+        self.assertEqual(
+            indexes,
+            {"emissions_run_id", "emissions_project_name", "emissions_timestamp"},
+        )
+
+    def test_rows_kept_when_not_written(self):
+        output = SQLiteOutput(self.db_path, max_rows=2)
+        with mock.patch.object(
+            output, "_write", side_effect=sqlite3.OperationalError("locked")
+        ):
+            for i in range(2):
+                output.out(get_emissions_data(duration=i))
+        output.out(get_emissions_data(duration=2))
+        output.close()
+
+        self.assertEqual(list(read_emissions(self.db_path).duration), [0, 1, 2])
+
+    def test_expired_rows_written_at_measure(self):
+        output = SQLiteOutput(self.db_path, max_seconds=60)
+        output.out(get_emissions_data())
+        output.write_expired()
+        self.assertFalse(os.path.isfile(self.db_path))
+
+        output._first_row_time -= 60
+        output.write_expired()
+        self.assertEqual(len(read_emissions(self.db_path)), 1)
+        output.close()
+
+    def test_update(self):
+        output = SQLiteOutput(self.db_path, on_csv_write="update")
+        output.out(get_emissions_data(run_id="run-1", duration=1))
+        output.out(get_emissions_data(run_id="run-2", duration=1))
+        output.out(get_emissions_data(run_id="run-1", duration=2))
+        output.close()
+        output.out(get_emissions_data(run_id="run-2", duration=3))
+        output.close()
+
+        df = read_emissions(self.db_path)
+        self.assertEqual(list(df.run_id), ["run-1", "run-2"])
+        self.assertEqual(list(df.duration), [2, 3])
+
+    def test_tracker_flush(self):
+        tracker = OfflineEmissionsTracker(
+            country_iso_code="FRA",
+            output_dir=self._tmp_dir.name,
+            output_format="sqlite",
+        )
+        tracker.start()
+        self.addCleanup(tracker.stop)
+        tracker.flush()
+
+        df = read_emissions(self.db_path)
+        self.assertEqual(list(df.run_id), [str(tracker.run_id)])
+
+    def test_concurrent_writers(self):
+        outputs = [SQLiteOutput(self.db_path, max_rows=5) for _ in range(4)]
+
+        def write(output):
+            for _ in range(25):
+                output.out(get_emissions_data())
+            output.close()
+
+        threads = [threading.Thread(target=write, args=(o,)) for o in outputs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(read_emissions(self.db_path)), 100)
+
+    def test_table_from_previous_version(self):
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("CREATE TABLE emissions (timestamp TEXT, run_id TEXT)")
+        connection.close()
+        output = SQLiteOutput(self.db_path)
+        output.out(get_emissions_data())
+        output.close()
+
+        self.assertEqual(len(read_emissions(self.db_path)), 1)
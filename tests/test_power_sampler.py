@@ -0,0 +1,90 @@
+import time
+import unittest
+
+import numpy as np
+
+from codecarbon.core.units import Power
+from codecarbon.external.hardware import RAM
+from codecarbon.external.power_sampler import PowerRingBuffer, PowerSampler
+
+
+class FakeHardware:
+    def __init__(self, watts):
+        self.watts = watts
+
+    def sample_power(self):
+        return None if self.watts is None else Power.from_watts(self.watts)
+
+
+class TestPowerRingBuffer(unittest.TestCase):
+    def test_samples_are_ordered_after_wraparound(self):
+        buffer = PowerRingBuffer(4)
+        for i in range(6):
+            buffer.append(float(i), float(10 * i))
+        times, powers = buffer.samples()
+        self.assertEqual(len(buffer), 4)
+        np.testing.assert_array_equal(times, [2, 3, 4, 5])
+        np.testing.assert_array_equal(powers, [20, 30, 40, 50])
+
+    def test_trapezoidal_integration(self):
+        buffer = PowerRingBuffer(16)
+        # Power ramping from 0 W to 100 W in 10 s
+        for t in range(11):
+            buffer.append(float(t), 10.0 * t)
+        stats = buffer.power_stats(0, 10)
+        # Area of the triangle: 500 J
+        self.assertAlmostEqual(stats.energy.kWh, 500 / 3.6e6)
+        self.assertAlmostEqual(stats.mean.W, 50)
+        self.assertAlmostEqual(stats.min.W, 10)
+        self.assertAlmostEqual(stats.max.W, 90)
+        self.assertAlmostEqual(stats.p95.W, np.percentile(np.arange(10, 100, 10), 95))
+        self.assertEqual(stats.samples, 9)
+
+    def test_bounds_are_interpolated(self):
+        buffer = PowerRingBuffer(16)
+        buffer.append(0.0, 0.0)
+        buffer.append(4.0, 40.0)
+        # Between 1 s and 3 s the power goes from 10 W to 30 W
+        stats = buffer.power_stats(1, 3)
+        self.assertAlmostEqual(stats.energy.kWh, 40 / 3.6e6)
+        self.assertEqual(stats.samples, 0)
+        # Constant power after the last sample
+        stats = buffer.power_stats(4, 6)
+        self.assertAlmostEqual(stats.mean.W, 40)
+
+    def test_empty_buffer(self):
+        self.assertIsNone(PowerRingBuffer(4).power_stats(0, 10))
+
+
+class TestPowerSampler(unittest.TestCase):
+    def test_only_samplable_hardware_is_sampled(self):
+        sampled, not_sampled = FakeHardware(30), FakeHardware(None)
+        sampler = PowerSampler([sampled, not_sampled], frequency=100, window=1)
+        self.assertEqual(sampler.sampled_hardware, [sampled])
+        self.assertIsNone(sampler.get_power_stats(not_sampled, 0, time.time()))
+
+    def test_background_sampling(self):
+        hardware = FakeHardware(30)
+        sampler = PowerSampler([hardware], frequency=200, window=1)
+        start = time.time()
+        sampler.start()
+        time.sleep(0.2)
+        sampler.stop()
+        end = time.time()
+        stats = sampler.get_power_stats(hardware, start, end)
+        self.assertGreater(stats.samples, 5)
+        self.assertAlmostEqual(stats.mean.W, 30)
+        self.assertAlmostEqual(stats.energy.kWh, 30 * (end - start) / 3.6e6)
+
+    def test_hardware_uses_sampled_energy(self):
+        buffer = PowerRingBuffer(4)
+        buffer.append(0.0, 6.0)
+        buffer.append(10.0, 6.0)
+        stats = buffer.power_stats(0, 10)
+        ram = RAM(tracking_mode="machine")
+        power, energy = ram.measure_power_and_energy(
+            last_duration=10, power_stats=stats
+        )
+        self.assertEqual(power, stats.mean)
+        self.assertEqual(energy, stats.energy)
+        self.assertIsNotNone(ram.sample_power())
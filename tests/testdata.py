@@ -232,3 +232,23 @@ TWO_GPU_DETAILS_RESPONSE = [
         "graphics_processes": [],
     },
 ]
+
+# Configuration of a mocked codecarbon.external.hardware.GpuSampler
+# for the GPUs of TWO_GPU_DETAILS_RESPONSE, without energy counters
+TWO_GPU_SAMPLER_CONFIG = {
+    "return_value.num_gpus": len(TWO_GPU_DETAILS_RESPONSE),
+    "return_value.get_static_info.return_value": [
+        {
+            "name": details["name"],
+            "uuid": details["uuid"],
+            "total_memory": details["total_memory"],
+            "power_limit": details["power_limit"],
+            "gpu_index": i,
+        }
+        for i, details in enumerate(TWO_GPU_DETAILS_RESPONSE)
+    ],
+    "return_value.get_power_usages.return_value": [
+        details["power_usage"] for details in TWO_GPU_DETAILS_RESPONSE
+    ],
+    "return_value.get_energy_deltas.return_value": [None, None],
+}